@@ -0,0 +1,68 @@
+"""
+Benchmark for the compact Annotation record type.
+
+Decodes synthetic Elucidate result pages built from the single annotation test fixture (one
+json.loads per page, as the library does), and compares the memory held by the decoded dicts
+against the same annotations held as Annotation records.
+
+Usage:
+
+    python benchmarks/bench_annotation_memory.py --pages 100 --items 100
+"""
+import argparse
+import gc
+import json
+import os
+import tracemalloc
+from pyelucidate import pyelucidate as elucidate
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "test", "data", "single_anno.json")
+
+
+def make_pages(pages: int, items: int) -> list:
+    with open(FIXTURE, "r") as f:
+        anno = json.load(f)
+    result = []
+    for p in range(pages):
+        page_items = []
+        for i in range(items):
+            item = dict(anno)
+            item["id"] = "%s-%s-%s" % (anno["id"], p, i)
+            page_items.append(item)
+        result.append(json.dumps({"type": "AnnotationPage", "items": page_items}))
+    return result
+
+
+def measure(pages: list, as_records: bool) -> int:
+    gc.collect()
+    tracemalloc.start()
+    held = []
+    for page in pages:
+        for item in json.loads(page)["items"]:
+            held.append(elucidate.Annotation.from_item(item) if as_records else item)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--items", type=int, default=100)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.items)
+    count = args.pages * args.items
+    dicts = measure(pages, as_records=False)
+    records = measure(pages, as_records=True)
+    print("%s annotations" % count)
+    print("%-12s %10.1f MB %8.0f bytes/annotation" % ("dict", dicts / 1e6, dicts / count))
+    print("%-12s %10.1f MB %8.0f bytes/annotation" % ("Annotation", records / 1e6, records / count))
+    print("saving       x%.2f" % (dicts / records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark for streaming canvas id extraction from large IIIF manifests.
+
+Builds a synthetic Presentation 2 manifest with many canvases (each with a label, an image and
+some metadata), and compares json.loads of the whole manifest against CanvasIds, for time to
+the first canvas id, total time and peak memory.
+
+Usage:
+
+    python benchmarks/bench_manifest_canvas_ids.py --canvases 20000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from pyelucidate.manifest import CanvasIds
+
+
+def make_manifest(canvases: int) -> bytes:
+    base = "https://iiif.example.org/newspaper/issue"
+    manifest = {
+        "@context": "http://iiif.io/api/presentation/2/context.json",
+        "@id": base + "/manifest",
+        "@type": "sc:Manifest",
+        "label": "Newspaper issue",
+        "sequences": [
+            {
+                "@type": "sc:Sequence",
+                "canvases": [
+                    {
+                        "@id": "%s/canvas/%s" % (base, i),
+                        "@type": "sc:Canvas",
+                        "label": "Page %s" % i,
+                        "height": 8000,
+                        "width": 6000,
+                        "metadata": [{"label": "Section", "value": "News " * 50}],
+                        "images": [
+                            {
+                                "@type": "oa:Annotation",
+                                "motivation": "sc:painting",
+                                "on": "%s/canvas/%s" % (base, i),
+                                "resource": {
+                                    "@id": "%s/image/%s/full/full/0/default.jpg" % (base, i),
+                                    "service": {"@id": "%s/image/%s" % (base, i)},
+                                },
+                            }
+                        ],
+                    }
+                    for i in range(canvases)
+                ],
+            }
+        ],
+    }
+    return json.dumps(manifest).encode("utf-8")
+
+
+def chunks(data: bytes, size: int = 65536):
+    for i in range(0, len(data), size):
+        yield data[i: i + size]
+
+
+def full_parse(data: bytes):
+    manifest = json.loads(b"".join(chunks(data)).decode("utf-8"))
+    for canvas in manifest["sequences"][0]["canvases"]:
+        yield canvas["@id"]
+
+
+def streaming(data: bytes):
+    yield from CanvasIds(chunks(data))
+
+
+def measure(name: str, function, data: bytes):
+    start = time.perf_counter()
+    ids = function(data)
+    next(ids)
+    first = time.perf_counter() - start
+    count = 1 + sum(1 for _ in ids)
+    total = time.perf_counter() - start
+    tracemalloc.start()  # separate run, as tracing slows down allocation heavy code
+    sum(1 for _ in function(data))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("%-10s %8d canvases  first %8.3fs  total %8.3fs  peak %8.1f MB" % (name, count, first, total, peak / 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--canvases", type=int, default=20000)
+    args = parser.parse_args()
+
+    data = make_manifest(args.canvases)
+    print("manifest %.1f MB" % (len(data) / 1e6))
+    measure("json", full_parse, data)
+    measure("streaming", streaming, data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark for parallel_transform_pages.
+
+Builds synthetic Elucidate result pages from the single annotation test fixture, and times
+decoding and W3C -> OA transformation (transform_annotation + mirador_oa) in-process, and then
+in a process pool with 1 to N workers.
+
+Usage:
+
+    python benchmarks/bench_parallel_transform.py --pages 400 --items 100 --max-workers 8
+"""
+import argparse
+import json
+import os
+import time
+from pyelucidate import pyelucidate as elucidate
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "test", "data", "single_anno.json")
+
+
+def make_pages(pages: int, items: int) -> list:
+    with open(FIXTURE, "r") as f:
+        anno = json.load(f)
+    result = []
+    for p in range(pages):
+        page_items = []
+        for i in range(items):
+            item = dict(anno)
+            item["id"] = "%s-%s-%s" % (anno["id"], p, i)
+            page_items.append(item)
+        result.append(json.dumps({"type": "AnnotationPage", "items": page_items}).encode("utf-8"))
+    return result
+
+
+def sequential(pages: list) -> int:
+    count = 0
+    for page in pages:
+        count += len(elucidate.transform_page(page, flatten_ids=True, trans_function=elucidate.mirador_oa))
+    return count
+
+
+def parallel(pages: list, workers: int, chunksize: int) -> int:
+    return sum(
+        1
+        for _ in elucidate.parallel_transform_pages(
+            pages,
+            workers=workers,
+            chunksize=chunksize,
+            flatten_ids=True,
+            trans_function=elucidate.mirador_oa,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=4)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.items)
+    megabytes = sum(len(p) for p in pages) / 1e6
+    print("%s pages, %s items, %.1f MB" % (args.pages, args.pages * args.items, megabytes))
+
+    start = time.perf_counter()
+    count = sequential(pages)
+    baseline = time.perf_counter() - start
+    print("%-12s %8.2fs %10.0f items/s" % ("in-process", baseline, count / baseline))
+
+    for workers in range(1, args.max_workers + 1):
+        start = time.perf_counter()
+        count = parallel(pages, workers, args.chunksize)
+        elapsed = time.perf_counter() - start
+        print(
+            "%-12s %8.2fs %10.0f items/s  x%.2f"
+            % ("%s workers" % workers, elapsed, count / elapsed, baseline / elapsed)
+        )
+
+
+if __name__ == "__main__":
+    main()
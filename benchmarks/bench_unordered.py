@@ -0,0 +1,100 @@
+"""
+Benchmark for ordered=False in the async item streams, under simulated latency variance.
+
+Serves synthetic Elucidate search result pages from a local aiohttp server, each delayed by a
+random (log-normal, so with a long tail) latency, and measures how long after the start each
+annotation is yielded, for:
+
+    gather: the default, every page is fetched before the first item is yielded
+    ordered: pages are streamed through a bounded buffer, in page order
+    unordered: pages are streamed, and yielded as they arrive (ordered=False)
+
+Usage:
+
+    python benchmarks/bench_unordered.py --pages 200 --items 50 --median 0.05 --sigma 1.0
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from unittest import mock
+from aiohttp import web
+from pyelucidate import pyelucidate as elucidate
+
+SEARCH = "/annotation/w3c/services/search/target"
+
+
+def serve(pages: int, items: int, median: float, sigma: float, seed: int) -> str:
+    rng = random.Random(seed)
+    delays = [rng.lognormvariate(0, sigma) * median for _ in range(pages)]
+    bodies = [
+        {"type": "AnnotationPage", "items": [{"id": "https://e/anno/%s-%s" % (p, i)} for i in range(items)]}
+        for p in range(pages)
+    ]
+
+    async def page(request):
+        n = int(request.query["page"])
+        await asyncio.sleep(delays[n])
+        return web.json_response(bodies[n])
+
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_get(SEARCH, page)
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return "http://127.0.0.1:%s" % runner.addresses[0][1]
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def measure(base: str, pages: int, **kwargs) -> dict:
+    first = {"type": "AnnotationCollection", "total": pages, "last": base + SEARCH + "?page=%s" % (pages - 1)}
+    response = mock.Mock(status_code=200)
+    response.json.return_value = first
+    with mock.patch.object(elucidate, "_request", return_value=response):
+        start = time.perf_counter()
+        latencies = [
+            time.perf_counter() - start for _ in elucidate.async_items_by_target(base, "https://e/c", **kwargs)
+        ]
+    return {
+        "first": latencies[0],
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "total": latencies[-1],
+        "items": len(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--median", type=float, default=0.05, help="median page latency, seconds")
+    parser.add_argument("--sigma", type=float, default=1.0, help="log-normal sigma, the latency variance")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    base = serve(args.pages, args.items, args.median, args.sigma, args.seed)
+    print("%s pages of %s items, median latency %ss, sigma %s" % (args.pages, args.items, args.median, args.sigma))
+    print("%-10s %8s %8s %8s %8s" % ("mode", "first", "p50", "p99", "total"))
+    modes = [
+        ("gather", {}),
+        ("ordered", {"max_buffer_pages": 2 * args.concurrency}),
+        ("unordered", {"max_buffer_pages": 2 * args.concurrency, "ordered": False}),
+    ]
+    for name, kwargs in modes:
+        r = measure(base, args.pages, connector_limit=args.concurrency, **kwargs)
+        assert r["items"] == args.pages * args.items
+        print("%-10s %7.2fs %7.2fs %7.2fs %7.2fs" % (name, r["first"], r["p50"], r["p99"], r["total"]))
+
+
+if __name__ == "__main__":
+    main()
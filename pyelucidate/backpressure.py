@@ -0,0 +1,174 @@
+"""
+Bounded buffer between an async page fetcher, running in its own thread, and a (possibly slow)
+consumer of the pages' annotations, so that fetching pauses when the consumer falls behind.
+"""
+import asyncio
+import threading
+from collections import deque
+from typing import Optional
+
+# estimated memory used by a decoded page, as a multiple of its size in JSON
+DECODED_FACTOR = 6
+
+
+class PageBuffer:
+    """
+    Thread-safe buffer of fetched pages, bounded by the number of pages held (in flight, queued,
+    and being consumed) and by an estimate of the memory they use.
+
+    The fetcher (in an event loop) awaits reserve() before starting each request, and put()s
+    each page, in order, when it arrives. The consumer get()s each page, and release()s it once
+    all of its items have been yielded. The consumer can close() the buffer at any time, which
+    cancels the fetcher's task, if it was given with set_fetcher(), so that requests in flight
+    don't hold it up.
+
+    Queued pages count their size in JSON against the byte budget, pages being consumed count
+    DECODED_FACTOR times that, as they are decoded, and pages in flight count the average size
+    of the pages that have arrived so far, as their size isn't known until they arrive. A page
+    is always allowed when the buffer is empty, so a page larger than the budget doesn't stop
+    the stream.
+
+    :param max_pages: maximum pages held
+    :param max_bytes: maximum (estimated) bytes of pages held, None for no limit
+    """
+
+    def __init__(self, max_pages: int, max_bytes: Optional[int] = None):
+        self.max_pages = max(1, max_pages)
+        self.max_bytes = max_bytes
+        self.pages = 0  # reserved, i.e. in flight, queued or being consumed
+        self.queued_bytes = 0  # JSON of queued pages
+        self.consumed_bytes = 0  # JSON of pages being consumed
+        self.arrived = 0
+        self.arrived_bytes = 0
+        self.peak_pages = 0
+        self.peak_bytes = 0
+        self.waits = 0  # number of times fetching paused for the consumer
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._wakeup = None  # (loop, asyncio.Event) the fetcher is waiting on
+        self._fetcher = None  # (loop, asyncio.Task) cancelled on close
+        self._finished = False
+        self._closed = False
+        self._error = None
+
+    @property
+    def bytes(self) -> int:
+        """
+        Estimated bytes of the pages held, see PageBuffer.
+        """
+        consuming = 1 if self.consumed_bytes else 0
+        in_flight = self.pages - len(self._queue) - consuming
+        average = self.arrived_bytes // self.arrived if self.arrived else 0
+        return self.queued_bytes + DECODED_FACTOR * self.consumed_bytes + max(0, in_flight) * average
+
+    def _full(self) -> bool:
+        if self.pages >= self.max_pages:
+            return True
+        return self.max_bytes is not None and self.pages > 0 and self.bytes >= self.max_bytes
+
+    def _wake(self):
+        if self._wakeup is not None:
+            loop, event = self._wakeup
+            self._wakeup = None
+            loop.call_soon_threadsafe(event.set)
+
+    async def reserve(self) -> bool:
+        """
+        Wait until there is room for another page, and reserve it. Called by the fetcher.
+
+        :return: False if the consumer has closed the buffer
+        """
+        while True:
+            with self._cond:
+                if self._closed:
+                    return False
+                if not self._full():
+                    self.pages += 1
+                    self.peak_pages = max(self.peak_pages, self.pages)
+                    return True
+                event = asyncio.Event()
+                self._wakeup = (asyncio.get_event_loop(), event)
+                self.waits += 1
+            await event.wait()
+
+    def put(self, page: bytes) -> bool:
+        """
+        Queue a fetched page. Called by the fetcher.
+
+        :return: False if the consumer has closed the buffer
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            self._queue.append(page)
+            self.queued_bytes += len(page)
+            self.arrived += 1
+            self.arrived_bytes += len(page)
+            self.peak_bytes = max(self.peak_bytes, self.bytes)
+            self._cond.notify()
+            return True
+
+    def set_fetcher(self, loop: asyncio.AbstractEventLoop, task: asyncio.Future):
+        """
+        Set the fetcher's task, cancelled (in its loop) if the consumer closes the buffer.
+        Called by the fetcher.
+        """
+        with self._cond:
+            self._fetcher = (loop, task)
+
+    def finish(self, error: Optional[BaseException] = None):
+        """
+        No more pages will be put, optionally because of an error, which get() raises once the
+        queued pages have been consumed. Called by the fetcher.
+        """
+        with self._cond:
+            self._finished = True
+            self._error = error
+            self._wakeup = None  # the fetcher's loop is about to close, there is no one to wake
+            self._fetcher = None
+            self._cond.notify_all()
+
+    def get(self) -> Optional[bytes]:
+        """
+        Wait for the next page. Called by the consumer.
+
+        :return: page, or None when there are no more
+        """
+        with self._cond:
+            while not self._queue and not self._finished:
+                self._cond.wait()
+            if self._queue:
+                page = self._queue.popleft()
+                self.queued_bytes -= len(page)
+                self.consumed_bytes += len(page)
+                self.peak_bytes = max(self.peak_bytes, self.bytes)
+                return page
+            if self._error is not None:
+                raise self._error
+            return None
+
+    def release(self, page: bytes):
+        """
+        Free a page's place in the buffer, once its items have been consumed. Called by the
+        consumer.
+        """
+        with self._cond:
+            self.pages -= 1
+            self.consumed_bytes -= len(page)
+            self._wake()
+
+    def close(self):
+        """
+        Stop the fetcher, e.g. when the consumer stops early, cancelling its requests in flight.
+        Called by the consumer.
+        """
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            self.queued_bytes = 0
+            self._wake()
+            if self._fetcher is not None:
+                loop, task = self._fetcher
+                self._fetcher = None
+                loop.call_soon_threadsafe(task.cancel)
+            self._cond.notify_all()
@@ -0,0 +1,454 @@
+"""
+Command line interface to pyelucidate, installed as the ``pyelucidate`` console script.
+
+Results are streamed to stdout as NDJSON, one JSON object per line, and a throughput summary is
+written to stderr when the command finishes. For example:
+
+.. code-block:: bash
+
+    pyelucidate --elucidate https://elucidate.example.org search --target https://example.org/canvas/1
+    pyelucidate --elucidate https://elucidate.example.org count --by topic https://t/1 https://t/2
+    pyelucidate --elucidate https://elucidate.example.org --rate 10 --execute delete-manifest \\
+        https://example.org/manifest
+
+Write commands are dry runs unless --execute is passed.
+
+The library (and aiohttp) are only imported once the arguments have been parsed, so that
+--help, and argument errors, are fast in shell loops.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+
+def _emit(records: Iterable, check: bool = False, out=None) -> Tuple[int, int]:
+    """
+    Write records to out (stdout) as NDJSON, flushing after each, so output can be piped.
+
+    :param check: if True, count failed result records, see _failed
+    :return: number of records written, number of failures
+    """
+    out = out or sys.stdout
+    count = failures = 0
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        out.flush()
+        count += 1
+        if check and _failed(record):
+            failures += 1
+    return count, failures
+
+
+def _retry(func: Callable, ok: Callable, retries: int, backoff: float, deadline=None, failed=None):
+    """
+    Call func until ok(result) is True, retrying up to retries times, with exponential backoff.
+
+    Only used for idempotent operations (batch and iterative deletes), creates are never retried.
+
+    The deadline (if any) is shared by every attempt, so there are no retries once it has
+    expired, the backoff is capped at the time remaining, and if func raises DeadlineExceeded,
+    failed is returned.
+    """
+    from .pyelucidate import DeadlineExceeded
+
+    for attempt in range(retries + 1):
+        try:
+            result = func()
+        except DeadlineExceeded as e:
+            logging.error("%s", e)
+            return failed
+        if ok(result) or attempt == retries or (deadline is not None and deadline.expired):
+            return result
+        wait = backoff * 2 ** attempt
+        if deadline is not None:
+            wait = min(wait, deadline.remaining())
+        logging.warning("Attempt %s failed, retrying in %ss", attempt + 1, wait)
+        time.sleep(wait)
+
+
+def _failed(record: dict) -> bool:
+    """
+    :return: True if an update, delete or create result record is a failure
+    """
+    status = record.get("status", 200)
+    return record.get("success") is False or status is None or not 200 <= status < 300
+
+
+def _timeout(args) -> Optional[tuple]:
+    if args.timeout is None and args.connect_timeout is None:
+        return None
+    from .pyelucidate import DEFAULT_TIMEOUT
+
+    return (
+        args.connect_timeout if args.connect_timeout is not None else DEFAULT_TIMEOUT[0],
+        args.timeout if args.timeout is not None else DEFAULT_TIMEOUT[1],
+    )
+
+
+def search(args) -> Iterable:
+    from . import pyelucidate as elucidate
+
+    kwargs = dict(
+        timeout=_timeout(args),
+        deadline=args.deadline,
+        connector_limit=args.concurrency,
+        progress=args.progress,
+        max_buffer_bytes=args.max_buffer_bytes,
+    )
+    if args.topic:
+        items = elucidate.async_items_by_topic(args.elucidate, args.topic, **kwargs)
+    elif args.creator:
+        items = elucidate.async_items_by_creator(args.elucidate, args.creator, **kwargs)
+    elif args.container:
+        items = elucidate.async_items_by_container(args.elucidate, container=args.container, **kwargs)
+    else:
+        items = elucidate.async_items_by_target(args.elucidate, args.target, **kwargs)
+    if args.ids_only:
+        return ({"id": item.get("id") or item.get("@id")} for item in items)
+    return items
+
+
+def count_annotations(args) -> Iterable:
+    from .count import count_bulk
+
+    counts = count_bulk(
+        args.elucidate,
+        args.keys,
+        by=args.by,
+        connector_limit=args.concurrency,
+        timeout=_timeout(args),
+        deadline=args.deadline,
+        progress=args.progress,
+    )
+    for key, total in counts.items():
+        yield {args.by: key, "total": total} if total is not None else {args.by: key, "total": None, "success": False}
+
+
+def _journal(args):
+    if not args.journal:
+        return None
+    from .journal import Journal
+
+    return Journal(args.journal)
+
+
+def delete_target(args) -> Iterable:
+    from . import pyelucidate as elucidate
+
+    journal = _journal(args)
+    try:
+        if args.method == "batch":
+            result = _retry(
+                lambda: elucidate.batch_delete_target(
+                    args.target, args.elucidate, dry_run=args.dry_run, timeout=_timeout(args), deadline=args.deadline
+                ),
+                lambda status: status in [200, 201, 204],
+                args.retries,
+                args.backoff,
+                deadline=args.deadline,
+            )
+            return [{"target": args.target, "method": args.method, "status": result}]
+        func = (
+            elucidate.iterative_delete_by_target_async_get
+            if args.method == "async"
+            else elucidate.iterative_delete_by_target
+        )
+        result = _retry(
+            lambda: func(
+                args.target,
+                args.elucidate,
+                **({} if args.method == "async" else {"search_method": args.method}),
+                dryrun=args.dry_run,
+                timeout=_timeout(args),
+                deadline=args.deadline,
+                journal=journal,
+                progress=args.progress,
+            ),
+            bool,
+            args.retries,
+            args.backoff,
+            deadline=args.deadline,
+            failed=False,
+        )
+        return [{"target": args.target, "method": args.method, "success": result}]
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+def delete_manifest(args) -> Iterable:
+    from . import pyelucidate as elucidate
+
+    journal = _journal(args)
+    try:
+        if args.method == "batch":
+            func = lambda: elucidate.iiif_batch_delete_by_manifest(  # noqa: E731
+                args.manifest,
+                args.elucidate,
+                dry_run=args.dry_run,
+                timeout=_timeout(args),
+                deadline=args.deadline,
+            )
+        elif args.method == "async":
+            func = lambda: elucidate.iiif_iterative_delete_by_manifest_async_get(  # noqa: E731
+                args.manifest,
+                args.elucidate,
+                dry_run=args.dry_run,
+                timeout=_timeout(args),
+                deadline=args.deadline,
+                journal=journal,
+                progress=args.progress,
+            )
+        else:
+            func = lambda: elucidate.iiif_iterative_delete_by_manifest(  # noqa: E731
+                args.manifest,
+                args.elucidate,
+                method=args.method,
+                dry_run=args.dry_run,
+                timeout=_timeout(args),
+                deadline=args.deadline,
+                journal=journal,
+                progress=args.progress,
+            )
+        result = _retry(func, bool, args.retries, args.backoff, deadline=args.deadline, failed=False)
+        return [{"manifest": args.manifest, "method": args.method, "success": result}]
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+def update_topic(args) -> Iterable:
+    from . import pyelucidate as elucidate
+
+    return elucidate.batch_update_body_chunked(
+        args.new_topic,
+        args.old_topics,
+        args.elucidate,
+        dry_run=args.dry_run,
+        chunk_size=args.chunk_size,
+        workers=args.concurrency,
+        retries=args.retries,
+        backoff=args.backoff,
+        timeout=_timeout(args),
+        deadline=args.deadline,
+    )
+
+
+def delete_topic(args) -> Iterable:
+    from . import pyelucidate as elucidate
+
+    for topic in args.topics:
+        status, _ = _retry(
+            lambda: elucidate.batch_delete_topic(
+                topic,
+                args.elucidate,
+                dry_run=args.dry_run,
+                timeout=_timeout(args),
+                deadline=args.deadline,
+            ),
+            lambda result: result[0] in [200, 201, 204],
+            args.retries,
+            args.backoff,
+            deadline=args.deadline,
+            failed=(None, None),
+        )
+        yield {"topic": topic, "status": status}
+
+
+def _serialized(path: str) -> Iterable:
+    """
+    Serialized annotations from an NDJSON file (.ndjson or .jsonl), streamed, or a JSON file of
+    an annotation, or a list of annotations.
+    """
+    from .ingest import read_ndjson
+
+    if path.endswith((".ndjson", ".jsonl")):
+        yield from read_ndjson(path)
+        return
+    with open(path, "r") as f:
+        content = json.load(f)
+    for anno in content if isinstance(content, list) else [content]:
+        yield json.dumps(anno, separators=(",", ":"))
+
+
+def create(args) -> Iterable:
+    from .ingest import ingest_ndjson
+
+    for path in args.files:
+        for result in ingest_ndjson(
+            _serialized(path),
+            args.elucidate,
+            container=args.container,
+            model=args.model,
+            dry_run=args.dry_run,
+            workers=args.concurrency,
+            timeout=_timeout(args),
+        ):
+            yield dict(result, file=path)
+
+
+def parser() -> argparse.ArgumentParser:
+    """
+    :return: argument parser for the pyelucidate command
+    """
+    p = argparse.ArgumentParser(prog="pyelucidate", description="Tools for the Elucidate annotation server.")
+    p.add_argument(
+        "--elucidate",
+        default=os.environ.get("ELUCIDATE_BASE"),
+        help="Elucidate server, e.g. https://elucidate.example.org (default: $ELUCIDATE_BASE)",
+    )
+    p.add_argument("--concurrency", type=int, default=5, help="concurrent requests (default: 5)")
+    p.add_argument("--rate", type=float, help="maximum requests per second, per host")
+    p.add_argument("--burst", type=float, help="maximum burst of requests (default: rate)")
+    p.add_argument("--timeout", type=float, help="read timeout in seconds for each request")
+    p.add_argument("--connect-timeout", type=float, help="connect timeout in seconds for each request")
+    p.add_argument("--deadline", type=float, help="overall deadline in seconds, where supported")
+    p.add_argument("--retries", type=int, default=2, help="retries for failed batch updates and deletes")
+    p.add_argument("--backoff", type=float, default=1.0, help="initial retry backoff in seconds")
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", dest="dry_run", action="store_true", default=True, help="(default)")
+    mode.add_argument("--execute", dest="dry_run", action="store_false", help="make changes, not a dry run")
+    p.add_argument("--quiet", action="store_true", help="no summary")
+    p.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="profile the command, saving PATH.prof, PATH.tracemalloc and PATH.json, "
+        "and write a report to stderr",
+    )
+    p.add_argument(
+        "--progress",
+        action="store_true",
+        help="report progress on stderr, for searches and iterative deletes",
+    )
+    p.add_argument("--verbose", "-v", action="count", default=0)
+    commands = p.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    c = commands.add_parser("search", help="stream annotations by topic, target, creator or container")
+    which = c.add_mutually_exclusive_group(required=True)
+    which.add_argument("--topic", help="body source URI")
+    which.add_argument("--target", help="target URI")
+    which.add_argument("--creator", help="creator URI")
+    which.add_argument("--container", help="container path")
+    c.add_argument(
+        "--ids-only", "--flatten-ids", action="store_true", help='output annotation ids only, as {"id": ...}'
+    )
+    c.add_argument(
+        "--max-buffer-bytes",
+        type=int,
+        help="stream pages through a buffer of at most this many (estimated) bytes of memory, "
+        "pausing fetching when output is slow",
+    )
+    c.set_defaults(func=search)
+
+    c = commands.add_parser("count", help="count annotations by topic, target, creator or container")
+    c.add_argument("keys", nargs="+", help="topic, target or creator URIs, or container paths")
+    c.add_argument("--by", choices=["topic", "target", "creator", "container"], default="target")
+    c.set_defaults(func=count_annotations)
+
+    c = commands.add_parser("delete-target", help="delete annotations by target")
+    c.add_argument("target", help="target URI")
+    c.add_argument("--method", choices=["batch", "container", "search", "async"], default="batch")
+    c.add_argument("--journal", help="SQLite journal path, for iterative deletes")
+    c.set_defaults(func=delete_target)
+
+    c = commands.add_parser("delete-manifest", help="delete annotations on a IIIF manifest's canvases")
+    c.add_argument("manifest", help="manifest URI")
+    c.add_argument("--method", choices=["batch", "container", "search", "async"], default="batch")
+    c.add_argument("--journal", help="SQLite journal path, for resumable iterative deletes")
+    c.set_defaults(func=delete_manifest)
+
+    c = commands.add_parser("update-topic", help="batch update body source from old topics to a new topic")
+    c.add_argument("new_topic", help="new topic URI")
+    c.add_argument("old_topics", nargs="+", help="old topic URIs")
+    c.add_argument("--chunk-size", type=int, default=50, help="old topics per batch request")
+    c.set_defaults(func=update_topic)
+
+    c = commands.add_parser("delete-topic", help="batch delete annotations by topic")
+    c.add_argument("topics", nargs="+", help="topic URIs")
+    c.set_defaults(func=delete_topic)
+
+    c = commands.add_parser("create", help="create annotations from JSON or NDJSON files")
+    c.add_argument("files", nargs="+", help="JSON (an annotation, or list) or NDJSON files")
+    c.add_argument("--container", help="container (default: md5 hash of each annotation's target)")
+    c.add_argument("--model", choices=["w3c", "oa"], default="w3c")
+    c.set_defaults(func=create)
+    return p
+
+
+def main(argv: Optional[list] = None) -> int:
+    """
+    Entry point for the pyelucidate command.
+
+    :param argv: arguments, defaults to sys.argv[1:]
+    :return: exit status
+    """
+    args = parser().parse_args(argv)
+    if not args.elucidate:
+        parser().error("--elucidate (or $ELUCIDATE_BASE) is required")
+    args.elucidate = args.elucidate.rstrip("/")
+    logging.basicConfig(
+        level=[logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)],
+        format="%(levelname)s %(message)s",
+        stream=sys.stderr,
+    )
+    from . import pyelucidate as elucidate
+
+    args.deadline = elucidate.as_deadline(args.deadline)  # one deadline, shared by every request and retry
+    if args.rate:
+        from .ratelimit import RateLimiter
+
+        elucidate.set_rate_limiter(RateLimiter(rate=args.rate, burst=args.burst))
+    if args.progress:
+        from .progress import Progress
+
+        args.progress = Progress()
+    else:
+        args.progress = None
+    profile = None
+    if args.profile:
+        from .profiling import Profile
+
+        profile = Profile(args.profile)
+    elucidate.transfer_stats.reset()
+    start = time.monotonic()
+    try:
+        if profile is not None:
+            with profile:
+                count, failures = _emit(args.func(args), check=args.command != "search")
+            sys.stderr.write(profile.format_report())
+        else:
+            count, failures = _emit(args.func(args), check=args.command != "search")
+    except BrokenPipeError:  # e.g. piped to head
+        return 0
+    finally:
+        elucidate.set_rate_limiter(None)
+        if args.progress is not None:
+            args.progress.close()
+    elapsed = time.monotonic() - start
+    if not args.quiet:
+        stats = elucidate.transfer_stats.stats()
+        sys.stderr.write(
+            "%s records (%s failed) in %.2fs (%.1f/s), %s requests (%.1f/s), "
+            "%s bytes received (%.0f bytes/s)%s\n"
+            % (
+                count,
+                failures,
+                elapsed,
+                count / elapsed if elapsed else 0.0,
+                stats["requests"],
+                stats["requests"] / elapsed if elapsed else 0.0,
+                stats["received"],
+                stats["received"] / elapsed if elapsed else 0.0,
+                ", dry run" if args.dry_run and args.command not in ("search", "count") else "",
+            )
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+Count the annotations for a topic, target, creator or container from the total on the first page
+of the query, with a single request, rather than streaming every item.
+"""
+import asyncio
+import json
+import logging
+from typing import Optional, Tuple, Union
+import aiohttp
+import requests
+from aiohttp import ClientSession, TCPConnector
+from .export import search_uri
+from .progress import Progress
+from .pyelucidate import (
+    Deadline,
+    DeadlineExceeded,
+    _async_request,
+    _request,
+    as_deadline,
+    client_timeout,
+    gen_search_by_container_uri,
+)
+from .ratelimit import RateLimiter
+
+BY = ("topic", "target", "creator", "container")
+
+# ask Elucidate for the container without its first page of annotations, the total is still sent
+MINIMAL_CONTAINER = {
+    "Prefer": 'return=representation;include="http://www.w3.org/ns/ldp#PreferMinimalContainer"'
+}
+
+
+def _total(status: int, content: bytes, uri: str) -> Optional[int]:
+    """
+    :return: total from the first page of a query, 0 if the container doesn't exist, None on error
+    """
+    if status == requests.codes.not_found:
+        return 0
+    if status != requests.codes.ok:
+        logging.warning("Could not count %s, server returned %s", uri, status)
+        return None
+    try:
+        return int(json.loads(content)["total"])
+    except (ValueError, KeyError, TypeError):
+        logging.warning("Could not count %s, no total in the response", uri)
+        return None
+
+
+def query_uri(elucidate: str, by: str, key: str) -> Optional[str]:
+    """
+    URI of the first page of the same query as async_items_by_topic, async_items_by_target,
+    async_items_by_creator or async_items_by_container.
+
+    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+    :param by: one of BY
+    :param key: topic, target, creator URI, or container path
+    :return: uri
+    """
+    if by not in BY:
+        raise ValueError("Can't count by %s, must be one of %s" % (by, ", ".join(BY)))
+    return search_uri(elucidate, **{{"target": "target_uri", "creator": "creator_id"}.get(by, by): key})
+
+
+def count_uri(
+    uri: str,
+    headers: Optional[dict] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Optional[int]:
+    """
+    Count the annotations in a search or container, from the total on its first page.
+
+    :param uri: search or container URI
+    :param headers: optional dict of headers
+    :param timeout: seconds, or (connect, read) tuple, for the request
+    :param deadline: Deadline (or seconds) for the request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: number of annotations (0 if the container doesn't exist), None on error
+    """
+    try:
+        r = _request("GET", uri, timeout=timeout, deadline=deadline, limiter=limiter, headers=headers)
+    except (DeadlineExceeded, requests.exceptions.RequestException) as e:
+        logging.warning("Could not count %s: %s", uri, e)
+        return None
+    return _total(r.status_code, r.content, uri)
+
+
+def count_by_topic(elucidate: str, topic: str, **kwargs) -> Optional[int]:
+    """
+    Count the annotations with a topic as body source, with one request.
+
+    Accepts the same keyword args as count_uri.
+
+    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+    :param topic: URI from body source, e.g. 'https://topics.example.org/people/mary+jones'
+    :return: number of annotations, None on error
+    """
+    return count_uri(query_uri(elucidate, "topic", topic), **kwargs)
+
+
+def count_by_target(elucidate: str, target_uri: str, **kwargs) -> Optional[int]:
+    """
+    Count the annotations on a target (source or id), with one request.
+
+    Accepts the same keyword args as count_uri.
+
+    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+    :param target_uri: target URI, e.g. 'https://manifest.example.org/manifest/1'
+    :return: number of annotations, None on error
+    """
+    return count_uri(query_uri(elucidate, "target", target_uri), **kwargs)
+
+
+def count_by_creator(elucidate: str, creator_id: str, **kwargs) -> Optional[int]:
+    """
+    Count the annotations by a creator, with one request.
+
+    Accepts the same keyword args as count_uri.
+
+    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+    :param creator_id: creator URI
+    :return: number of annotations, None on error
+    """
+    return count_uri(query_uri(elucidate, "creator", creator_id), **kwargs)
+
+
+def count_by_container(
+    elucidate: str, container: Optional[str] = None, target_uri: Optional[str] = None, **kwargs
+) -> Optional[int]:
+    """
+    Count the annotations in a container, with one request, asking for a minimal container so
+    that the first page of annotations isn't sent.
+
+    Container can be hashed from target URI, or provided. Accepts the same keyword args as
+    count_uri.
+
+    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+    :param container: container path
+    :param target_uri: target URI, the container is the md5 hash of it
+    :return: number of annotations (0 if the container doesn't exist), None on error
+    """
+    if not container and target_uri:
+        uri = gen_search_by_container_uri(elucidate_base=elucidate, target_uri=target_uri)
+    elif container:
+        uri = query_uri(elucidate, "container", container)
+    else:
+        return None
+    return count_uri(uri, **dict(kwargs, headers=dict(MINIMAL_CONTAINER, **(kwargs.get("headers") or {}))))
+
+
+async def _count(uri: str, session: ClientSession, headers: Optional[dict], limiter) -> Optional[int]:
+    try:
+        status, _, body = await _async_request("GET", uri, session=session, limiter=limiter, headers=headers)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logging.warning("Could not count %s: %s", uri, e)
+        return None
+    return _total(status, body, uri)
+
+
+async def count_all(
+    uris: dict,
+    connector_limit: int = 20,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    limiter: Optional[RateLimiter] = None,
+    progress: Optional[Progress] = None,
+    headers: Optional[dict] = None,
+) -> dict:
+    """
+    Count the annotations for each of a dict of keys to search or container URIs, concurrently,
+    over one pooled session.
+
+    :param uris: dict of key to URI
+    :param connector_limit: integer for max parallel connections
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for all of the counts, those not done in time are None
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :param progress: optional Progress, to count the requests done (of the total) in, as pages
+    :param headers: optional dict of headers for each request
+    :return: dict of key to number of annotations, None on error
+    """
+    deadline = as_deadline(deadline)
+    counts = dict.fromkeys(uris)
+    if not uris or (deadline is not None and deadline.expired):
+        return counts
+    async with ClientSession(
+        connector=TCPConnector(limit=connector_limit), timeout=client_timeout(timeout)
+    ) as session:
+        tasks = {}
+        for key, uri in uris.items():
+            task = asyncio.ensure_future(_count(uri, session, headers, limiter))
+            if progress is not None:
+                task.add_done_callback(lambda t: t.cancelled() or progress.add(pages=1))
+            tasks[task] = key
+        if progress is not None:
+            progress.add(pages_total=len(tasks))
+        done, pending = await asyncio.wait(tasks, timeout=deadline.remaining() if deadline else None)
+        if pending:
+            logging.warning(
+                "Deadline of %ss exceeded, cancelled %s of %s counts", deadline.seconds, len(pending), len(tasks)
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending)
+        for task in done:
+            counts[tasks[task]] = task.result()
+    return counts
+
+
+def count_bulk(elucidate: str, keys: list, by: str = "target", **kwargs) -> dict:
+    """
+    Count the annotations for each of many topics, targets, creators or containers,
+    concurrently, with one request each, over one pooled session.
+
+    Accepts the same keyword args as count_all, e.g. connector_limit (default 20), deadline.
+
+    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+    :param keys: list of topic, target or creator URIs, or container paths
+    :param by: one of BY
+    :return: dict of key to number of annotations (0 if a container doesn't exist), None on error
+    """
+    uris = {key: query_uri(elucidate, by, key) for key in keys}
+    if by == "container":
+        kwargs = dict(kwargs, headers=dict(MINIMAL_CONTAINER, **(kwargs.get("headers") or {})))
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(count_all(uris, **kwargs))
+    finally:
+        loop.close()
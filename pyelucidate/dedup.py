@@ -0,0 +1,175 @@
+"""
+Memory-bounded sets for deduplicating annotation ids as they are streamed from Elucidate.
+"""
+import hashlib
+import math
+from array import array
+from typing import Iterable, Optional
+
+
+def id_hash(uri: str) -> int:
+    """
+    Hash an annotation id to a non-zero signed 64 bit integer.
+
+    :param uri: annotation id
+    :return: integer hash
+    """
+    h = int.from_bytes(hashlib.md5(uri.encode("utf-8")).digest()[:8], "little", signed=True)
+    return h or 1  # 0 marks an empty slot in IdSet
+
+
+class IdSet:
+    """
+    Compact set of annotation ids, stored as 64 bit hashes in an open addressing hash table
+    backed by an array of int64, i.e. roughly 16 bytes per id, rather than a Python set of
+    strings.
+
+    Exact, other than for 64 bit hash collisions, which for a billion ids have a probability of
+    around 1 in 30 million.
+
+    :param capacity: expected number of ids, the table grows as needed
+    """
+
+    def __init__(self, capacity: int = 1024):
+        size = 16
+        while size < capacity * 2:
+            size *= 2
+        self._slots = array("q", bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _find(self, h: int) -> int:
+        i = h & self._mask
+        slots = self._slots
+        while slots[i] != 0 and slots[i] != h:
+            i = (i + 1) & self._mask
+        return i
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array("q", bytes(8 * len(old) * 2))
+        self._mask = len(self._slots) - 1
+        for h in old:
+            if h:
+                self._slots[self._find(h)] = h
+
+    def add(self, uri: str) -> bool:
+        """
+        Add an id to the set.
+
+        :param uri: annotation id
+        :return: True if the id was not already in the set
+        """
+        h = id_hash(uri)
+        i = self._find(h)
+        if self._slots[i] == h:
+            return False
+        self._slots[i] = h
+        self._count += 1
+        if self._count * 10 > len(self._slots) * 7:  # keep the load factor under 0.7
+            self._grow()
+        return True
+
+    def __contains__(self, uri: str) -> bool:
+        h = id_hash(uri)
+        return self._slots[self._find(h)] == h
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: bytes used by the hash table
+        """
+        return len(self._slots) * self._slots.itemsize
+
+
+class BloomFilter:
+    """
+    Approximate set of annotation ids, with a fixed memory size set by the expected capacity
+    and false positive rate.
+
+    A false positive means an id is reported as already seen when it was not, so when used to
+    deduplicate annotations to delete, roughly error_rate of them will be skipped.
+
+    :param capacity: expected number of ids
+    :param error_rate: false positive rate at capacity
+    """
+
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self._hashes = max(1, int(round(self._bits / capacity * math.log(2))))
+        self._array = bytearray((self._bits + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _positions(self, uri: str):
+        digest = hashlib.md5(uri.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for k in range(self._hashes):
+            yield (h1 + k * h2) % self._bits
+
+    def add(self, uri: str) -> bool:
+        """
+        Add an id to the filter.
+
+        :param uri: annotation id
+        :return: True if the id was (probably) not already in the filter
+        """
+        new = False
+        for p in self._positions(uri):
+            byte, bit = divmod(p, 8)
+            if not self._array[byte] & (1 << bit):
+                self._array[byte] |= 1 << bit
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def __contains__(self, uri: str) -> bool:
+        return all(self._array[p // 8] & (1 << (p % 8)) for p in self._positions(uri))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: bytes used by the bit array
+        """
+        return len(self._array)
+
+
+def new_id_set(mode: str = "exact", capacity: Optional[int] = None, error_rate: float = 0.001):
+    """
+    Create an id set for deduplication.
+
+    :param mode: 'exact' (IdSet) or 'bloom' (BloomFilter)
+    :param capacity: expected number of ids
+    :param error_rate: false positive rate, for 'bloom' only
+    :return: IdSet or BloomFilter
+    """
+    if mode == "exact":
+        return IdSet(capacity or 1024)
+    elif mode == "bloom":
+        return BloomFilter(capacity or 1000000, error_rate)
+    else:
+        raise ValueError("Unknown dedup mode %s, expected 'exact' or 'bloom'" % mode)
+
+
+def unique(ids: Iterable[str], mode: str = "exact", **kwargs) -> Optional[str]:
+    """
+    Generator which yields each id the first time it is seen.
+
+    :param ids: iterable of ids
+    :param mode: 'exact' or 'bloom', see new_id_set
+    :param kwargs: capacity, error_rate, see new_id_set
+    :return: id
+    """
+    seen = new_id_set(mode, **kwargs)
+    for i in ids:
+        if seen.add(i):
+            yield i
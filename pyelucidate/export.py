@@ -0,0 +1,210 @@
+"""
+Streaming NDJSON export of Elucidate search results and containers, with bounded memory and
+resume.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Callable, Optional, Tuple, Union
+from urllib.parse import quote_plus
+import requests
+from .pyelucidate import (
+    Deadline,
+    DeadlineExceeded,
+    _request,
+    annotation_pages,
+    as_deadline,
+    fetch_all,
+    filter_items,
+)
+from .ratelimit import RateLimiter
+
+
+def search_uri(
+    elucidate: str,
+    topic: Optional[str] = None,
+    target_uri: Optional[str] = None,
+    creator_id: Optional[str] = None,
+    container: Optional[str] = None,
+) -> Optional[str]:
+    """
+    URI of the first page of the same query as async_items_by_topic, async_items_by_target,
+    async_items_by_creator or async_items_by_container, for export_ndjson.
+
+    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+    :param topic: body source URI
+    :param target_uri: target URI
+    :param creator_id: creator URI
+    :param container: container path
+    :return: uri
+    """
+    if topic:
+        return elucidate + "/annotation/w3c/services/search/body?fields=source,id&value=" + quote_plus(topic)
+    elif creator_id:
+        return (
+            elucidate
+            + "/annotation/w3c/services/search/creator?type=id&levels=annotation&strict=True&value="
+            + quote_plus(creator_id)
+        )
+    elif container:
+        return elucidate + "/annotation/w3c/" + container.strip("/") + "/"
+    elif target_uri:
+        return elucidate + "/annotation/w3c/services/search/target?fields=source,id&value=" + quote_plus(target_uri)
+    return None
+
+
+def _write_progress(path: str, progress: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(progress, f)
+    os.replace(tmp, path)  # atomic, so the sidecar is never half written
+
+
+def export_ndjson(
+    uri: str,
+    path: str,
+    compress: Optional[bool] = None,
+    window: int = 5,
+    resume: bool = True,
+    filter_by: Optional[dict] = None,
+    flatten_ids: Optional[bool] = None,
+    trans_function: Optional[Callable] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> dict:
+    """
+    Export every annotation from an Elucidate search or container (see search_uri) to an NDJSON
+    file, one annotation per line, optionally gzip compressed.
+
+    Pages are fetched window at a time, concurrently, and written in page order, so memory is
+    bounded by the window rather than the size of the result set. After each window the file is
+    flushed, and the number of pages written and the file size are recorded in a sidecar file
+    (path + ".progress"). If the export fails, running it again with resume=True truncates the
+    file to the last recorded size and carries on from the next page. The sidecar is removed
+    when the export completes.
+
+    When compressed, each window is written as a separate gzip member, so the file can be
+    truncated at any window boundary and still be read by gzip (or gzip.open) as a whole.
+
+    N.B. Elucidate pages by offset, so annotations added or removed during an export (or between
+    a failure and a resume) can shift between pages, and be missed or repeated.
+
+    :param uri: first page of a search, or a container, see search_uri
+    :param path: output file path
+    :param compress: gzip the output, defaults to True if path ends with .gz
+    :param window: number of pages to fetch concurrently, and to write between checkpoints
+    :param resume: if True, resume from the sidecar file, if there is one for the same uri
+    :param filter_by: as for filter_items
+    :param flatten_ids: as for filter_items
+    :param trans_function: as for filter_items
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline, or seconds, for the whole export, after which it stops at the
+        last complete window, and can be resumed
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: dict of items, pages, bytes (written by this run), elapsed seconds, items_per_s,
+        bytes_per_s, resumed_from (page) and complete
+    """
+    deadline = as_deadline(deadline)
+    if compress is None:
+        compress = path.endswith(".gz")
+    sidecar = path + ".progress"
+    start = time.monotonic()
+    report = {"items": 0, "pages": 0, "bytes": 0, "resumed_from": 0, "complete": False}
+    progress = {"uri": uri, "pages": 0, "offset": 0, "items": 0}
+    if resume and os.path.exists(sidecar):
+        with open(sidecar, "r") as f:
+            saved = json.load(f)
+        if saved.get("uri") == uri:
+            progress = saved
+            report["resumed_from"] = progress["pages"]
+            logging.info("Resuming export of %s from page %s", uri, progress["pages"])
+    try:
+        r = _request("GET", uri, timeout=timeout, deadline=deadline, limiter=limiter)
+    except (DeadlineExceeded, requests.exceptions.RequestException) as e:
+        logging.error("Could not export %s: %s", uri, e)
+        return _rates(report, start)
+    if r.status_code != requests.codes.ok:
+        logging.error("Could not export %s, server returned %s", uri, r.status_code)
+        return _rates(report, start)
+    pages = list(annotation_pages(r.json()))
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        with open(path, "ab") as f:
+            f.truncate(progress["offset"])  # drop anything written after the last checkpoint
+            f.seek(progress["offset"])
+            for first in range(progress["pages"], len(pages), window):
+                urls = pages[first: first + window]
+                try:
+                    results = loop.run_until_complete(
+                        fetch_all(
+                            urls,
+                            connector_limit=window,
+                            timeout=timeout,
+                            deadline=deadline,
+                            raw=True,
+                            limiter=limiter,
+                        )
+                    )
+                except Exception as e:  # e.g. a connection error, which can be resumed from here
+                    logging.error("Export of %s failed at page %s: %s", uri, first, e)
+                    return _rates(report, start)
+                if len(results) < len(urls):
+                    logging.warning("Deadline exceeded, export of %s stopped at page %s", uri, first)
+                    return _rates(report, start)
+                lines = []
+                for offset, page in enumerate(results):
+                    try:
+                        page = json.loads(page.decode("utf-8"))
+                    except ValueError:
+                        page = None
+                    if not isinstance(page, dict) or ("items" not in page and page.get("type") != "AnnotationPage"):
+                        # e.g. an error response, which must not be exported as an empty page
+                        logging.error("Export of %s failed, %s is not a page", uri, urls[offset])
+                        return _rates(report, start)
+                    for item in filter_items(
+                        page.get("items") or [],
+                        filter_by=filter_by,
+                        flatten_ids=flatten_ids,
+                        trans_function=trans_function,
+                    ):
+                        lines.append(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+                data = "".join(line + "\n" for line in lines).encode("utf-8")
+                if compress:
+                    data = gzip.compress(data)  # a separate gzip member per window
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                progress["pages"] = first + len(urls)
+                progress["offset"] = f.tell()
+                progress["items"] += len(lines)
+                _write_progress(sidecar, progress)
+                report["items"] += len(lines)
+                report["pages"] += len(urls)
+                report["bytes"] += len(data)
+    finally:
+        loop.close()
+    if os.path.exists(sidecar):
+        os.remove(sidecar)
+    report["complete"] = True
+    _rates(report, start)
+    logging.info(
+        "Exported %s items from %s to %s, %.0f items/s, %.0f bytes/s",
+        progress["items"],
+        uri,
+        path,
+        report["items_per_s"],
+        report["bytes_per_s"],
+    )
+    return report
+
+
+def _rates(report: dict, start: float) -> dict:
+    report["elapsed"] = time.monotonic() - start
+    report["items_per_s"] = report["items"] / report["elapsed"] if report["elapsed"] else 0.0
+    report["bytes_per_s"] = report["bytes"] / report["elapsed"] if report["elapsed"] else 0.0
+    return report
@@ -0,0 +1,263 @@
+"""
+Single pass facet counts (body source, creator, generator, motivation, parent manifest) and
+co-occurrence counts over any of the library's item streams, with interned keys and, for very
+high cardinality facets, a bounded top-k heavy hitters sketch.
+"""
+import heapq
+import itertools
+from collections import Counter
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+from .pyelucidate import Annotation, InternTable, _first_uri, parent_from_annotation
+
+
+def _uris(value) -> List[str]:
+    """
+    URIs for a property that may be a URI string, an object with an id (or source), or a list of
+    either.
+    """
+    if not isinstance(value, list):
+        value = [value]
+    return [uri for uri in (_first_uri(v) for v in value) if uri]
+
+
+def _manifest(item: dict) -> List[str]:
+    try:
+        parent = parent_from_annotation(item)
+    except (KeyError, TypeError, IndexError):  # no target, or an unexpected target shape
+        return []
+    return [parent] if isinstance(parent, str) else []
+
+
+FACETS = {
+    "body_source": lambda item: _uris(item.get("body")),
+    "creator": lambda item: _uris(item.get("creator")),
+    "generator": lambda item: _uris(item.get("generator")),
+    "motivation": lambda item: _uris(item.get("motivation")),
+    "manifest": _manifest,
+}
+
+
+class TopK:
+    """
+    Space-Saving heavy hitters sketch (Metwally et al.), which counts at most k keys, so memory is
+    bounded however many distinct keys the stream has.
+
+    When a new key arrives and k keys are already counted, the key with the smallest count is
+    evicted, and the new key takes over its count (plus one). Counts are therefore over-estimates,
+    by at most error(key), but any key occurring more than total / k times is guaranteed to be
+    counted, and on skewed streams, as facet values usually are, the top keys are rarely evicted
+    so their counts are exact or close to it.
+
+    Has the same most_common() as collections.Counter, so the two are interchangeable.
+
+    :param k: maximum number of keys counted
+    """
+
+    def __init__(self, k: int):
+        self.k = max(1, k)
+        self.total = 0
+        self.evictions = 0
+        self._counts = {}
+        self._errors = {}
+        self._heap = []  # one (count, key) per key, the count may be stale (lower) after updates
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, key) -> bool:
+        return key in self._counts
+
+    def __getitem__(self, key) -> int:
+        return self._counts.get(key, 0)
+
+    def _pop_min(self) -> Tuple[int, object]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            current = self._counts[key]
+            if current == count:
+                return count, key
+            heapq.heappush(self._heap, (current, key))
+
+    def update(self, keys: Iterable):
+        """
+        Count each of keys once.
+        """
+        for key in keys:
+            self.add(key)
+
+    def add(self, key, n: int = 1):
+        """
+        Count key n times.
+        """
+        self.total += n
+        if key in self._counts:
+            self._counts[key] += n
+        elif len(self._counts) < self.k:
+            self._counts[key] = n
+            self._errors[key] = 0
+            heapq.heappush(self._heap, (n, key))
+        else:
+            minimum, evicted = self._pop_min()
+            del self._counts[evicted]
+            del self._errors[evicted]
+            self.evictions += 1
+            self._counts[key] = minimum + n
+            self._errors[key] = minimum
+            heapq.heappush(self._heap, (minimum + n, key))
+
+    def error(self, key) -> int:
+        """
+        :return: maximum over-estimate of key's count
+        """
+        return self._errors.get(key, 0)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[object, int]]:
+        """
+        :param n: number of keys, defaults to all counted keys
+        :return: list of (key, count), highest count first
+        """
+        ranked = sorted(self._counts.items(), key=lambda kv: kv[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+
+class FacetAggregator:
+    """
+    Count annotations by several facets, and by pairs of facets (co-occurrence), in one pass over
+    an item stream, e.g. from get_items, async_items_by_topic or an AnnotationIndex.
+
+    Each annotation is counted once for each distinct value of each facet it has, e.g. an
+    annotation with two bodies with the same source counts once for that source. Keys are interned
+    (in a bounded InternTable by default), so the counters share one copy of each URI.
+
+    Pass top_k to count each facet, and pair, in a TopK sketch of at most top_k keys, rather than
+    exactly in a Counter, so that memory is bounded on very high cardinality facets.
+
+    For example:
+
+    .. code-block:: python
+
+        facets = FacetAggregator(pairs=[("body_source", "manifest")], top_k=1000)
+        for item in facets.tap(async_items_by_target(elucidate, target)):
+            ...  # the items are passed through unchanged
+        facets.most_common("creator", 10)
+        facets.cooccurrence("body_source", "manifest", 10)
+
+    :param facets: facet names (from FACETS), or dict of name to function returning a list of
+        values for an annotation, defaults to all of FACETS
+    :param pairs: optional list of (facet, facet) pairs to count co-occurrence for
+    :param top_k: optional maximum number of keys counted for each facet and pair
+    :param intern: optional InternTable, or other function, used to intern keys
+    """
+
+    def __init__(
+        self,
+        facets: Optional[Union[Iterable[str], dict]] = None,
+        pairs: Optional[List[Tuple[str, str]]] = None,
+        top_k: Optional[int] = None,
+        intern: Optional[Callable] = None,
+    ):
+        if facets is None:
+            facets = FACETS
+        if not isinstance(facets, dict):
+            unknown = [f for f in facets if f not in FACETS]
+            if unknown:
+                raise ValueError("Unknown facets: %s" % ", ".join(unknown))
+            facets = {f: FACETS[f] for f in facets}
+        self.extractors = dict(facets)
+        self.pairs = [tuple(pair) for pair in pairs or []]
+        for a, b in self.pairs:
+            if a not in self.extractors or b not in self.extractors:
+                raise ValueError("Can't count co-occurrence of %s and %s, not both facets" % (a, b))
+        self.top_k = top_k
+        self.intern = intern if intern is not None else InternTable()
+        self.counters = {name: self._counter() for name in self.extractors}
+        self.pair_counters = {pair: self._counter() for pair in self.pairs}
+        self.annotations = 0
+
+    def _counter(self) -> Union[Counter, TopK]:
+        return TopK(self.top_k) if self.top_k else Counter()
+
+    def add(self, item: Union[dict, Annotation]):
+        """
+        Count an annotation (dict or Annotation record).
+        """
+        if isinstance(item, Annotation):
+            item = item.content
+        if not isinstance(item, dict):
+            return
+        self.annotations += 1
+        values = {}
+        for name, extract in self.extractors.items():
+            values[name] = {self.intern(v) for v in extract(item)}
+            self.counters[name].update(values[name])
+        for pair in self.pairs:
+            self.pair_counters[pair].update(itertools.product(values[pair[0]], values[pair[1]]))
+
+    def tap(self, items: Iterable) -> Iterable:
+        """
+        Count each item as it is yielded, passing it through unchanged, so the aggregator can be
+        a stage in a pipeline.
+
+        :param items: annotations
+        :return: annotation
+        """
+        for item in items:
+            self.add(item)
+            yield item
+
+    def consume(self, items: Iterable) -> "FacetAggregator":
+        """
+        Count every item.
+
+        :param items: annotations
+        :return: self
+        """
+        for item in items:
+            self.add(item)
+        return self
+
+    def most_common(self, facet: str, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        :param facet: facet name
+        :param n: number of values, defaults to all
+        :return: list of (value, count), highest count first
+        """
+        return self.counters[facet].most_common(n)
+
+    def cooccurrence(self, a: str, b: str, n: Optional[int] = None) -> List[Tuple[Tuple[str, str], int]]:
+        """
+        :param a: facet name
+        :param b: facet name, (a, b) must be one of pairs
+        :param n: number of value pairs, defaults to all
+        :return: list of ((value of a, value of b), count), highest count first
+        """
+        return self.pair_counters[(a, b)].most_common(n)
+
+    def results(self, n: Optional[int] = None) -> dict:
+        """
+        :param n: number of values for each facet and pair, defaults to all
+        :return: dict of annotations (number counted), facets (dict of facet name to list of
+            [value, count]) and pairs (dict of "a|b" to list of [value of a, value of b, count]),
+            which can be serialised as JSON
+        """
+        return {
+            "annotations": self.annotations,
+            "facets": {name: [[k, c] for k, c in self.most_common(name, n)] for name in self.counters},
+            "pairs": {
+                "%s|%s" % pair: [[ka, kb, c] for (ka, kb), c in counter.most_common(n)]
+                for pair, counter in self.pair_counters.items()
+            },
+        }
+
+
+def aggregate_facets(items: Iterable, n: Optional[int] = None, **kwargs) -> dict:
+    """
+    Count annotations by facets, and pairs of facets, in one pass, see FacetAggregator.
+
+    Accepts the same keyword args as FacetAggregator (facets, pairs, top_k, intern).
+
+    :param items: annotations, e.g. from async_items_by_topic
+    :param n: number of values for each facet and pair, defaults to all
+    :return: see FacetAggregator.results
+    """
+    return FacetAggregator(**kwargs).consume(items).results(n)
@@ -0,0 +1,271 @@
+"""
+Optional local SQLite index of annotations, by target, container and id, populated from any of
+the library's item streams, so that repeated lookups don't need to go to Elucidate.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+from typing import Iterable, Optional, Union
+from urllib.parse import urlparse
+from .pyelucidate import Annotation, filter_items, identify_target
+
+
+def container_for(anno_id: Optional[str], target: Optional[str] = None) -> Optional[str]:
+    """
+    Container for an annotation, from its id (e.g. https://elucidate.example.org/annotation/w3c/
+    <container>/<annotation>), or if that isn't possible, the md5 hash of its target URI (as per
+    current DLCS general practice, see gen_search_by_container_uri).
+
+    :param anno_id: annotation id
+    :param target: target URI
+    :return: container
+    """
+    if anno_id:
+        segments = [s for s in urlparse(anno_id).path.split("/") if s]
+        if len(segments) >= 4 and segments[-4] == "annotation":
+            return segments[-2]
+    if target:
+        return hashlib.md5(target.encode("utf-8")).hexdigest()
+    return None
+
+
+class AnnotationIndex:
+    """
+    SQLite index of annotations, with indexed lookups by target (as returned by identify_target),
+    container and annotation id, and the annotation's ETag, if known.
+
+    Annotations are added in batches, in a single transaction, when batch_size annotations are
+    pending, and on flush() or close(). Lookups flush first.
+
+    Can be used as a context manager, which closes (and flushes) the index on exit.
+
+    For example, to index a manifest's annotations once, and then query them locally:
+
+    .. code-block:: python
+
+        with AnnotationIndex("annotations.db") as index:
+            index.add_all(async_items_by_target(elucidate, manifest_uri))
+            for anno in index.items_by_target(canvas_uri):
+                ...
+
+    :param path: path to the SQLite database file, created if it doesn't exist, defaults to an
+        in-memory index
+    :param batch_size: number of annotations to buffer before writing
+    :param store_content: if False, only index ids, targets, containers and ETags, and not the
+        annotation JSON, so items_by_* can't be used
+    """
+
+    def __init__(self, path: str = ":memory:", batch_size: int = 1000, store_content: bool = True):
+        self.path = path
+        self.batch_size = batch_size
+        self.store_content = store_content
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS annotations ("
+                "id TEXT PRIMARY KEY, target TEXT, container TEXT, etag TEXT, content BLOB)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS annotations_target ON annotations (target)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS annotations_container ON annotations (container)"
+            )
+        self._pending = []
+
+    def __enter__(self) -> "AnnotationIndex":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._conn.execute("SELECT COUNT(*) FROM annotations").fetchone()[0]
+
+    def __contains__(self, anno_id: str) -> bool:
+        self.flush()
+        row = self._conn.execute("SELECT 1 FROM annotations WHERE id = ?", (anno_id,)).fetchone()
+        return row is not None
+
+    def add(self, item: Union[dict, Annotation], etag: Optional[str] = None):
+        """
+        Add (or replace) an annotation. If etag isn't given, the ETag already indexed for it is
+        kept if its content is unchanged (and stored, see store_content).
+
+        :param item: annotation dict, e.g. from get_items or async_items_*, or Annotation record
+        :param etag: optional ETag, e.g. from read_anno
+        """
+        if isinstance(item, Annotation):
+            anno_id, target, raw = item.id, item.target, item.raw
+        else:
+            anno_id = item.get("id") or item.get("@id")
+            target = identify_target(item)
+            raw = json.dumps(item, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        if not anno_id:
+            logging.warning("Not indexing annotation with no id")
+            return
+        self._pending.append(
+            (anno_id, target, container_for(anno_id, target), etag, raw if self.store_content else None)
+        )
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_all(self, items: Iterable[Union[dict, Annotation]]) -> int:
+        """
+        Add every annotation from an item stream, e.g. async_items_by_container.
+
+        :param items: iterable of annotation dicts or Annotation records
+        :return: number of annotations added
+        """
+        count = 0
+        for item in items:
+            self.add(item)
+            count += 1
+        self.flush()
+        return count
+
+    def set_etag(self, anno_id: str, etag: Optional[str]):
+        """
+        :param anno_id: annotation id
+        :param etag: ETag
+        """
+        self.flush()
+        with self._conn:
+            self._conn.execute("UPDATE annotations SET etag = ? WHERE id = ?", (etag, anno_id))
+
+    def etag(self, anno_id: str) -> Optional[str]:
+        """
+        :param anno_id: annotation id
+        :return: ETag, or None if not indexed or not known
+        """
+        self.flush()
+        row = self._conn.execute("SELECT etag FROM annotations WHERE id = ?", (anno_id,)).fetchone()
+        return row[0] if row else None
+
+    def remove(self, anno_id: str):
+        """
+        Remove an annotation, e.g. after it has been deleted.
+
+        :param anno_id: annotation id
+        """
+        self.flush()
+        with self._conn:
+            self._conn.execute("DELETE FROM annotations WHERE id = ?", (anno_id,))
+
+    def ids_by_target(self, target_uri: str) -> Optional[str]:
+        """
+        Generator which yields the ids of annotations on a target.
+
+        :param target_uri: target URI, e.g. a canvas
+        :return: annotation id
+        """
+        self.flush()
+        for row in self._conn.execute("SELECT id FROM annotations WHERE target = ?", (target_uri,)):
+            yield row[0]
+
+    def ids_by_container(self, container: str) -> Optional[str]:
+        """
+        Generator which yields the ids of annotations in a container.
+
+        :param container: container, e.g. the md5 hash of a target URI
+        :return: annotation id
+        """
+        self.flush()
+        for row in self._conn.execute("SELECT id FROM annotations WHERE container = ?", (container,)):
+            yield row[0]
+
+    def targets(self) -> Optional[str]:
+        """
+        Generator which yields each target with at least one annotation, e.g. to find which
+        canvases have any annotations.
+
+        :return: target URI
+        """
+        self.flush()
+        for row in self._conn.execute(
+            "SELECT DISTINCT target FROM annotations WHERE target IS NOT NULL ORDER BY target"
+        ):
+            yield row[0]
+
+    def count_by_target(self) -> dict:
+        """
+        :return: dict of target URI to number of annotations
+        """
+        self.flush()
+        return dict(
+            self._conn.execute(
+                "SELECT target, COUNT(*) FROM annotations WHERE target IS NOT NULL GROUP BY target"
+            )
+        )
+
+    def _items(self, sql: str, value: str, **kwargs) -> Optional[dict]:
+        if not self.store_content:
+            raise ValueError("Index %s does not store annotation content" % self.path)
+        self.flush()
+        items = (json.loads(row[0]) for row in self._conn.execute(sql, (value,)))
+        yield from filter_items(
+            items,
+            filter_by=kwargs.get("filter_by"),
+            flatten_ids=kwargs.get("flatten_ids"),
+            trans_function=kwargs.get("trans_function"),
+        )
+
+    def items_by_target(self, target_uri: str, **kwargs) -> Optional[dict]:
+        """
+        Yield the annotations on a target from the index, as async_items_by_target does from
+        Elucidate.
+
+        Accepts the same flatten_ids, trans_function and filter_by keyword args.
+
+        :param target_uri: target URI, e.g. a canvas
+        :return: annotation object
+        """
+        yield from self._items("SELECT content FROM annotations WHERE target = ?", target_uri, **kwargs)
+
+    def items_by_container(self, container: str, **kwargs) -> Optional[dict]:
+        """
+        Yield the annotations in a container from the index, as async_items_by_container does
+        from Elucidate.
+
+        Accepts the same flatten_ids, trans_function and filter_by keyword args.
+
+        :param container: container, e.g. the md5 hash of a target URI
+        :return: annotation object
+        """
+        yield from self._items("SELECT content FROM annotations WHERE container = ?", container, **kwargs)
+
+    def flush(self):
+        """
+        Write any buffered annotations.
+        """
+        if self._pending:
+            with self._conn:  # one transaction for the whole batch
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO annotations (id, target, container, etag, content) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    self._pending,
+                )
+                # keep the indexed ETag if none is given and the content is unchanged, as it
+                # still matches, otherwise it would fail an If-Match
+                self._conn.executemany(
+                    "UPDATE annotations SET target = ?, container = ?, "
+                    "etag = CASE WHEN ? IS NULL AND content = ? THEN etag ELSE ? END, content = ? "
+                    "WHERE id = ?",
+                    [
+                        (target, container, etag, content, etag, content, anno_id)
+                        for anno_id, target, container, etag, content in self._pending
+                    ],
+                )
+            logging.debug("Index %s flushed %s annotations", self.path, len(self._pending))
+            self._pending = []
+
+    def close(self):
+        """
+        Flush and close the index.
+        """
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,277 @@
+"""
+Ingest of pre-serialized annotations from NDJSON (one JSON annotation per line), POSTing each
+annotation's original bytes rather than parsing and re-serializing it.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from json.decoder import scanstring
+from typing import Iterable, Optional, Tuple, Union
+import requests
+from .pyelucidate import _request, create_container, identify_target
+from .ratelimit import RateLimiter
+
+_TOKEN = re.compile(r'[{}\[\]:,"]')
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+_CONTEXTS = {"w3c": "http://www.w3.org/ns/anno.jsonld", "oa": "https://www.w3.org/ns/oa.jsonld"}
+
+
+def scan_annotation(data: str) -> Tuple[Optional[str], bool]:
+    """
+    Find the target of a serialized annotation, and whether it has an @context, with a minimal
+    parse: only the top level keys and the value of target are decoded, everything else (e.g.
+    the body) is skipped over.
+
+    :param data: annotation JSON
+    :return: target URI (as identify_target), True if the annotation has a top level @context
+    """
+    depth = 0
+    expect_key = False
+    has_context = False
+    target = None
+    pos = 0
+    while True:
+        m = _TOKEN.search(data, pos)
+        if m is None:
+            break
+        c = m.group()
+        pos = m.end()
+        if c == '"':
+            value, pos = scanstring(data, pos)
+            if depth == 1 and expect_key:
+                expect_key = False
+                if value == "@context":
+                    has_context = True
+                elif value == "target":
+                    colon = _WHITESPACE.match(data, pos).end()
+                    start = _WHITESPACE.match(data, colon + 1).end()
+                    content, pos = _DECODER.raw_decode(data, start)
+                    target = identify_target({"target": content})
+        elif c == "{" or c == "[":
+            depth += 1
+            expect_key = c == "{" and depth == 1
+        elif c == "}" or c == "]":
+            depth -= 1
+            if depth == 0:
+                break
+        elif c == "," and depth == 1:
+            expect_key = True
+    return target, has_context
+
+
+def add_context(data: str, model: str = "w3c") -> str:
+    """
+    Insert the @context for the model at the start of a serialized annotation, without
+    re-serializing it.
+
+    :param data: annotation JSON, without an @context
+    :param model: oa or w3c
+    :return: annotation JSON
+    """
+    start = data.index("{") + 1
+    return '%s"@context": %s, %s' % (data[:start], json.dumps(_CONTEXTS[model]), data[start:])
+
+
+class ContainerCache:
+    """
+    Thread-safe record of the containers known to exist, so that each container is only checked
+    (and created if necessary) once, however many annotations are POSTed to it.
+
+    Each container has its own lock, so checking one container doesn't hold up annotations for
+    the others.
+    """
+
+    def __init__(self):
+        self._known = set()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, container: str) -> bool:
+        return container in self._known
+
+    def ensure(
+        self,
+        container: str,
+        elucidate_uri: str,
+        label: Optional[str],
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> int:
+        """
+        Create the container if it isn't already known to exist, see create_container.
+
+        :return: status code, 200 if already known to exist
+        """
+        if container in self._known:
+            return 200
+        with self._lock:
+            lock = self._locks.setdefault(container, threading.Lock())
+        with lock:
+            if container in self._known:
+                return 200
+            status = create_container(
+                container_name=container, elucidate_uri=elucidate_uri, label=label, timeout=timeout, limiter=limiter
+            )
+            if status in [200, 201]:
+                self._known.add(container)
+                with self._lock:
+                    self._locks.pop(container, None)
+            return status
+
+
+def create_anno_serialized(
+    elucidate_base: str,
+    data: Union[str, bytes],
+    target: Optional[str] = None,
+    container: Optional[str] = None,
+    model: str = "w3c",
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+    containers: Optional[ContainerCache] = None,
+) -> Tuple[int, Optional[str]]:
+    """
+    POST a serialized annotation to Elucidate, as create_anno, but without parsing and
+    re-serializing it. The target (for the container name, the md5 hash of the target, if
+    container is None) is found with scan_annotation, and the @context is added only if it is
+    missing.
+
+    :param elucidate_base: base URI for the annotation server, e.g. https://elucidate.example.org
+    :param data: annotation JSON
+    :param target: target for the annotation (optional), will scan the annotation for its target
+        if not present
+    :param container: container name (optional), will use hash of target uri if not present
+    :param model: oa or w3c
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :param containers: optional ContainerCache, so that each container is only checked once
+    :return: status code from Elucidate, annotation id (or none)
+    """
+    raw = data if isinstance(data, bytes) else data.encode("utf-8")
+    text = data.decode("utf-8") if isinstance(data, bytes) else data
+    try:
+        scanned_target, has_context = scan_annotation(text)
+    except ValueError as e:
+        logging.error("Could not read annotation: %s", e)
+        return 400, None
+    target = target or scanned_target
+    if not container:
+        if not target:
+            logging.error("Could not identify a target to hash for the container")
+            return 400, None
+        container = hashlib.md5(target.encode("utf-8")).hexdigest()
+    if containers is None:
+        containers = ContainerCache()
+    container_status = containers.ensure(
+        container, "/".join([elucidate_base, "annotation", model, ""]), target, timeout=timeout, limiter=limiter
+    )
+    if container_status not in [200, 201]:
+        logging.error("No annotation container found")
+        return 404, None
+    if not has_context:
+        raw = add_context(text, model).encode("utf-8")
+    post_uri = "/".join([elucidate_base, "annotation", model, container, ""])
+    r = _request(
+        "POST",
+        post_uri,
+        timeout=timeout,
+        limiter=limiter,
+        headers={
+            "Content-Type": "application/ld+json",
+            "Accept": 'application/ld+json;profile="http://www.w3.org/ns/anno.jsonld"',
+        },
+        data=raw,
+    )
+    if r.status_code in [200, 201]:
+        logging.debug("POST annotation at %s", post_uri)
+        return r.status_code, r.json().get("id")
+    logging.error("Could not POST annotation at %s", post_uri)
+    return r.status_code, None
+
+
+def read_ndjson(path: str) -> Iterable[bytes]:
+    """
+    Generator which yields the non-blank lines of an NDJSON file, as bytes.
+
+    :param path: path to the file
+    :return: line
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def ingest_ndjson(
+    lines: Union[str, Iterable[Union[str, bytes]]],
+    elucidate_base: str,
+    container: Optional[str] = None,
+    model: str = "w3c",
+    dry_run: bool = True,
+    workers: int = 1,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Optional[dict]:
+    """
+    Generator which streams annotations from NDJSON and POSTs each one to Elucidate with
+    create_anno_serialized, yielding a result for each, in order.
+
+    Each container is only checked (and created if necessary) once per ingest.
+
+    :param lines: path to an NDJSON file, or iterable of serialized annotations
+    :param elucidate_base: base URI for the annotation server, e.g. https://elucidate.example.org
+    :param container: container name (optional), will use hash of each annotation's target if
+        not present
+    :param model: oa or w3c
+    :param dry_run: if True, only scan each annotation for its target, and return a 200
+    :param workers: number of concurrent POSTs
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: dict of line (number, from 1), status (None if the request for the line failed),
+        id (or None) and success
+    """
+    if isinstance(lines, str):
+        lines = read_ndjson(lines)
+    containers = ContainerCache()
+
+    def ingest(number: int, data: Union[str, bytes]) -> dict:
+        if dry_run:
+            try:
+                target, _ = scan_annotation(data.decode("utf-8") if isinstance(data, bytes) else data)
+            except ValueError as e:
+                logging.error("Could not read annotation on line %s: %s", number, e)
+                return {"line": number, "status": 400, "id": None, "success": False}
+            logging.debug("Dry run, line %s target %s", number, target)
+            found = bool(target or container)
+            return {"line": number, "status": 200 if found else 400, "id": None, "success": found}
+        try:
+            status, anno_id = create_anno_serialized(
+                elucidate_base,
+                data,
+                container=container,
+                model=model,
+                timeout=timeout,
+                limiter=limiter,
+                containers=containers,
+            )
+        except requests.exceptions.RequestException as e:
+            logging.error("Could not POST annotation on line %s: %s", number, e)
+            return {"line": number, "status": None, "id": None, "success": False}
+        return {"line": number, "status": status, "id": anno_id, "success": status in (200, 201)}
+
+    if workers <= 1:
+        for number, data in enumerate(lines, start=1):
+            yield ingest(number, data)
+        return
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for number, data in enumerate(lines, start=1):
+            pending.append(executor.submit(ingest, number, data))
+            if len(pending) >= workers * 2:  # bounded, so the input is streamed
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
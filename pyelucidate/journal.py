@@ -0,0 +1,119 @@
+"""
+Checkpoint journal for long running deletes, so that a failed run can be resumed without
+searching every canvas again.
+"""
+import logging
+import sqlite3
+import time
+from typing import Optional
+
+
+class Journal:
+    """
+    Persistent SQLite journal of completed canvases (per manifest) and deleted annotation ids.
+
+    Records are buffered and written in batches, in a single transaction, when batch_size
+    records are pending, when a canvas is completed, and on flush() or close().
+
+    Can be used as a context manager, which closes (and flushes) the journal on exit.
+
+    :param path: path to the SQLite database file, created if it doesn't exist
+    :param batch_size: number of deleted annotation records to buffer before writing
+    """
+
+    def __init__(self, path: str, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS canvases ("
+                "manifest TEXT NOT NULL, canvas TEXT NOT NULL, success INTEGER NOT NULL, "
+                "completed REAL NOT NULL, PRIMARY KEY (manifest, canvas))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS annotations ("
+                "id TEXT PRIMARY KEY, status INTEGER NOT NULL, deleted REAL NOT NULL)"
+            )
+        self._pending = {}
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_deleted(self, anno_id: str, status: int = 204):
+        """
+        Record an annotation DELETE.
+
+        :param anno_id: annotation id
+        :param status: DELETE status code
+        """
+        self._pending[anno_id] = (status, time.time())
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def is_deleted(self, anno_id: str) -> bool:
+        """
+        :param anno_id: annotation id
+        :return: True if the annotation was successfully deleted in this or a previous run
+        """
+        if anno_id in self._pending:
+            return self._pending[anno_id][0] == 204
+        row = self._conn.execute("SELECT status FROM annotations WHERE id = ?", (anno_id,)).fetchone()
+        return row is not None and row[0] == 204
+
+    def mark_canvas(self, manifest: str, canvas: str, success: bool = True):
+        """
+        Record that all of the annotations for a canvas have been processed, and flush.
+
+        :param manifest: manifest URI
+        :param canvas: canvas (or manifest) URI
+        :param success: False if any of the deletes for the canvas failed
+        """
+        self._flush(canvas=(manifest, canvas, int(success), time.time()))
+
+    def completed_canvases(self, manifest: str) -> set:
+        """
+        :param manifest: manifest URI
+        :return: set of canvas URIs successfully completed for the manifest
+        """
+        rows = self._conn.execute(
+            "SELECT canvas FROM canvases WHERE manifest = ? AND success = 1", (manifest,)
+        )
+        return set(r[0] for r in rows)
+
+    def _flush(self, canvas: Optional[tuple] = None):
+        pending = [(k, v[0], v[1]) for k, v in self._pending.items()]
+        with self._conn:  # one transaction for the whole batch
+            if pending:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO annotations (id, status, deleted) VALUES (?, ?, ?)",
+                    pending,
+                )
+            if canvas:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO canvases (manifest, canvas, success, completed) "
+                    "VALUES (?, ?, ?, ?)",
+                    canvas,
+                )
+        self._pending.clear()
+        logging.debug("Journal %s flushed %s annotation records", self.path, len(pending))
+
+    def flush(self):
+        """
+        Write any buffered records.
+        """
+        self._flush()
+
+    def close(self):
+        """
+        Flush and close the journal.
+        """
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,253 @@
+"""
+Streaming extraction of canvas ids from IIIF Presentation manifests, without parsing the whole
+manifest into memory.
+"""
+import codecs
+import json
+import queue
+import re
+import threading
+from itertools import chain
+from json.decoder import scanstring
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+_TOKEN = re.compile(r'[{}\[\]:,"]')
+_SKIP_TOKEN = re.compile(r'[{}\[\]"]')
+_STRING_PART = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.S)  # up to the closing quote, or the end
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class CanvasIds:
+    """
+    Iterable of the canvas ids in a IIIF Presentation manifest, read incrementally from chunks of
+    JSON (e.g. requests' Response.iter_content), so canvas ids are yielded as soon as they have
+    been read, and the labels, images, metadata, etc. of each canvas are never parsed into
+    Python objects.
+
+    Supports Presentation 2 (sequences[0].canvases[*].@id) and Presentation 3
+    (items[*].id) manifests. Reading stops once the canvases have been read and the manifest id
+    is known, so the rest of the manifest (e.g. structures) need not be downloaded.
+
+    After iterating, manifest_id, version (2 or 3, None if no canvases list was found),
+    has_sequences and count are set.
+
+    :param chunks: iterable of str or bytes
+    :param encoding: encoding of bytes chunks
+    :param close: optional callable, called when iteration stops, e.g. Response.close
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[Union[str, bytes]],
+        encoding: str = "utf-8",
+        close: Optional[Callable] = None,
+    ):
+        self.chunks = chunks
+        self.encoding = encoding
+        self.close = close
+        self.manifest_id = None
+        self.version = None
+        self.has_sequences = False
+        self.count = 0
+
+    def __iter__(self):
+        try:
+            yield from self._parse()
+        finally:
+            if self.close is not None:
+                self.close()
+
+    @staticmethod
+    def _wanted(stack: list) -> bool:
+        """
+        :return: False if the value at the current position can't contain a canvas id
+        """
+        depth = len(stack)
+        if depth < 2:
+            return True
+        elif depth == 2:
+            return stack[0][1] == "items" or (stack[0][1] == "sequences" and stack[1][1] == 0)
+        elif depth == 3:
+            return stack[2][1] == ("canvases" if stack[0][1] == "sequences" else "id")
+        elif depth == 4:
+            return True
+        return depth == 5 and stack[4][1] == "@id"
+
+    @staticmethod
+    def _skip(buf: str, pos: int, depth: int, in_string: bool) -> Tuple[int, int, bool]:
+        """
+        Scan over part of a skipped value that spans chunks, tracking only the depth of brackets
+        and whether in a string, so the value is scanned once, rather than decoded again from
+        its start as each chunk arrives.
+
+        :return: position, depth and in_string, depth is 0 and in_string False once the value
+            has ended
+        """
+        while True:
+            if in_string:
+                end = _STRING_PART.match(buf, pos).end()
+                if end == len(buf) or buf[end] != '"':
+                    return end, depth, True  # string (or an escape) continues in the next chunk
+                pos = end + 1
+                in_string = False
+                if depth == 0:
+                    return pos, 0, False
+            m = _SKIP_TOKEN.search(buf, pos)
+            if m is None:
+                return len(buf), depth, False
+            c = m.group()
+            pos = m.end()
+            if c == '"':
+                in_string = True
+            elif c == "{" or c == "[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return pos, 0, False
+
+    def _parse(self):
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        stack = []  # one [is_object, key or index] per open object or array
+        expect_key = False
+        skip = False
+        skip_depth = 0  # of a skipped value that spans chunks, see _skip
+        skip_string = False
+        buf = ""
+        pos = 0
+        for chunk in chain(self.chunks, [None]):
+            final = chunk is None
+            if final:
+                chunk = decoder.decode(b"", final=True)
+            elif isinstance(chunk, bytes):
+                chunk = decoder.decode(chunk)
+            buf = buf[pos:] + chunk
+            pos = 0
+            while True:
+                if skip_depth or skip_string:
+                    pos, skip_depth, skip_string = self._skip(buf, pos, skip_depth, skip_string)
+                    if skip_depth or skip_string:
+                        break  # value continues in the next chunk
+                    skip = False
+                elif skip:
+                    # skip a whole value that can't contain canvas ids, e.g. a canvas's images,
+                    # with the C JSON decoder, or with _skip if it continues in the next chunk
+                    start = _WHITESPACE.match(buf, pos).end()
+                    if start == len(buf):
+                        break
+                    if buf[start] not in "]}":
+                        try:
+                            _, end = _DECODER.raw_decode(buf, start)
+                        except ValueError:
+                            if buf[start] not in '{["':
+                                break  # number or literal continues in the next chunk
+                            skip_depth, skip_string = (0, True) if buf[start] == '"' else (1, False)
+                            pos = start + 1
+                            continue
+                        if end == len(buf) and not final:
+                            break  # may be a number that continues in the next chunk
+                        pos = end
+                    skip = False
+                m = _TOKEN.search(buf, pos)
+                if m is None:
+                    pos = len(buf)  # only whitespace, numbers or literals, none of interest
+                    break
+                c = m.group()
+                i = m.start()
+                if c == '"':
+                    try:
+                        value, end = scanstring(buf, i + 1)
+                    except ValueError:
+                        pos = i  # string continues in the next chunk
+                        break
+                    pos = end
+                    depth = len(stack)
+                    if expect_key:
+                        stack[-1][1] = value
+                        expect_key = False
+                        if depth == 1 and value == "sequences":
+                            self.has_sequences = True
+                        elif depth == 1 and value == "items":
+                            self.version = 3
+                        elif depth == 3 and value == "canvases" and stack[0][1] == "sequences" and stack[1][1] == 0:
+                            self.version = 2
+                    elif depth == 1:
+                        if stack[0][1] in ("@id", "id") and self.manifest_id is None:
+                            self.manifest_id = value
+                    elif (depth == 5 and stack[4][1] == "@id") or (depth == 3 and stack[2][1] == "id"):
+                        self.count += 1  # only canvas ids get this deep, everything else is skipped
+                        yield value
+                    continue
+                pos = i + 1
+                if c == ":":
+                    skip = not self._wanted(stack)
+                elif c == "{":
+                    stack.append([True, None])
+                    expect_key = True
+                elif c == "[":
+                    stack.append([False, 0])
+                    skip = not self._wanted(stack)
+                elif c == ",":
+                    if stack[-1][0]:
+                        expect_key = True
+                    else:
+                        stack[-1][1] += 1
+                        skip = not self._wanted(stack)
+                elif c == "}" or c == "]":
+                    stack.pop()
+                    if self.manifest_id is not None and (
+                        (len(stack) == 3 and self.version == 2 and stack[2][1] == "canvases")
+                        or (len(stack) == 1 and self.version == 3 and stack[0][1] == "items")
+                    ):
+                        return  # all of the canvases have been read
+        if buf[pos:].strip() or skip_depth or skip_string:
+            raise ValueError("Truncated or invalid JSON at %s" % buf[pos:pos + 40])
+
+
+def canvas_ids(chunks: Iterable[Union[str, bytes]], encoding: str = "utf-8") -> Iterable[str]:
+    """
+    Generator which yields the canvas ids in a IIIF Presentation 2 or 3 manifest, read
+    incrementally from chunks of JSON. See CanvasIds.
+
+    :param chunks: iterable of str or bytes
+    :param encoding: encoding of bytes chunks
+    :return: canvas id
+    """
+    yield from CanvasIds(chunks, encoding=encoding)
+
+
+def read_ahead(canvases: Iterable[str]) -> Iterable[str]:
+    """
+    Generator which yields the canvas ids from a CanvasIds (or any iterable), read ahead by a
+    background thread as fast as the manifest arrives, rather than one at a time as they are
+    used. A slow consumer, e.g. deleting the annotations on each canvas, then doesn't leave the
+    manifest's connection idle until a server or proxy timeout resets it.
+
+    An error reading the manifest is raised once the canvas ids read before it have been
+    yielded. CanvasIds attributes (manifest_id, version, etc.) are set by the time this stops.
+
+    :param canvases: iterable of canvas ids
+    :return: canvas id
+    """
+    ids = queue.Queue()  # unbounded, canvas ids are small
+    end = object()
+
+    def read():
+        try:
+            for canvas in canvases:
+                ids.put(canvas)
+        except Exception as e:  # raised in the consumer
+            ids.put(e)
+        finally:
+            ids.put(end)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    while True:
+        canvas = ids.get()
+        if canvas is end:
+            break
+        if isinstance(canvas, Exception):
+            raise canvas
+        yield canvas
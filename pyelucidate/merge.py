@@ -0,0 +1,270 @@
+"""
+Bulk topic merges, driven by a mapping file of old topic to new topic, e.g. from authority
+reconciliation.
+"""
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Iterator, Optional, Tuple, Union
+from .pyelucidate import batch_delete_topic, batch_update_body_chunked
+from .ratelimit import RateLimiter
+
+
+def read_mapping(path: str, fmt: Optional[str] = None) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Generator which streams (old_topic, new_topic) pairs from a mapping file.
+
+    CSV files have old_topic, new_topic columns, with an optional header row. NDJSON files have
+    one object per line with old_topic and new_topic keys. A pair with no new_topic means the old
+    topic should be deleted rather than merged. Blank lines are skipped.
+
+    :param path: path to the mapping file
+    :param fmt: 'csv' or 'ndjson', defaults to guessing from the file extension
+    :return: tuple of old_topic, new_topic (or None)
+    """
+    if fmt is None:
+        fmt = "ndjson" if os.path.splitext(path)[1].lower() in (".ndjson", ".jsonl") else "csv"
+    with open(path, "r", newline="" if fmt == "csv" else None) as f:
+        if fmt == "ndjson":
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield row["old_topic"], row.get("new_topic") or None
+        elif fmt == "csv":
+            for row in csv.reader(f):
+                if not row or not row[0].strip() or row[0].strip() == "old_topic":
+                    continue
+                new = row[1].strip() if len(row) > 1 else ""
+                yield row[0].strip(), new or None
+        else:
+            raise ValueError("Unknown mapping format %s, expected 'csv' or 'ndjson'" % fmt)
+
+
+class MergeResults:
+    """
+    Append-only NDJSON results file for a bulk merge, with one line per old topic, so that an
+    interrupted run can be resumed by skipping the topics that have already succeeded.
+
+    Safe to write from multiple threads.
+
+    :param path: path to the results file, appended to if it exists
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed = set()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        result = json.loads(line)
+                        if result["status"] == 200:
+                            self.completed.add(result["old_topic"])
+        self._f = open(path, "a")
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "MergeResults":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, results: list):
+        """
+        Append results, and flush.
+
+        :param results: list of dicts of old_topic, new_topic, action, status, attempts, elapsed
+        """
+        with self._lock:
+            for result in results:
+                self._f.write(json.dumps(result) + "\n")
+                if result["status"] == 200:
+                    self.completed.add(result["old_topic"])
+            self._f.flush()
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+
+def _delete_topic(
+    old_topic: str,
+    elucidate_base: str,
+    dry_run: bool,
+    retries: int,
+    backoff: float,
+    timeout: Optional[Union[float, Tuple[float, float]]],
+    limiter: Optional[RateLimiter],
+) -> list:
+    """
+    Delete one old topic, retrying it on failure, as the batch update chunks are.
+
+    :return: list of the old topic's result
+    """
+    start = time.monotonic()
+    status = None
+    attempts = 0
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        attempts = attempt + 1
+        try:
+            status, _ = batch_delete_topic(
+                old_topic, elucidate_base, dry_run=dry_run, timeout=timeout, limiter=limiter
+            )
+        except Exception as e:  # recorded as a failure, and retried on resume
+            logging.error("Deleting %s failed: %s", old_topic, e)
+            status = None
+        if status == 200:
+            break
+        logging.warning("Deleting %s attempt %s returned %s", old_topic, attempts, status)
+    return [
+        {
+            "old_topic": old_topic,
+            "new_topic": None,
+            "action": "delete",
+            "status": status,
+            "attempts": attempts,
+            "elapsed": time.monotonic() - start,
+        }
+    ]
+
+
+def _merge_group(
+    new_topic: str,
+    old_topics: list,
+    elucidate_base: str,
+    dry_run: bool,
+    chunk_size: int,
+    retries: int,
+    backoff: float,
+    timeout: Optional[Union[float, Tuple[float, float]]],
+    limiter: Optional[RateLimiter],
+) -> list:
+    """
+    Merge one group of old topics into new_topic.
+
+    :return: list of per old topic results
+    """
+    results = []
+    for chunk in batch_update_body_chunked(
+        new_topic,
+        old_topics,
+        elucidate_base,
+        dry_run=dry_run,
+        chunk_size=chunk_size,
+        workers=1,
+        retries=retries,
+        backoff=backoff,
+        timeout=timeout,
+        limiter=limiter,
+    ):
+        for old_topic in chunk["topic_ids"]:
+            results.append(
+                {
+                    "old_topic": old_topic,
+                    "new_topic": new_topic,
+                    "action": "update",
+                    "status": chunk["status"],
+                    "attempts": chunk["attempts"],
+                    "elapsed": chunk["elapsed"],
+                }
+            )
+    return results
+
+
+def run_merge(
+    mapping_path: str,
+    elucidate_base: str,
+    results_path: Optional[str] = None,
+    dry_run: bool = True,
+    fmt: Optional[str] = None,
+    workers: int = 4,
+    chunk_size: int = 50,
+    retries: int = 2,
+    backoff: float = 1.0,
+    limiter: Optional[RateLimiter] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+) -> dict:
+    """
+    Run a bulk topic merge from a mapping file (see read_mapping).
+
+    Old topics with no new topic are deleted with batch_delete_topic, each as its own task,
+    started as the mapping is read. The other old topics are grouped by new topic, and each group
+    is merged with chunked batch updates (see batch_update_body_chunked) once the mapping has been
+    read. Up to workers tasks run concurrently, subject to the rate limiter, and at most twice
+    that many are queued at once. Failed deletes and update chunks are retried, up to retries
+    more times, waiting backoff seconds, doubling on each attempt.
+
+    If results_path is set, a result line is written for each old topic as its task completes,
+    and old topics that already have a successful result in the file are skipped, so an
+    interrupted run can simply be run again.
+
+    :param mapping_path: CSV or NDJSON mapping file
+    :param elucidate_base: elucidate base URI, e.g. https://elucidate.example.org
+    :param results_path: optional NDJSON results file, for resuming
+    :param dry_run: if True, will simply log the POSTs
+    :param fmt: 'csv' or 'ndjson', defaults to guessing from the file extension
+    :param workers: number of tasks (deletes or groups) to run concurrently
+    :param chunk_size: number of old topics per batch update POST
+    :param retries: number of times to retry a failed delete or batch update chunk
+    :param backoff: seconds to wait before the first retry, doubled for each retry after that
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :return: dict of counts of pairs read, skipped (already completed), succeeded and failed,
+        and elapsed seconds
+    """
+    start = time.monotonic()
+    results_file = MergeResults(results_path) if results_path else None
+    completed = results_file.completed if results_file else set()
+    summary = {"pairs": 0, "skipped": 0, "succeeded": 0, "failed": 0}
+
+    def tasks():
+        groups = OrderedDict()
+        for old_topic, new_topic in read_mapping(mapping_path, fmt):
+            summary["pairs"] += 1
+            if old_topic in completed:
+                summary["skipped"] += 1
+            elif new_topic is None:
+                yield _delete_topic, (old_topic, elucidate_base, dry_run, retries, backoff, timeout, limiter)
+            else:
+                groups.setdefault(new_topic, []).append(old_topic)
+        logging.info(
+            "Merging %s topics into %s groups, skipping %s already completed",
+            sum(len(old_topics) for old_topics in groups.values()),
+            len(groups),
+            summary["skipped"],
+        )
+        for new_topic, old_topics in groups.items():
+            yield _merge_group, (
+                new_topic, old_topics, elucidate_base, dry_run, chunk_size, retries, backoff, timeout, limiter
+            )
+
+    def record(done):
+        for future in done:
+            results = future.result()
+            if results_file and not dry_run:
+                results_file.write(results)
+            for result in results:
+                summary["succeeded" if result["status"] == 200 else "failed"] += 1
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            pending = set()
+            for function, args in tasks():
+                if len(pending) >= max(1, workers) * 2:  # bounded, so the mapping is streamed
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    record(done)
+                pending.add(executor.submit(function, *args))
+            record(as_completed(pending))
+    finally:
+        if results_file:
+            results_file.close()
+    summary["elapsed"] = time.monotonic() - start
+    logging.info("Merge complete: %s", summary)
+    return summary
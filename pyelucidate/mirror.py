@@ -0,0 +1,275 @@
+"""
+Incremental local mirror of Elucidate containers, refreshed with conditional requests, so that
+repeated copies cost in proportion to what has changed rather than the size of the container.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, Union
+import requests
+from .pyelucidate import Deadline, DeadlineExceeded, _request, annotation_pages, as_deadline
+
+
+def _digest(item: dict) -> str:
+    return hashlib.md5(json.dumps(item, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class ContainerMirror:
+    """
+    SQLite mirror of the annotation pages and annotations of one or more Elucidate containers.
+
+    Each refresh revalidates the container and each of its pages with If-None-Match (and
+    If-Modified-Since, if the server sent Last-Modified), and only pages that have changed are
+    downloaded and parsed. Annotations on changed pages are compared with the mirror by content
+    digest, so only new and changed annotations are written, and the refresh reports which
+    annotation ids were added, removed and changed.
+
+    N.B. if the server doesn't send ETags, or if an insertion shifts every later page, pages are
+    downloaded again, but annotations are still only written when they have changed.
+
+    :param path: path to the SQLite database file, created if it doesn't exist, defaults to an
+        in-memory mirror
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, container TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                "body BLOB, ids TEXT NOT NULL, fetched REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_container ON pages (container)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS annotations ("
+                "id TEXT PRIMARY KEY, container TEXT NOT NULL, digest TEXT NOT NULL, content BLOB NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS annotations_container ON annotations (container)"
+            )
+
+    def __enter__(self) -> "ContainerMirror":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _get(
+        url: str,
+        validators: dict,
+        header_dict: Optional[dict],
+        timeout: Optional[Union[float, Tuple[float, float]]],
+        deadline: Optional[Deadline],
+    ) -> Tuple[str, requests.Response]:
+        """
+        Conditional GET of a container or page.
+        """
+        headers = dict(header_dict or {})
+        etag, last_modified = validators.get(url, (None, None))
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return url, _request("GET", url, timeout=timeout, deadline=deadline, headers=headers)
+
+    def refresh(
+        self,
+        elucidate: str,
+        container: str,
+        header_dict: Optional[dict] = None,
+        workers: int = 4,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        deadline: Optional[Union[Deadline, float]] = None,
+    ) -> dict:
+        """
+        Bring the mirror of a container up to date.
+
+        If any request fails, or the deadline is exceeded, nothing is written, and the report has
+        complete set to False.
+
+        :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+        :param container: container path, e.g. the md5 hash of a target URI
+        :param header_dict: dict of headers, as for async_items_by_container
+        :param workers: number of pages to revalidate concurrently
+        :param timeout: seconds, or (connect, read) tuple, for each request
+        :param deadline: Deadline, or seconds, for the whole refresh
+        :return: dict of added, removed and changed annotation ids, and counts of pages,
+            pages_modified, pages_not_modified and bytes downloaded, and complete
+        """
+        deadline = as_deadline(deadline)
+        container = container.strip("/")
+        container_uri = elucidate + "/annotation/w3c/" + container + "/"
+        report = {
+            "added": [],
+            "removed": [],
+            "changed": [],
+            "pages": 0,
+            "pages_modified": 0,
+            "pages_not_modified": 0,
+            "bytes": 0,
+            "complete": False,
+        }
+        validators = {
+            row[0]: (row[1], row[2])
+            for row in self._conn.execute(
+                "SELECT url, etag, last_modified FROM pages WHERE container = ?", (container,)
+            )
+        }
+        known = dict(
+            self._conn.execute("SELECT id, digest FROM annotations WHERE container = ?", (container,))
+        )
+        seen = set()
+        try:
+            _, r = self._get(container_uri, validators, header_dict, timeout, deadline)
+            collection = self._page(container, container_uri, r, report, collection=True)
+            if collection is None:
+                self._conn.rollback()
+                return report
+            page_urls = set()
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                try:
+                    for url in annotation_pages(collection):
+                        page_urls.add(url)
+                        pending.append(executor.submit(self._get, url, validators, header_dict, timeout, deadline))
+                        # bounded, so each page is written before many more are fetched
+                        if len(pending) >= max(1, workers) * 2 and not self._store(
+                            container, pending.popleft().result(), report, known, seen
+                        ):
+                            self._conn.rollback()
+                            return report
+                    while pending:
+                        if not self._store(container, pending.popleft().result(), report, known, seen):
+                            self._conn.rollback()
+                            return report
+                finally:
+                    for future in pending:
+                        future.cancel()
+        except (DeadlineExceeded, requests.exceptions.RequestException, ValueError) as e:
+            logging.error("Could not refresh %s: %s", container_uri, e)
+            self._conn.rollback()
+            return report
+        report["removed"] = sorted(set(known) - seen)
+        self._conn.executemany("DELETE FROM annotations WHERE id = ?", [(i,) for i in report["removed"]])
+        stale = [u for u in validators if u not in page_urls and u != container_uri]
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", [(u,) for u in stale])
+        self._conn.commit()
+        report["complete"] = True
+        logging.info(
+            "Refreshed %s: %s pages (%s not modified), %s added, %s changed, %s removed",
+            container_uri,
+            report["pages"],
+            report["pages_not_modified"],
+            len(report["added"]),
+            len(report["changed"]),
+            len(report["removed"]),
+        )
+        return report
+
+    def _store(self, container: str, response: Tuple[str, requests.Response], report: dict, known: dict, seen: set) -> bool:
+        """
+        Store the annotations from a page's conditional GET response, that are new or changed,
+        adding their ids to seen.
+
+        :return: False on error
+        """
+        url, r = response
+        page = self._page(container, url, r, report)
+        if page is None:
+            return False
+        report["pages"] += 1
+        if page is True:
+            seen.update(
+                json.loads(self._conn.execute("SELECT ids FROM pages WHERE url = ?", (url,)).fetchone()[0])
+            )
+            return True
+        for item in page.get("items", []):
+            anno_id = item.get("id") or item.get("@id")
+            if anno_id in seen:
+                continue  # repeated on the next page, because of an insertion while paging
+            seen.add(anno_id)
+            digest = _digest(item)
+            if known.get(anno_id) == digest:
+                continue
+            report["changed" if anno_id in known else "added"].append(anno_id)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO annotations (id, container, digest, content) VALUES (?, ?, ?, ?)",
+                (anno_id, container, digest, json.dumps(item, separators=(",", ":")).encode("utf-8")),
+            )
+        return True
+
+    def _page(self, container: str, url: str, r: requests.Response, report: dict, collection: bool = False):
+        """
+        Handle a conditional GET response, storing the page validators, and for the container
+        itself (the collection), its body.
+
+        :return: True if a page was not modified, the parsed page (or collection) if modified, or
+            the stored collection if it was not modified, None on error
+        """
+        if r.status_code == requests.codes.not_modified:
+            if collection:
+                row = self._conn.execute("SELECT body FROM pages WHERE url = ?", (url,)).fetchone()
+                return json.loads(row[0]) if row and row[0] else None
+            report["pages_not_modified"] += 1
+            return True
+        if r.status_code != requests.codes.ok:
+            logging.error("%s returned %s", url, r.status_code)
+            return None
+        report["bytes"] += len(r.content)
+        if not collection:
+            report["pages_modified"] += 1
+        page = r.json()
+        ids = [i.get("id") or i.get("@id") for i in page.get("items", [])]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages (url, container, etag, last_modified, body, ids, fetched) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                url,
+                container,
+                r.headers.get("ETag"),
+                r.headers.get("Last-Modified"),
+                r.content if collection else None,
+                json.dumps(ids),
+                time.time(),
+            ),
+        )
+        return page
+
+    def ids(self, container: str) -> Optional[str]:
+        """
+        Generator which yields the ids of the mirrored annotations in a container.
+
+        :param container: container path
+        :return: annotation id
+        """
+        for row in self._conn.execute(
+            "SELECT id FROM annotations WHERE container = ? ORDER BY id", (container.strip("/"),)
+        ):
+            yield row[0]
+
+    def items(self, container: str) -> Optional[dict]:
+        """
+        Generator which yields the mirrored annotations in a container.
+
+        :param container: container path
+        :return: annotation object
+        """
+        for row in self._conn.execute(
+            "SELECT content FROM annotations WHERE container = ? ORDER BY id", (container.strip("/"),)
+        ):
+            yield json.loads(row[0])
+
+    def close(self):
+        """
+        Close the mirror.
+        """
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
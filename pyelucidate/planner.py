@@ -0,0 +1,239 @@
+"""
+Cost-based choice between container listing, target search and Elucidate's batch delete API,
+for deleting or listing the annotations on a target.
+"""
+import logging
+import math
+from typing import Optional, Tuple, Union
+import requests
+from .journal import Journal
+from .progress import Progress
+from .pyelucidate import (
+    Deadline,
+    DeadlineExceeded,
+    _request,
+    as_deadline,
+    async_items_by_container,
+    async_items_by_target,
+    batch_delete_target,
+    gen_search_by_container_uri,
+    gen_search_by_target_uri,
+    iterative_delete_by_target,
+)
+
+STRATEGIES = ("batch", "container", "search")
+
+
+def _probe(uri: str, timeout, deadline) -> Tuple[Optional[int], int]:
+    """
+    GET the first page of a container or search, for its total and page size.
+
+    :return: total (0 if the container doesn't exist, None on error), page size
+    """
+    try:
+        r = _request("GET", uri, timeout=timeout, deadline=deadline)
+    except requests.exceptions.RequestException as e:
+        logging.warning("Could not probe %s: %s", uri, e)
+        return None, 0
+    if r.status_code == requests.codes.not_found:
+        return 0, 0
+    if r.status_code != requests.codes.ok:
+        logging.warning("Could not probe %s, server returned %s", uri, r.status_code)
+        return None, 0
+    j = r.json()
+    first = j.get("first")
+    items = None
+    if isinstance(first, dict):
+        items = first.get("items") or first.get("as:items", {}).get("@list")
+    return j.get("total", 0), len(items or [])
+
+
+def _listing_requests(total: int, page_size: int) -> int:
+    # the first page is embedded in the collection, get_items then follows "next"
+    if total and page_size:
+        return max(1, math.ceil(total / page_size))
+    return 1
+
+
+def plan_target(
+    target: str,
+    elucidate_base: str,
+    operation: str = "delete",
+    etag_deletes: bool = False,
+    strategies: Optional[tuple] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+) -> dict:
+    """
+    Choose the cheapest way to delete (or list) the annotations on a target, by estimated
+    number of HTTP requests, from the totals on the first pages of the target's container (the
+    md5 hash of the target URI) and of a search by target.
+
+    Strategies are:
+
+    batch: Elucidate's batch delete API (batch_delete_target), one request, deletes only
+    container: list the container and delete each annotation by ETag (iterative_delete_by_target)
+    search: search by target and delete each annotation by ETag (iterative_delete_by_target)
+
+    Deleting by ETag costs a GET and a DELETE per annotation, on top of listing the pages (and
+    listing again, to check nothing was missed), so the batch API is the cheapest by orders of
+    magnitude, unless etag_deletes is True.
+
+    The container is only used when it holds as many annotations as the search finds, i.e. when
+    the md5 hash convention holds, as otherwise it would miss annotations on the target, or
+    delete annotations on other targets.
+
+    The plan is logged at INFO.
+
+    :param target: target URI
+    :param elucidate_base: base URI for Elucidate, e.g. https://elucidate.example.org
+    :param operation: 'delete' or 'list'
+    :param etag_deletes: if True, each annotation must be deleted with its ETag, so batch is
+        not allowed
+    :param strategies: optional tuple of the strategies allowed, defaults to all of them
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the probes
+    :return: dict of strategy (one of STRATEGIES, or None if no strategy is possible, or 'none'
+        if there is nothing to do), requests (estimated), estimates (dict of strategy to
+        estimated requests, for each strategy allowed and possible), totals (dict of container
+        and search totals, None if unknown) and probes (requests made to plan)
+    """
+    deadline = as_deadline(deadline)
+    allowed = set(strategies or STRATEGIES)
+    if operation == "list" or etag_deletes:
+        allowed.discard("batch")
+    container_uri = gen_search_by_container_uri(elucidate_base=elucidate_base, target_uri=target)
+    search_uri = gen_search_by_target_uri(target_uri=target, elucidate_base=elucidate_base)
+    plan = {"strategy": None, "requests": None, "estimates": {}, "totals": {}, "probes": 0}
+    try:
+        search_total, search_size = _probe(search_uri, timeout, deadline)
+        plan["probes"] += 1
+        container_total, container_size = None, 0
+        if "container" in allowed:
+            container_total, container_size = _probe(container_uri, timeout, deadline)
+            plan["probes"] += 1
+    except DeadlineExceeded as e:
+        logging.error("%s, could not plan for %s", e, target)
+        return plan
+    plan["totals"] = {"container": container_total, "search": search_total}
+    per_item = 2 if operation == "delete" else 0  # GET for the ETag, then DELETE
+    relist = 1 if operation == "delete" else 0  # listing again, to check nothing was missed
+    if "batch" in allowed:
+        plan["estimates"]["batch"] = 1
+    if "search" in allowed and search_total is not None:
+        plan["estimates"]["search"] = (
+            _listing_requests(search_total, search_size) + per_item * search_total + relist
+        )
+    if "container" in allowed and container_total is not None and container_total == search_total:
+        plan["estimates"]["container"] = (
+            _listing_requests(container_total, container_size) + per_item * container_total + relist
+        )
+    if search_total == 0 and not container_total:
+        plan["strategy"], plan["requests"] = "none", 0
+    elif plan["estimates"]:
+        plan["strategy"] = min(plan["estimates"], key=lambda s: (plan["estimates"][s], STRATEGIES.index(s)))
+        plan["requests"] = plan["estimates"][plan["strategy"]]
+    logging.info(
+        "Plan to %s %s: %s, about %s requests (totals %s, estimates %s, %s probes)",
+        operation,
+        target,
+        plan["strategy"],
+        plan["requests"],
+        plan["totals"],
+        plan["estimates"],
+        plan["probes"],
+    )
+    return plan
+
+
+def planned_delete_by_target(
+    target: str,
+    elucidate_base: str,
+    dry_run: bool = True,
+    etag_deletes: bool = False,
+    strategies: Optional[tuple] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    journal: Optional[Journal] = None,
+    progress: Optional[Progress] = None,
+) -> bool:
+    """
+    Delete all annotations on a target, with the cheapest strategy, see plan_target.
+
+    :param target: target URI
+    :param elucidate_base: base URI for Elucidate, e.g. https://elucidate.example.org
+    :param dry_run: if True, will not actually delete
+    :param etag_deletes: if True, each annotation must be deleted with its ETag
+    :param strategies: optional tuple of the strategies allowed
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the whole operation, including planning
+    :param journal: optional Journal to record ETag deletes in
+    :param progress: optional Progress, to report ETag deletes to
+    :return: boolean success or fail
+    """
+    deadline = as_deadline(deadline)
+    plan = plan_target(
+        target,
+        elucidate_base,
+        etag_deletes=etag_deletes,
+        strategies=strategies,
+        timeout=timeout,
+        deadline=deadline,
+    )
+    strategy = plan["strategy"]
+    if strategy is None:
+        logging.error("No strategy to delete annotations for %s", target)
+        return False
+    elif strategy == "none":
+        return True
+    elif strategy == "batch":
+        if deadline is not None and deadline.expired:
+            logging.error("Deadline of %ss exceeded before deleting annotations for %s", deadline.seconds, target)
+            return False
+        try:
+            return 200 == batch_delete_target(
+                target, elucidate_base, dry_run=dry_run, timeout=timeout, deadline=deadline
+            )
+        except DeadlineExceeded as e:
+            logging.error("Could not delete annotations for %s: %s", target, e)
+            return False
+    return iterative_delete_by_target(
+        target,
+        elucidate_base,
+        search_method=strategy,
+        dryrun=dry_run,
+        timeout=timeout,
+        deadline=deadline,
+        journal=journal,
+        progress=progress,
+    )
+
+
+def planned_items_by_target(
+    target: str, elucidate_base: str, strategies: Optional[tuple] = None, **kwargs
+) -> Optional[dict]:
+    """
+    Asynchronously yield the annotations on a target, from its container or from a search by
+    target, whichever is cheaper, see plan_target.
+
+    Accepts the same keyword args as async_items_by_target.
+
+    :param target: target URI
+    :param elucidate_base: base URI for Elucidate, e.g. https://elucidate.example.org
+    :param strategies: optional tuple of the strategies allowed
+    :return: annotation object
+    """
+    deadline = as_deadline(kwargs.get("deadline"))
+    plan = plan_target(
+        target,
+        elucidate_base,
+        operation="list",
+        strategies=strategies,
+        timeout=kwargs.get("timeout"),
+        deadline=deadline,
+    )
+    kwargs = dict(kwargs, deadline=deadline)
+    if plan["strategy"] == "container":
+        yield from async_items_by_container(elucidate_base, target_uri=target, **kwargs)
+    elif plan["strategy"] == "search":
+        yield from async_items_by_target(elucidate_base, target, **kwargs)
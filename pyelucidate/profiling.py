@@ -0,0 +1,234 @@
+"""
+Opt-in profiling of library operations, with cProfile, tracemalloc and timing hooks that split
+the time between network wait, decoding and transforming annotations.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Optional
+
+_active = None  # PhaseTimes of the Profile in progress, if any
+
+
+def phases() -> Optional["PhaseTimes"]:
+    """
+    :return: PhaseTimes of the Profile in progress, or None if not profiling, in which case the
+        timing hooks do nothing
+    """
+    return _active
+
+
+class PhaseTimes:
+    """
+    Thread-safe total seconds, and count, for each phase of an operation.
+
+    Phases recorded by the library are:
+
+    network: sending a request and reading the response (_request, e.g. in get_items, fetch and
+        _async_request)
+    dns: resolving host names (aiohttp requests only)
+    connect: opening connections, including the TLS handshake (aiohttp requests only)
+    decode: decoding JSON responses (fetch and get_items)
+    copy: deepcopy of each annotation in transform_annotation
+    transform: the rest of transform_annotation
+
+    N.B. async requests overlap, so their totals can be greater than the elapsed time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds = {}
+        self.counts = {}
+
+    def add(self, phase: str, seconds: float):
+        """
+        :param phase: name of the phase
+        :param seconds: time spent in it
+        """
+        with self._lock:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+            self.counts[phase] = self.counts.get(phase, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        :return: dict of phase to dict of seconds and count
+        """
+        with self._lock:
+            return {p: {"seconds": self.seconds[p], "count": self.counts[p]} for p in sorted(self.seconds)}
+
+
+def trace_config():
+    """
+    aiohttp TraceConfig which records the dns and connect phases, if profiling, else None.
+    """
+    if _active is None:
+        return None
+    import aiohttp
+
+    def start(name):
+        async def on_start(session, context, params):
+            setattr(context, name, time.perf_counter())
+
+        return on_start
+
+    def end(name):
+        async def on_end(session, context, params):
+            started = getattr(context, name, None)
+            if started is not None and _active is not None:
+                _active.add(name, time.perf_counter() - started)
+
+        return on_end
+
+    config = aiohttp.TraceConfig()
+    config.on_dns_resolvehost_start.append(start("dns"))
+    config.on_dns_resolvehost_end.append(end("dns"))
+    config.on_connection_create_start.append(start("connect"))
+    config.on_connection_create_end.append(end("connect"))
+    return config
+
+
+# time spent in these modules' own code is reported, e.g. to show the cost of logging
+_MODULES = {
+    "logging": os.sep + "logging" + os.sep,
+    "json": os.sep + "json" + os.sep,
+    "copy": os.sep + "copy.py",
+}
+
+
+class Profile:
+    """
+    Context manager which profiles the enclosed operation with cProfile, tracemalloc (optional)
+    and the library's phase timing hooks, e.g.:
+
+    .. code-block:: python
+
+        with Profile("delete") as profile:
+            iiif_iterative_delete_by_manifest(manifest_uri, elucidate)
+        print(profile.format_report())
+
+    If a path is given, the cProfile stats are saved to path + ".prof" (for pstats, snakeviz,
+    etc.), the tracemalloc snapshot to path + ".tracemalloc" (for tracemalloc.Snapshot.load) and
+    the report to path + ".json", so that runs can be compared later.
+
+    cProfile only profiles the thread that entered the context (which includes the async
+    requests, as their event loop runs in that thread), but the phase times include every
+    thread.
+
+    :param path: optional path prefix for the saved profiles
+    :param memory: if True, trace memory allocations with tracemalloc (which slows Python down)
+    :param top: number of functions, and allocation sites, in the report
+    """
+
+    def __init__(self, path: Optional[str] = None, memory: bool = True, top: int = 20):
+        self.path = path
+        self.memory = memory
+        self.top = top
+        self.phases = PhaseTimes()
+        self.profiler = cProfile.Profile()
+        self.snapshot = None
+        self.elapsed = None
+        self._report = None
+        self._tracing = False
+
+    def __enter__(self) -> "Profile":
+        global _active
+        if _active is not None:
+            raise RuntimeError("Already profiling")
+        _active = self.phases
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._start = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        self.profiler.disable()
+        self.elapsed = time.perf_counter() - self._start
+        _active = None
+        if self.memory and tracemalloc.is_tracing():
+            self._peak = tracemalloc.get_traced_memory()[1]
+            self.snapshot = tracemalloc.take_snapshot()
+            if self._tracing:
+                tracemalloc.stop()
+        if self.path:
+            self.save(self.path)
+
+    def report(self) -> dict:
+        """
+        :return: dict of elapsed seconds, phases (see PhaseTimes), modules (seconds spent in the
+            logging, json and copy modules' own code), functions (the top functions by cumulative
+            time) and memory (peak bytes, and the top allocation sites)
+        """
+        if self._report is not None:
+            return self._report
+        stats = pstats.Stats(self.profiler)
+        modules = {name: 0.0 for name in _MODULES}
+        functions = []
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            for module, fragment in _MODULES.items():
+                if fragment in filename:
+                    modules[module] += tottime
+            functions.append(
+                {
+                    "function": "%s:%s(%s)" % (filename, line, name),
+                    "calls": calls,
+                    "tottime": tottime,
+                    "cumtime": cumtime,
+                }
+            )
+        functions.sort(key=lambda f: f["cumtime"], reverse=True)
+        report = {
+            "elapsed": self.elapsed,
+            "phases": self.phases.stats(),
+            "modules": modules,
+            "functions": functions[: self.top],
+        }
+        if self.snapshot is not None:
+            report["memory"] = {
+                "peak": self._peak,
+                "top": [
+                    {"site": str(s.traceback), "size": s.size, "count": s.count}
+                    for s in self.snapshot.statistics("lineno")[: self.top]
+                ],
+            }
+        self._report = report
+        return report
+
+    def format_report(self) -> str:
+        """
+        :return: the report, as text
+        """
+        report = self.report()
+        out = io.StringIO()
+        out.write("elapsed %.3fs\n" % report["elapsed"])
+        for phase, p in report["phases"].items():
+            out.write("  %-10s %9.3fs %8s calls\n" % (phase, p["seconds"], p["count"]))
+        for module, seconds in report["modules"].items():
+            out.write("  %-10s %9.3fs (module)\n" % (module, seconds))
+        if "memory" in report:
+            out.write("peak memory %s bytes\n" % report["memory"]["peak"])
+            for s in report["memory"]["top"][:5]:
+                out.write("  %10s bytes %s\n" % (s["size"], s["site"]))
+        stats = pstats.Stats(self.profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        return out.getvalue()
+
+    def save(self, path: str):
+        """
+        Save the cProfile stats to path + ".prof", the tracemalloc snapshot (if any) to
+        path + ".tracemalloc" and the report to path + ".json".
+
+        :param path: path prefix
+        """
+        self.profiler.dump_stats(path + ".prof")
+        if self.snapshot is not None:
+            self.snapshot.dump(path + ".tracemalloc")
+        with open(path + ".json", "w") as f:
+            json.dump(self.report(), f, indent=2)
@@ -0,0 +1,180 @@
+"""
+Throttled progress and throughput reporting for long running operations, such as deleting the
+annotations on every canvas of a large manifest.
+"""
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+
+def _duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    return "%d:%02d:%02d" % (seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+
+class StatusLine:
+    """
+    Progress callback which writes a compact status line to a stream (stderr by default), e.g.:
+
+    pages 12/40 | items 1200 | deletes 300 (2 failed) | canvases 3 | 45.2/s | 0:00:31 | ETA 0:01:02
+
+    On a terminal the line is redrawn in place, otherwise a line is written for each update.
+
+    :param stream: file-like object to write to, defaults to sys.stderr
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self._width = 0
+
+    @staticmethod
+    def format(snapshot: dict) -> str:
+        """
+        :param snapshot: see Progress.snapshot
+        :return: status line
+        """
+        parts = []
+        if snapshot["pages_total"]:
+            parts.append("pages %s/%s" % (snapshot["pages"], snapshot["pages_total"]))
+        elif snapshot["pages"]:
+            parts.append("pages %s" % snapshot["pages"])
+        parts.append("items %s" % snapshot["items"])
+        if snapshot["deletes"] or snapshot["failures"]:
+            parts.append("deletes %s (%s failed)" % (snapshot["deletes"], snapshot["failures"]))
+        if snapshot["canvases"]:
+            parts.append("canvases %s" % snapshot["canvases"])
+        parts.append("%.1f/s" % snapshot["rate"])
+        parts.append(_duration(snapshot["elapsed"]))
+        if snapshot["eta"] is not None:
+            parts.append("ETA %s" % _duration(snapshot["eta"]))
+        return " | ".join(parts)
+
+    def __call__(self, snapshot: dict, final: bool = False):
+        line = self.format(snapshot)
+        try:
+            tty = self.stream.isatty()
+        except (AttributeError, ValueError):
+            tty = False
+        if tty:
+            self.stream.write("\r" + line.ljust(self._width) + ("\n" if final else ""))
+            self._width = len(line)
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+
+class Progress:
+    """
+    Thread-safe progress counters (pages fetched, of the total, items yielded, deletes done and
+    failed, and canvases completed) which are passed to a callback at most once every interval
+    seconds, with the current rate and, where the total number of pages is known, an ETA.
+
+    Pass a Progress as progress to async_items_*, iterative_delete_by_target,
+    iiif_iterative_delete_by_manifest (and their _async_get variants), to watch long operations
+    without per-annotation logging. Can be used as a context manager, which reports the final
+    counts on exit.
+
+    For example:
+
+    .. code-block:: python
+
+        with Progress() as progress:
+            iiif_iterative_delete_by_manifest(manifest_uri, elucidate, progress=progress)
+
+    :param callback: callable taking a snapshot dict (see snapshot) and final, defaults to a
+        StatusLine on stderr
+    :param interval: minimum seconds between callbacks
+    """
+
+    def __init__(self, callback: Optional[Callable] = None, interval: float = 1.0):
+        self.callback = callback if callback is not None else StatusLine()
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._last = self._start  # time of the last callback
+        self._last_done = 0  # work done at the last callback, for the current rate
+        self._rate = 0.0
+        self.pages = 0
+        self.pages_total = 0
+        self.items = 0
+        self.deletes = 0
+        self.failures = 0
+        self.canvases = 0
+
+    def __enter__(self) -> "Progress":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _done(self) -> int:
+        # deletes are the unit of work when deleting, otherwise items yielded
+        return self.deletes if self.deletes else self.items
+
+    def add(
+        self,
+        pages: int = 0,
+        pages_total: int = 0,
+        items: int = 0,
+        deletes: int = 0,
+        failures: int = 0,
+        canvases: int = 0,
+    ):
+        """
+        Add to the counters, and call the callback if interval seconds have passed since the
+        last call.
+        """
+        with self._lock:
+            self.pages += pages
+            self.pages_total += pages_total
+            self.items += items
+            self.deletes += deletes
+            self.failures += failures
+            self.canvases += canvases
+            now = time.monotonic()
+            if now - self._last < self.interval:
+                return
+            self._rate = (self._done() - self._last_done) / (now - self._last)
+            self._last = now
+            self._last_done = self._done()
+            snapshot = self._snapshot(now)
+        self.callback(snapshot)
+
+    def _snapshot(self, now: float) -> dict:
+        elapsed = now - self._start
+        eta = None
+        if self.pages_total and self.pages:
+            eta = (self.pages_total - self.pages) * elapsed / self.pages
+        return {
+            "pages": self.pages,
+            "pages_total": self.pages_total,
+            "items": self.items,
+            "deletes": self.deletes,
+            "failures": self.failures,
+            "canvases": self.canvases,
+            "elapsed": elapsed,
+            "rate": self._rate,
+            "eta": eta,
+        }
+
+    def snapshot(self) -> dict:
+        """
+        :return: dict of pages, pages_total, items, deletes, failures, canvases, elapsed
+            (seconds), rate (deletes, or if there are none, items, per second, over the last
+            interval) and eta (seconds, or None if the total is unknown)
+        """
+        with self._lock:
+            return self._snapshot(time.monotonic())
+
+    def close(self):
+        """
+        Call the callback with the final counts, and the average rate.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._rate = self._done() / (now - self._start) if now > self._start else 0.0
+            snapshot = self._snapshot(now)
+        self.callback(snapshot, final=True)
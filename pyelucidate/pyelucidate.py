@@ -1,13 +1,258 @@
 import json
-from typing import Optional, Tuple, Union, Callable
+from typing import Iterable, Optional, Tuple, Union, Callable
 from urllib.parse import quote_plus, urlparse, urlunparse, urlencode, parse_qsl, parse_qs
 import asyncio
+import gzip
 import hashlib
 import logging
+import sys
+import threading
+import time
 import aiohttp
 import requests
 from aiohttp import ClientSession, TCPConnector
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from copy import deepcopy
+from functools import partial
+from .backpressure import PageBuffer
+from .dedup import new_id_set
+from .journal import Journal
+from .manifest import CanvasIds, read_ahead
+from .profiling import phases, trace_config
+from .progress import Progress
+from .ratelimit import RateLimiter
+
+
+DEFAULT_TIMEOUT = (5, 60)  # (connect, read) timeout in seconds applied to every HTTP request
+ACCEPT_ENCODING = "gzip, deflate"  # sent with every HTTP request
+_rate_limiter = None  # default RateLimiter for every HTTP request, see set_rate_limiter
+_compress_threshold = None  # minimum POST/PUT body size to gzip, see set_request_compression
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]):
+    """
+    Set the default RateLimiter, applied to every HTTP request made by the library (sync or
+    async) that isn't passed a limiter explicitly. Pass None to remove it.
+
+    :param limiter: RateLimiter, shared by all threads
+    """
+    global _rate_limiter
+    _rate_limiter = limiter
+
+
+def set_request_compression(threshold: Optional[int] = 16384):
+    """
+    Gzip the bodies of POST and PUT requests (e.g. batch_update_body, create_anno, update_anno)
+    of at least threshold bytes, sent with Content-Encoding: gzip. Off by default, as the server
+    (or a proxy in front of it) must accept compressed request bodies. Pass None to turn it off.
+
+    :param threshold: minimum body size in bytes
+    """
+    global _compress_threshold
+    _compress_threshold = threshold
+
+
+class TransferStats:
+    """
+    Thread-safe counts of HTTP requests and bytes sent and received by the library, both on the
+    wire and uncompressed, to show what compression is saving.
+
+    Wire bytes received are from the response's Content-Length (or bytes read from the socket)
+    and can be under-counted for chunked, compressed async responses, where they are unknown.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.sent = 0
+            self.sent_uncompressed = 0
+            self.received = 0
+            self.received_uncompressed = 0
+
+    def record(self, sent: int = 0, sent_uncompressed: int = 0, received: int = 0, received_uncompressed: int = 0):
+        with self._lock:
+            self.requests += 1
+            self.sent += sent
+            self.sent_uncompressed += sent_uncompressed
+            self.received += received
+            self.received_uncompressed += received_uncompressed
+
+    def stats(self) -> dict:
+        """
+        :return: dict of requests, sent, sent_uncompressed, received and received_uncompressed
+            bytes, and the sent and received compression ratios
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "sent": self.sent,
+                "sent_uncompressed": self.sent_uncompressed,
+                "sent_ratio": self.sent_uncompressed / self.sent if self.sent else 1.0,
+                "received": self.received,
+                "received_uncompressed": self.received_uncompressed,
+                "received_ratio": self.received_uncompressed / self.received if self.received else 1.0,
+            }
+
+
+transfer_stats = TransferStats()  # for every HTTP request made by the library
+
+
+def _prepare_request(method: str, kwargs: dict) -> Tuple[int, int]:
+    """
+    Set Accept-Encoding, and gzip the request body if it is over the compression threshold (see
+    set_request_compression), updating kwargs (headers and data) in place.
+
+    :return: body bytes on the wire, uncompressed body bytes
+    """
+    headers = dict(kwargs.get("headers") or {})
+    headers.setdefault("Accept-Encoding", ACCEPT_ENCODING)
+    kwargs["headers"] = headers
+    data = kwargs.get("data")
+    if data is None:
+        return 0, 0
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    size = len(data)
+    if method in ("POST", "PUT") and _compress_threshold is not None and size >= _compress_threshold:
+        data = gzip.compress(data, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+        logging.debug("Compressed %s request body from %s to %s bytes", method, size, len(data))
+    kwargs["data"] = data
+    return len(data), size
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when an operation's Deadline runs out before a request could be made or completed.
+    """
+
+
+class Deadline:
+    """
+    Operation-level time budget, shared by every request made on behalf of a single operation,
+    e.g. manifest -> canvas -> page -> annotation requests in iiif_iterative_delete_by_manifest.
+
+    Individual request timeouts are capped to the time remaining in the budget, so no single
+    request can outlive it.
+
+    :param seconds: budget in seconds, starting now
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """
+        :return: seconds left in the budget, 0 if expired
+        """
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def as_deadline(deadline: Optional[Union["Deadline", float]]) -> Optional[Deadline]:
+    """
+    Accept either a Deadline or a number of seconds, and return a Deadline (or None).
+
+    :param deadline: Deadline object, or budget in seconds
+    :return: Deadline
+    """
+    if deadline is None or isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(deadline)
+
+
+def request_timeout(
+    timeout: Optional[Union[float, Tuple[float, float]]] = None, deadline: Optional[Deadline] = None
+) -> Tuple[float, float]:
+    """
+    Resolve the (connect, read) timeout for a single request, capped by the remaining deadline.
+
+    :param timeout: seconds, or (connect, read) tuple, defaults to DEFAULT_TIMEOUT
+    :param deadline: optional Deadline for the whole operation
+    :return: (connect, read) timeout tuple
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+    if not isinstance(timeout, tuple):
+        timeout = (timeout, timeout)
+    if deadline is not None:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline of %ss exceeded" % deadline.seconds)
+        timeout = tuple(min(t, remaining) for t in timeout)
+    return timeout
+
+
+def client_timeout(
+    timeout: Optional[Union[float, Tuple[float, float]]] = None
+) -> aiohttp.ClientTimeout:
+    """
+    Convert a requests style (connect, read) timeout into an aiohttp ClientTimeout.
+
+    :param timeout: seconds, or (connect, read) tuple, defaults to DEFAULT_TIMEOUT
+    :return: aiohttp ClientTimeout
+    """
+    connect, read = request_timeout(timeout)
+    return aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+
+
+def _request(
+    method: str,
+    url: str,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Deadline] = None,
+    limiter: Optional[RateLimiter] = None,
+    **kwargs
+) -> requests.Response:
+    """
+    Make a single HTTP request with connect/read timeouts, capped by the optional deadline, and
+    subject to the rate limiter (or the default set by set_rate_limiter). Negotiates a compressed
+    response, compresses large bodies if set_request_compression is on, and counts the bytes in
+    transfer_stats.
+
+    Raises DeadlineExceeded if the deadline has run out, before the request or while waiting for
+    the rate limiter, or the request timed out because of it.
+    """
+    if deadline is not None and deadline.remaining() <= 0:
+        raise DeadlineExceeded("Deadline of %ss exceeded before requesting %s" % (deadline.seconds, url))
+    limiter = limiter or _rate_limiter
+    if limiter is not None:
+        limiter.acquire(url, method)
+        if deadline is not None and deadline.remaining() <= 0:
+            raise DeadlineExceeded(
+                "Deadline of %ss exceeded waiting for the rate limiter to request %s" % (deadline.seconds, url)
+            )
+    sent, sent_uncompressed = _prepare_request(method, kwargs)
+    timer = phases()
+    started = time.perf_counter() if timer is not None else 0.0
+    try:
+        r = requests.request(method, url, timeout=request_timeout(timeout, deadline), **kwargs)
+    except requests.exceptions.Timeout:
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded("Deadline of %ss exceeded requesting %s" % (deadline.seconds, url))
+        raise
+    finally:
+        if timer is not None:
+            timer.add("network", time.perf_counter() - started)
+    if kwargs.get("stream"):
+        transfer_stats.record(sent, sent_uncompressed)
+    else:
+        received_uncompressed = len(r.content)
+        try:
+            received = r.raw.tell() or int(r.headers.get("Content-Length", received_uncompressed))
+        except (AttributeError, ValueError):
+            received = received_uncompressed
+        transfer_stats.record(sent, sent_uncompressed, received, received_uncompressed)
+    return r
 
 
 def set_query_field(url: str, field: str, value: Union[int, str], replace: bool = False):
@@ -85,7 +330,13 @@ def annotation_pages(result: Optional[dict]) -> Optional[str]:
         return
 
 
-def items_by_body_source(elucidate: str, topic: str, strict: bool = True) -> dict:
+def items_by_body_source(
+    elucidate: str,
+    topic: str,
+    strict: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+) -> dict:
     """
     Generator to yield annotations from query to Elucidate by body source.
 
@@ -120,8 +371,11 @@ def items_by_body_source(elucidate: str, topic: str, strict: bool = True) -> dic
     :param elucidate: URL for Elucidate server, e.g. https://elucidate.example.org
     :param topic:  URI for body source, e.g. https://www.example.org/themes/foo
     :param strict: if strict, use strict = True.
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the whole search, stops yielding when exceeded
     :return: annotation dict
     """
+    deadline = as_deadline(deadline)
     t = quote_plus(topic)
     search_uri = "".join(
         [
@@ -132,15 +386,18 @@ def items_by_body_source(elucidate: str, topic: str, strict: bool = True) -> dic
             "&strict=" + str(strict),
         ]
     )
-    r = requests.get(search_uri)
-    if r.status_code == requests.codes.ok:
-        for page in annotation_pages(r.json()):
-            items = requests.get(page).json()["items"]
-            for item in items:
-                yield item
-    else:
-        logging.warning("%s returned %s", search_uri, r.status_code)
-        yield
+    try:
+        r = _request("GET", search_uri, timeout=timeout, deadline=deadline)
+        if r.status_code == requests.codes.ok:
+            for page in annotation_pages(r.json()):
+                items = _request("GET", page, timeout=timeout, deadline=deadline).json()["items"]
+                for item in items:
+                    yield item
+        else:
+            logging.warning("%s returned %s", search_uri, r.status_code)
+            yield
+    except DeadlineExceeded as e:
+        logging.warning("%s, returning partial results for %s", e, search_uri)
 
 
 def parent_from_annotation(content: dict) -> Optional[str]:
@@ -221,8 +478,30 @@ def parents_by_topic(elucidate: str, topic: str) -> Optional[str]:
                 yield m
 
 
+def _batch_update_data(new_topic_id: str, old_topic_ids: list) -> str:
+    """
+    :return: JSON batch update body replacing each of old_topic_ids with new_topic_id
+    """
+    bodies = []
+    for old_topic_id in old_topic_ids:
+        bodies.append(
+            {
+                "id": old_topic_id,
+                "oa:isReplacedBy": new_topic_id,
+                "source": {"id": old_topic_id, "oa:isReplacedBy": new_topic_id},
+            }
+        )
+    return json.dumps({"@context": "http://www.w3.org/ns/anno.jsonld", "body": bodies})
+
+
 def batch_update_body(
-    new_topic_id: str, old_topic_ids: list, elucidate_base: str, dry_run: bool = True
+    new_topic_id: str,
+    old_topic_ids: list,
+    elucidate_base: str,
+    dry_run: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
 ) -> Tuple[int, dict]:
     """
     Use Elucidate's bulk update APIs to replace all instances of each of a list of body source or
@@ -234,23 +513,21 @@ def batch_update_body(
     :param old_topic_ids: topic ids to replace, list
     :param elucidate_base: elucidate base URI, e.g. https://elucidate.example.org
     :param dry_run: if True, will simply log JSON and URI and then return a 200
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :param deadline: Deadline (or seconds) for the request, raises DeadlineExceeded if exceeded
     :return: POST status code
     """
-    bodies = []
-    for old_topic_id in old_topic_ids:
-        bodies.append(
-            {
-                "id": old_topic_id,
-                "oa:isReplacedBy": new_topic_id,
-                "source": {"id": old_topic_id, "oa:isReplacedBy": new_topic_id},
-            }
-        )
-    post_data = json.dumps({"@context": "http://www.w3.org/ns/anno.jsonld", "body": bodies})
+    post_data = _batch_update_data(new_topic_id, old_topic_ids)
     post_uri = elucidate_base + "/annotation/w3c/services/batch/update"
     logging.debug("Posting %s to %s", post_data, post_uri)
     if not dry_run:
-        resp = requests.post(
-            url=post_uri,
+        resp = _request(
+            "POST",
+            post_uri,
+            timeout=timeout,
+            deadline=as_deadline(deadline),
+            limiter=limiter,
             data=post_data,
             headers={
                 "Content-type": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"'
@@ -264,7 +541,144 @@ def batch_update_body(
         return 200, post_data
 
 
-def batch_delete_topic(topic_id: str, elucidate_base: str, dry_run: bool = True) -> Tuple[int, str]:
+def _retryable(status: Optional[int]) -> bool:
+    """
+    :return: True if a request may succeed if retried, i.e. it failed to connect or timed out
+        (status None), was rate limited (429), or had a server error (5xx)
+    """
+    return status is None or status == requests.codes.too_many_requests or status >= 500
+
+
+def _batch_update_chunk(
+    index: int,
+    new_topic_id: str,
+    old_topic_ids: list,
+    elucidate_base: str,
+    dry_run: bool,
+    retries: int,
+    backoff: float,
+    timeout: Optional[Union[float, Tuple[float, float]]],
+    deadline: Optional[Deadline],
+    limiter: Optional[RateLimiter],
+) -> dict:
+    """
+    POST one chunk of a chunked batch update, retrying it on failure.
+    """
+    result = {"chunk": index, "topic_ids": old_topic_ids, "status": None, "attempts": 0, "elapsed": 0.0}
+    start = time.monotonic()
+    for attempt in range(retries + 1):
+        if attempt:
+            wait = backoff * 2 ** (attempt - 1)
+            if deadline is not None:
+                wait = min(wait, deadline.remaining())
+            time.sleep(wait)
+        result["attempts"] = attempt + 1
+        try:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded("Deadline of %ss exceeded" % deadline.seconds)
+            result["status"], _ = batch_update_body(
+                new_topic_id,
+                old_topic_ids,
+                elucidate_base,
+                dry_run=dry_run,
+                timeout=timeout,
+                limiter=limiter,
+                deadline=deadline,
+            )
+        except DeadlineExceeded:
+            logging.warning("Deadline exceeded, giving up on batch update chunk %s", index)
+            result["status"] = None
+            break
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            logging.error("Batch update chunk %s failed: %s", index, e)
+            result["status"] = None
+        except requests.exceptions.RequestException as e:
+            logging.error("Batch update chunk %s failed, not retrying: %s", index, e)
+            result["status"] = None
+            break
+        if result["status"] == requests.codes.OK:
+            break
+        if not _retryable(result["status"]):
+            logging.error("Batch update chunk %s returned %s, not retrying", index, result["status"])
+            break
+        logging.warning(
+            "Batch update chunk %s attempt %s returned %s", index, attempt + 1, result["status"]
+        )
+    result["elapsed"] = time.monotonic() - start
+    return result
+
+
+def batch_update_body_chunked(
+    new_topic_id: str,
+    old_topic_ids: list,
+    elucidate_base: str,
+    dry_run: bool = True,
+    chunk_size: int = 50,
+    workers: int = 4,
+    retries: int = 2,
+    backoff: float = 1.0,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> list:
+    """
+    Batch update, as batch_update_body, but split old_topic_ids into chunks of chunk_size ids,
+    each POSTed as a separate batch update, with up to workers requests in flight at once. Use
+    this for large merges, where a single batch update would time out on the server.
+
+    Each chunk that fails with a server error (5xx), rate limit (429), connection error or
+    timeout is retried on its own, up to retries more times, waiting backoff seconds, doubling
+    on each attempt. Other client errors (4xx) won't succeed if retried, so fail straight away.
+
+    :param new_topic_id: topic ids to use, string
+    :param old_topic_ids: topic ids to replace, list
+    :param elucidate_base: elucidate base URI, e.g. https://elucidate.example.org
+    :param dry_run: if True, will simply log JSON and URI and return a 200 for each chunk
+    :param chunk_size: number of topic ids per POST
+    :param workers: maximum number of concurrent POSTs
+    :param retries: number of times to retry a failed chunk
+    :param backoff: seconds to wait before the first retry
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline, or seconds, for the whole merge, each POST's timeout, and each
+        retry's backoff, is capped to the time remaining, and no chunks are attempted after it
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: list, in chunk order, of dicts of chunk (index), topic_ids, status (None if
+        there was no response), attempts and elapsed (seconds)
+    """
+    deadline = as_deadline(deadline)
+    chunks = [old_topic_ids[i: i + chunk_size] for i in range(0, len(old_topic_ids), chunk_size)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(
+                _batch_update_chunk,
+                index,
+                new_topic_id,
+                chunk,
+                elucidate_base,
+                dry_run,
+                retries,
+                backoff,
+                timeout,
+                deadline,
+                limiter,
+            )
+            for index, chunk in enumerate(chunks)
+        ]
+        results = [f.result() for f in futures]
+    failed = [r["chunk"] for r in results if r["status"] != requests.codes.OK]
+    if failed:
+        logging.error("Batch update of %s failed for chunks %s", new_topic_id, failed)
+    return results
+
+
+def batch_delete_topic(
+    topic_id: str,
+    elucidate_base: str,
+    dry_run: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+) -> Tuple[int, str]:
     """
     Use Elucidate's batch update apis to delete all instances of a topic URI.
 
@@ -273,6 +687,10 @@ def batch_delete_topic(topic_id: str, elucidate_base: str, dry_run: bool = True)
     :param topic_id: topic id to delete
     :param elucidate_base: elucidate base URI, e.g. https://elucidate.example.org
     :param dry_run: if True, will simply log and then return a 200
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :param deadline: Deadline (or seconds) for the request, DeadlineExceeded is raised if it runs
+        out
     :return: tuple - http POST status code, JSON POSTed (as string)
     """
     post_uri = elucidate_base + "/annotation/w3c/services/batch/delete"
@@ -284,8 +702,12 @@ def batch_delete_topic(topic_id: str, elucidate_base: str, dry_run: bool = True)
     )
     logging.debug("Posting %s to %s", post_data, post_uri)
     if not dry_run:
-        resp = requests.post(
-            url=post_uri,
+        resp = _request(
+            "POST",
+            post_uri,
+            timeout=timeout,
+            deadline=as_deadline(deadline),
+            limiter=limiter,
             data=post_data,
             headers={
                 "Content-type": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"'
@@ -360,19 +782,43 @@ def gen_search_by_container_uri(
         return None
 
 
-def get_items(uri: str) -> Optional[dict]:
+def get_items(
+    uri: str,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    as_records: bool = False,
+    intern: Optional["InternTable"] = None,
+) -> Optional[Union[dict, "Annotation"]]:
     """
     Page through an ActivityStreams paged result set, yielding
     each page's items one at a time.
 
+    If the deadline is exceeded, stops paging and returns the items yielded so far.
+
     :param uri: Request URI, e.g. provided by gen_search_by_target_uri()
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for paging through the whole result set
+    :param as_records: if True, yield compact Annotation records rather than dicts
+    :param intern: optional InternTable used to deduplicate repeated URIs as pages are decoded
     :return: item
     """
+    deadline = as_deadline(deadline)
     while True:
-        page_response = requests.get(uri)
+        try:
+            page_response = _request("GET", uri, timeout=timeout, deadline=deadline)
+        except DeadlineExceeded as e:
+            logging.warning("%s, returning partial results for %s", e, uri)
+            return
         if page_response.status_code != 200:  # end of no results
             return
-        j = page_response.json()
+        timer = phases()
+        started = time.perf_counter() if timer is not None else 0.0
+        if intern is not None:
+            j = page_response.json(object_hook=intern.object_hook)
+        else:
+            j = page_response.json()
+        if timer is not None:
+            timer.add("decode", time.perf_counter() - started)
         if "first" in j:  # first page of result set
             if "as:items" in j["first"]:
                 items = j["first"]["as:items"]["@list"]
@@ -387,7 +833,10 @@ def get_items(uri: str) -> Optional[dict]:
                 items = None
         if items:
             for item in items:
-                yield item
+                if as_records:
+                    yield Annotation.from_item(item, intern=intern if intern is not None else sys.intern)
+                else:
+                    yield item
         try:  # try to get the next page (on first page)
             uri = j["first"]["next"]
         except KeyError:  # try to get the next page (on non-first page)
@@ -411,14 +860,20 @@ def item_ids(item: dict) -> Optional[str]:
             yield uri
 
 
-def read_anno(anno_uri: str) -> (Optional[str], Optional[str]):
+def read_anno(
+    anno_uri: str,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Deadline] = None,
+) -> (Optional[str], Optional[str]):
     """
     GET an annotation from Elucidate, returns a tuple of annotation content and ETag
 
     :param anno_uri: URI for annotation
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: optional Deadline, raises DeadlineExceeded if exceeded
     :return: annotation content, etag
     """
-    r = requests.get(anno_uri)
+    r = _request("GET", anno_uri, timeout=timeout, deadline=deadline)
     if r.status_code == requests.codes.ok:
         anno = r.json()
         etag = r.headers["ETag"].replace('W/"', "").replace('"', "")  # cleanup weak ETag format for
@@ -428,7 +883,13 @@ def read_anno(anno_uri: str) -> (Optional[str], Optional[str]):
         return None, None
 
 
-def delete_anno(anno_uri: str, etag: str, dry_run: bool = True) -> int:
+def delete_anno(
+    anno_uri: str,
+    etag: str,
+    dry_run: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Deadline] = None,
+) -> int:
     """
     Delete an individual annotation, requires etag.
 
@@ -437,6 +898,8 @@ def delete_anno(anno_uri: str, etag: str, dry_run: bool = True) -> int:
     :param anno_uri: URI for annotation
     :param etag: ETag
     :param dry_run: if True, log and return a 204
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: optional Deadline, raises DeadlineExceeded if exceeded
     :return: return DELETE request status code
     """
     header_dict = {
@@ -445,9 +908,11 @@ def delete_anno(anno_uri: str, etag: str, dry_run: bool = True) -> int:
         "Content-Type": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"',
     }
     if not dry_run:
-        r = requests.delete(anno_uri, headers=header_dict)
+        r = _request(
+            "DELETE", anno_uri, timeout=timeout, deadline=deadline, headers=header_dict
+        )
         if r.status_code == 204:
-            logging.info("Deleted %s", anno_uri)
+            logging.debug("Deleted %s", anno_uri)
         else:
             logging.error("Failed to delete %s server returned %s", anno_uri, r.status_code)
         return r.status_code
@@ -456,7 +921,14 @@ def delete_anno(anno_uri: str, etag: str, dry_run: bool = True) -> int:
         return 204
 
 
-def create_container(container_name: str, label: str, elucidate_uri: str) -> int:
+def create_container(
+    container_name: str,
+    label: str,
+    elucidate_uri: str,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+) -> int:
     """
     Create an annotation container with a container name and label.
 
@@ -464,6 +936,10 @@ def create_container(container_name: str, label: str, elucidate_uri: str) -> int
     :param label:  label for the container
     :param elucidate_uri:  uri for the annotation server, including full path, e.g.
         https://elucidate.example.org/annotation/w3c/
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :param deadline: Deadline (or seconds) for the requests, DeadlineExceeded is raised if it runs
+        out
     :return: POST request status code
     """
     container_headers = {
@@ -478,12 +954,21 @@ def create_container(container_name: str, label: str, elucidate_uri: str) -> int
     }
     container_body = json.dumps(container_dict)
     container_uri = elucidate_uri + container_name + "/"
-    c_get = requests.get(container_uri)
+    deadline = as_deadline(deadline)
+    c_get = _request("GET", container_uri, timeout=timeout, deadline=deadline, limiter=limiter)
     if c_get.status_code == 200:
         logging.debug("Container already exists at: %s", container_uri)
         return c_get.status_code
     else:
-        r = requests.post(elucidate_uri, headers=container_headers, data=container_body)
+        r = _request(
+            "POST",
+            elucidate_uri,
+            timeout=timeout,
+            deadline=deadline,
+            limiter=limiter,
+            headers=container_headers,
+            data=container_body,
+        )
         if r.status_code in [200, 201]:
             logging.debug("Container created at: %s", container_uri)
         else:
@@ -564,12 +1049,227 @@ def identify_target(annotation_content: dict) -> Optional[str]:
         return None
 
 
+def _first_uri(value) -> Optional[str]:
+    """
+    Return the URI for a property that may be a URI string, an object with an id, or a list of
+    either (in which case the first is used).
+    """
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get("id") or value.get("@id") or value.get("source")
+        if isinstance(value, dict):  # e.g. "source": {"id": "https://example.org/foo"}
+            value = value.get("id") or value.get("@id")
+    return value if isinstance(value, str) else None
+
+
+DEFAULT_INTERN_KEYS = (
+    "@context",
+    "creator",
+    "generator",
+    "motivation",
+    "purpose",
+    "type",
+    "format",
+    "source",
+    "dcterms:isPartOf",
+)
+
+
+class InternTable:
+    """
+    Bounded table for deduplicating the string values of frequently repeated annotation keys
+    (creator, generator, @context, motivation, manifest and topic URIs, etc.) as pages are
+    decoded, so long running aggregation jobs hold one copy of each URI rather than one per
+    annotation.
+
+    Use object_hook with json.loads, or pass the table to get_items, fetch/fetch_all or the
+    async_items_* functions (as the intern kwarg). The table is also callable, so it can be
+    passed to Annotation.from_item.
+
+    When the table is full, the least recently used value is evicted. Evicted strings are not
+    freed while annotations still refer to them, they are just no longer shared with new ones.
+
+    :param keys: keys whose values should be interned, defaults to DEFAULT_INTERN_KEYS
+    :param max_size: maximum number of distinct values held
+    """
+
+    def __init__(self, keys: Optional[tuple] = None, max_size: int = 100000):
+        self.keys = frozenset(DEFAULT_INTERN_KEYS if keys is None else keys)
+        self.max_size = max_size
+        self._table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __call__(self, value: str) -> str:
+        """
+        Return the shared copy of value, adding it to the table if not already present.
+
+        :param value: string
+        :return: interned string
+        """
+        shared = self._table.get(value)
+        if shared is not None:
+            self._table.move_to_end(value)
+            if shared is not value:
+                self.hits += 1
+                self.bytes_saved += sys.getsizeof(value)
+            return shared
+        self.misses += 1
+        self._table[value] = value
+        if len(self._table) > self.max_size:
+            self._table.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def _intern_value(self, value):
+        if isinstance(value, str):
+            return self(value)
+        elif isinstance(value, list):
+            return [self(v) if isinstance(v, str) else v for v in value]
+        elif isinstance(value, dict):  # e.g. "dcterms:isPartOf": {"id": manifest_uri}
+            for k in ("id", "@id"):
+                if isinstance(value.get(k), str):
+                    value[k] = self(value[k])
+        return value
+
+    def object_hook(self, obj: dict) -> dict:
+        """
+        json.loads object_hook, interning the values of the configured keys.
+        """
+        for k in self.keys.intersection(obj):
+            obj[k] = self._intern_value(obj[k])
+        return obj
+
+    def loads(self, s: Union[str, bytes]) -> dict:
+        """
+        Decode a JSON document, interning the values of the configured keys.
+        """
+        if isinstance(s, bytes):
+            s = s.decode("utf-8")
+        return json.loads(s, object_hook=self.object_hook)
+
+    def stats(self) -> dict:
+        """
+        :return: dict of size, hits, misses, evictions and (approximate) bytes_saved
+        """
+        return {
+            "size": len(self._table),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class Annotation:
+    """
+    Compact, read-only record for a W3C web annotation, for holding very large numbers of
+    annotations in memory, e.g. for analysis.
+
+    Only the commonly used fields are kept as attributes, with their URIs interned so that
+    repeated values share a single string:
+
+        id, target (the base level target, see identify_target), body_source (first body source
+        or id), creator, created and motivation
+
+    The full annotation is kept as compact JSON bytes, and is only decoded on demand, via
+    content.
+
+    :param raw: compact JSON bytes for the full annotation
+    """
+
+    __slots__ = ("id", "target", "body_source", "creator", "created", "motivation", "_raw")
+
+    def __init__(
+        self,
+        id: Optional[str] = None,
+        target: Optional[str] = None,
+        body_source: Optional[str] = None,
+        creator: Optional[str] = None,
+        created: Optional[str] = None,
+        motivation: Optional[str] = None,
+        raw: Optional[bytes] = None,
+    ):
+        self.id = id
+        self.target = target
+        self.body_source = body_source
+        self.creator = creator
+        self.created = created
+        self.motivation = motivation
+        self._raw = raw
+
+    @classmethod
+    def from_item(cls, item: dict, intern: Callable = sys.intern) -> "Annotation":
+        """
+        Create an Annotation from an annotation dict, e.g. an item from an Activity Streams page.
+
+        :param item: annotation
+        :param intern: function used to intern URI strings, defaults to sys.intern
+        :return: Annotation
+        """
+
+        def i(value):
+            return intern(value) if value else value
+
+        return cls(
+            id=_first_uri(item.get("id") or item.get("@id")),
+            target=i(identify_target(item)),
+            body_source=i(_first_uri(item.get("body"))),
+            creator=i(_first_uri(item.get("creator"))),
+            created=item.get("created"),
+            motivation=i(_first_uri(item.get("motivation"))),
+            raw=json.dumps(item, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+        )
+
+    @property
+    def raw(self) -> Optional[bytes]:
+        """
+        :return: compact JSON bytes for the full annotation
+        """
+        return self._raw
+
+    @property
+    def content(self) -> Optional[dict]:
+        """
+        Decode the full annotation. Not cached, so the decoded dict is only held for as long as
+        the caller holds it.
+
+        :return: annotation dict
+        """
+        if self._raw is None:
+            return None
+        return json.loads(self._raw.decode("utf-8"))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Annotation):
+            return NotImplemented
+        return self.id == other.id and self._raw == other._raw
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __repr__(self) -> str:
+        return "Annotation(id=%r, target=%r, body_source=%r)" % (
+            self.id,
+            self.target,
+            self.body_source,
+        )
+
+
 def create_anno(
     elucidate_base: str,
     annotation: dict,
     target: Optional[str] = None,
     container: Optional[str] = None,
     model: Optional[str] = "w3c",
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
 ) -> Tuple[int, Optional[str]]:
     """
     POST an annotation to Elucidate, can be optionally passed a container, if container is None
@@ -583,8 +1283,12 @@ def create_anno(
     :param annotation: annotation object
     :param container: container name (optional), will use hash of target uri if not present
     :param model: oa or w3c
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the requests, DeadlineExceeded is raised if it runs
+        out
     :return: status code from Elucidate, annotation id (or none)
     """
+    deadline = as_deadline(deadline)
     if elucidate_base:
         if annotation:
             # N.B. assumes all targets in the annotation have the same base URI
@@ -598,7 +1302,11 @@ def create_anno(
                 container = hashlib.md5(target.encode("utf-8")).hexdigest()
             elucidate = "/".join([elucidate_base, "annotation", model, ""])
             container_status = create_container(
-                container_name=container, elucidate_uri=elucidate, label=target
+                container_name=container,
+                elucidate_uri=elucidate,
+                label=target,
+                timeout=timeout,
+                deadline=deadline,
             )
             if container_status in [200, 201]:
                 anno_headers = {
@@ -612,7 +1320,14 @@ def create_anno(
                     elif model == "oa":
                         annotation["@context"] = "https://www.w3.org/ns/oa.jsonld"
                 anno_body = json.dumps(annotation, indent=4, sort_keys=True)
-                r = requests.post(post_uri, headers=anno_headers, data=anno_body)
+                r = _request(
+                    "POST",
+                    post_uri,
+                    timeout=timeout,
+                    deadline=deadline,
+                    headers=anno_headers,
+                    data=anno_body,
+                )
                 if r.status_code in [200, 201]:
                     logging.debug("POST annotation at %s", post_uri)
                     j = r.json()
@@ -631,7 +1346,14 @@ def create_anno(
         return 400, None
 
 
-def update_anno(anno_uri: str, anno_content: dict, etag: str, dry_run: bool = True) -> int:
+def update_anno(
+    anno_uri: str,
+    anno_content: dict,
+    etag: str,
+    dry_run: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+) -> int:
     """
     Update an individual annotation, requires etag.
 
@@ -641,6 +1363,9 @@ def update_anno(anno_uri: str, anno_content: dict, etag: str, dry_run: bool = Tr
     :param anno_content: the annotation content
     :param etag: ETag
     :param dry_run: if True, log and return a 200
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the request, DeadlineExceeded is raised if it runs
+        out
     :return: return PUT request status code
     """
     header_dict = {
@@ -649,7 +1374,14 @@ def update_anno(anno_uri: str, anno_content: dict, etag: str, dry_run: bool = Tr
         "Content-Type": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"',
     }
     if not dry_run:
-        r = requests.put(url=anno_uri, data=json.dumps(anno_content), headers=header_dict)
+        r = _request(
+            "PUT",
+            anno_uri,
+            timeout=timeout,
+            deadline=as_deadline(deadline),
+            data=json.dumps(anno_content),
+            headers=header_dict,
+        )
         if r.status_code == 200:
             logging.info("Update %s", anno_uri)
         else:
@@ -660,7 +1392,13 @@ def update_anno(anno_uri: str, anno_content: dict, etag: str, dry_run: bool = Tr
         return 200
 
 
-def batch_delete_target(target_uri: str, elucidate_uri: str, dry_run: bool = True) -> int:
+def batch_delete_target(
+    target_uri: str,
+    elucidate_uri: str,
+    dry_run: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+) -> int:
     """
     Use Elucidate's batch delete API to delete everything with a given target id or target source
     URI.
@@ -670,6 +1408,9 @@ def batch_delete_target(target_uri: str, elucidate_uri: str, dry_run: bool = Tru
     :param target_uri: URI to delete
     :param elucidate_uri: URI of the Elucidate server, e.g. https://elucidate.example.org
     :param dry_run: if True, do not actually delete, just log request and return a 200
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the request, DeadlineExceeded is raised if it runs
+        out
     :return: status code
     """
     header_dict = {
@@ -683,7 +1424,14 @@ def batch_delete_target(target_uri: str, elucidate_uri: str, dry_run: bool = Tru
     logging.debug(json.dumps(delete_dict, indent=4))
     uri = elucidate_uri + "/annotation/w3c/services/batch/delete"
     if not dry_run:
-        r = requests.post(uri, data=json.dumps(delete_dict), headers=header_dict)
+        r = _request(
+            "POST",
+            uri,
+            timeout=timeout,
+            deadline=as_deadline(deadline),
+            data=json.dumps(delete_dict),
+            headers=header_dict,
+        )
         logging.info("Bulk delete target: %s", target_uri)
         logging.info("Bulk delete status: %s", r.status_code)
         if r.status_code != requests.codes.ok:
@@ -693,8 +1441,85 @@ def batch_delete_target(target_uri: str, elucidate_uri: str, dry_run: bool = Tru
         return 200
 
 
+def _delete_listed(
+    list_items: Callable,
+    dryrun: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Deadline] = None,
+    dedup: str = "exact",
+    relist: bool = True,
+    journal: Optional[Journal] = None,
+    progress: Optional[Progress] = None,
+) -> list:
+    """
+    Read and delete each annotation yielded by list_items(), as it is yielded, skipping ids that
+    have already been seen.
+
+    If relist is True, and this is not a dry run, list_items() is called again after each pass
+    that found new annotations, as deleting annotations moves later results onto pages that were
+    already read.
+
+    The listings stop quietly, returning partial results, when the deadline is exceeded, so if
+    the deadline has expired at the end of a pass, the listing may have been cut short and
+    DeadlineExceeded is raised, rather than reporting the annotations found so far as all of them.
+
+    With dedup='bloom', a false positive skips an annotation that was never deleted, so if the
+    last listing still has annotations, a None status is added, and the delete is reported as
+    failed rather than complete.
+
+    :param list_items: function returning an iterable of annotations to delete
+    :param dryrun: if True, will not actually delete
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: optional Deadline, raises DeadlineExceeded if exceeded
+    :param dedup: 'exact' or 'bloom', see pyelucidate.dedup.new_id_set
+    :param relist: if True, list again until no new annotations are found
+    :param journal: optional Journal, annotations it records as deleted are skipped, and
+        deletes are recorded in it
+    :param progress: optional Progress, to count deletes in
+    :return: list of DELETE status codes
+    """
+    statuses = []
+    seen = new_id_set(dedup)
+    while True:
+        found = 0
+        remaining = 0
+        for item in list_items():
+            for annotation in item_ids(item):
+                if not seen.add(annotation):
+                    remaining += 1
+                    continue
+                if journal is not None and journal.is_deleted(annotation):
+                    continue
+                found += 1
+                content, etag = read_anno(annotation, timeout=timeout, deadline=deadline)
+                s = delete_anno(
+                    content["id"], etag, dry_run=dryrun, timeout=timeout, deadline=deadline
+                )
+                statuses.append(s)
+                logging.debug("Deleting %s status %s, dry run: %s", content["id"], s, dryrun)
+                if progress is not None:
+                    progress.add(deletes=1, failures=int(s != 204))
+                if journal is not None and not dryrun:
+                    journal.record_deleted(content["id"], s)
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded("Deadline of %ss exceeded while listing annotations" % deadline.seconds)
+        if dryrun or not relist or not found:
+            if remaining and dedup == "bloom" and relist and not dryrun:
+                logging.error("%s annotations were listed again after deleting, may not be deleted", remaining)
+                statuses.append(None)
+            return statuses
+
+
 def iterative_delete_by_target(
-    target: str, elucidate_base: str, search_method: str = "container", dryrun: bool = True
+    target: str,
+    elucidate_base: str,
+    search_method: str = "container",
+    dryrun: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    dedup: str = "exact",
+    journal: Optional[Journal] = None,
+    progress: Optional[Progress] = None,
 ) -> bool:
     """
     Delete all annotations in a container for a target URI. Works by querying for the
@@ -715,13 +1540,26 @@ def iterative_delete_by_target(
 
     N.B. choosing the container method assumes that container ID as an MD5 hash of the target URI.
 
+    Annotations are deleted as the result pages are read, with ids deduplicated in a compact
+    hashed id set (or, with dedup='bloom', an approximate Bloom filter), rather than collecting
+    every id before the first delete. As deleting annotations moves later results onto pages
+    that have already been read, the results are listed again until no new annotations are found.
+
+    If the deadline is exceeded, any in-progress work is abandoned and False is returned, as not
+    all of the annotations were deleted.
 
     :param dryrun: if True, will not actually delete, just logs and returns True (for success)
     :param search_method: 'container' (hash of target URI) or 'search' (Elucidate query by target)
     :param target: target URI
     :param elucidate_base: base URI for Elucidate, e.g. https://elucidate.example.org
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the whole operation
+    :param dedup: 'exact' or 'bloom', see pyelucidate.dedup.new_id_set
+    :param journal: optional Journal to record deleted annotations in
+    :param progress: optional Progress, to report deletes to, see pyelucidate.progress
     :return: boolean success or fail, True if no errors on _any_ request.
     """
+    deadline = as_deadline(deadline)
     statuses = []
     if search_method == "container":
         uri = gen_search_by_container_uri(elucidate_base=elucidate_base, target_uri=target)
@@ -730,18 +1568,20 @@ def iterative_delete_by_target(
     else:
         uri = None
     if uri:
-        anno_items = get_items(uri)
-        annotations = []
-        for item in anno_items:
-            annotations.extend([i for i in item_ids(item)])
-        anno_uris = list(set(annotations))
-        if anno_uris:
-            for annotation in anno_uris:
-                content, etag = read_anno(annotation)
-                s = delete_anno(content["id"], etag, dry_run=dryrun)
-                statuses.append(s)
-                logging.info("Deleting %s status %s, dry run: %s", content["id"], s, dryrun)
-        else:
+        try:
+            statuses = _delete_listed(
+                lambda: get_items(uri, timeout=timeout, deadline=deadline),
+                dryrun=dryrun,
+                timeout=timeout,
+                deadline=deadline,
+                dedup=dedup,
+                journal=journal,
+                progress=progress,
+            )
+        except DeadlineExceeded as e:
+            logging.error("%s, could not delete all annotations for target %s", e, target)
+            return False
+        if not statuses:
             logging.warning("No annotations for %s", uri)
             return True
     else:
@@ -755,8 +1595,79 @@ def iterative_delete_by_target(
         return False
 
 
+def manifest_canvas_ids(
+    manifest_uri: str,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Deadline] = None,
+    chunk_size: int = 65536,
+) -> Optional[CanvasIds]:
+    """
+    GET a IIIF Presentation 2 or 3 manifest, streaming the response, and return an iterable of
+    its canvas ids, which are yielded as the manifest is read, without parsing the whole
+    manifest. See CanvasIds.
+
+    The response is only read as the canvas ids are iterated, so if each canvas takes a while,
+    iterate read_ahead(canvases), so the connection isn't left idle.
+
+    :param manifest_uri: URI for IIIF Presentation API manifest
+    :param timeout: seconds, or (connect, read) tuple, for the request
+    :param deadline: optional Deadline
+    :param chunk_size: bytes to read at a time
+    :return: CanvasIds, or None if the manifest could not be retrieved
+    """
+    r = _request("GET", manifest_uri, timeout=timeout, deadline=deadline, stream=True)
+    if r.status_code != requests.codes.ok:
+        r.close()
+        return None
+    return CanvasIds(r.iter_content(chunk_size=chunk_size), close=r.close)
+
+
+def _check_canvases(canvases: CanvasIds, manifest_uri: str) -> bool:
+    """
+    Log an error if a manifest had no canvases list.
+
+    :return: True if the manifest had a canvases (or items) list
+    """
+    if canvases.version is not None:
+        return True
+    if canvases.has_sequences:
+        logging.error("Could not find canvases in manifest %s", manifest_uri)
+    else:
+        logging.error("Manifest %s contained no sequences or items", manifest_uri)
+    return False
+
+
+def _mark_canvas(
+    journal: Optional[Journal],
+    manifest_uri: str,
+    canvas: str,
+    status: bool,
+    dry_run: bool,
+    deadline: Optional[Deadline],
+):
+    """
+    Record a canvas (or the manifest) as processed in the journal, unless this is a dry run, or
+    the deadline has expired, as the canvas's listing and deletes may then have been cut short,
+    and it must not be skipped when the run is resumed.
+    """
+    if journal is None or dry_run:
+        return
+    if deadline is not None and deadline.expired:
+        logging.debug("Deadline exceeded, not recording %s as completed", canvas)
+        return
+    journal.mark_canvas(manifest_uri, canvas, status)
+
+
 def iiif_iterative_delete_by_manifest(
-    manifest_uri: str, elucidate_uri: str, method: str = "search", dry_run: bool = True
+    manifest_uri: str,
+    elucidate_uri: str,
+    method: str = "search",
+    dry_run: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    journal: Optional[Journal] = None,
+    resume: bool = True,
+    progress: Optional[Progress] = None,
 ) -> bool:
     """
     Provides a IIIF aware wrapper around the iterative_delete_by_target function.
@@ -764,57 +1675,98 @@ def iiif_iterative_delete_by_manifest(
     Iteratively delete all annotations for every canvas in a IIIF Presentation manifest and for the
     IIIF Presentation API manifest itself.
 
+    The manifest (Presentation 2 or 3) is streamed, so deletes start as soon as the first canvas
+    id has been read, see manifest_canvas_ids. The rest of the canvas ids are read ahead while
+    the deletes run, so the manifest's connection isn't left idle, see read_ahead.
+
     Requests annotations either by container or by target URI and iteratively deletes the
     annotations by id, one at a time, using HTTP DELETE.
 
     Does not use Elucidate's batch delete APIs.
 
+    The deadline is shared by every manifest, canvas, page and annotation request. When it is
+    exceeded, no further canvases are started and False is returned.
+
+    If a Journal is provided, completed canvases and deleted annotations are recorded in it, and
+    (if resume is True) canvases it records as completed are skipped, so a failed run can be
+    restarted without searching every canvas again.
+
     :param dry_run: if True, will not actually delete
     :param method: identify the annotations to delete via container (hash) or search (Elucidate
     query)
     :param manifest_uri: URI for IIIF Presentation API manifest.
     :param elucidate_uri: Elucidate base URI, e.g. https://elucidate.example.org
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the whole operation
+    :param journal: optional Journal for checkpointing progress
+    :param resume: if True, skip canvases the journal records as completed
+    :param progress: optional Progress, to report deletes and completed canvases to, see
+        pyelucidate.progress
     :return: boolean success or fail
     """
+    deadline = as_deadline(deadline)
     statuses = []
-    r = requests.get(manifest_uri)
-    if r.status_code == requests.codes.ok:
-        manifest = r.json()
-        if "sequences" in manifest:
-            if "canvases" in manifest["sequences"][0]:
-                canvases = manifest["sequences"][0]["canvases"]
-                canvas_ids = [c["@id"] for c in canvases]
-                for canvas in canvas_ids:
-                    statuses.append(
-                        iterative_delete_by_target(
-                            elucidate_base=elucidate_uri,
-                            target=canvas,
-                            search_method=method,
-                            dryrun=dry_run,
-                        )
-                    )
-            else:
-                logging.error("Could not find canvases in manifest %s", manifest_uri)
+    completed = journal.completed_canvases(manifest_uri) if journal and resume else set()
+    try:
+        canvases = manifest_canvas_ids(manifest_uri, timeout=timeout, deadline=deadline)
+    except DeadlineExceeded as e:
+        logging.error("%s, could not GET manifest %s", e, manifest_uri)
+        return False
+    if canvases is None:
+        logging.error("Could not GET manifest %s", manifest_uri)
+        return False
+    try:
+        for count, canvas in enumerate(read_ahead(canvases)):
+            if deadline is not None and deadline.expired:
+                logging.error(
+                    "Deadline exceeded after %s canvases in manifest %s", count, manifest_uri
+                )
                 return False
-        else:
-            logging.error("Manifest %s contained no sequences", manifest_uri)
-            return False
-        statuses.append(
-            iterative_delete_by_target(
+            if canvas in completed:
+                logging.debug("Skipping completed canvas %s", canvas)
+                continue
+            status = iterative_delete_by_target(
                 elucidate_base=elucidate_uri,
-                target=manifest["@id"],
+                target=canvas,
                 search_method=method,
                 dryrun=dry_run,
+                timeout=timeout,
+                deadline=deadline,
+                journal=journal,
+                progress=progress,
             )
-        )
-    else:
-        logging.error("Could not GET manifest %s", manifest_uri)
+            _mark_canvas(journal, manifest_uri, canvas, status, dry_run, deadline)
+            statuses.append(status)
+            if progress is not None:
+                progress.add(canvases=1)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logging.error("Could not read manifest %s: %s", manifest_uri, e)
+        return False
+    if not _check_canvases(canvases, manifest_uri):
         return False
+    manifest_id = canvases.manifest_id or manifest_uri
+    if manifest_id not in completed:
+        status = iterative_delete_by_target(
+            elucidate_base=elucidate_uri,
+            target=manifest_id,
+            search_method=method,
+            dryrun=dry_run,
+            timeout=timeout,
+            deadline=deadline,
+            journal=journal,
+            progress=progress,
+        )
+        _mark_canvas(journal, manifest_uri, manifest_id, status, dry_run, deadline)
+        statuses.append(status)
     return all(statuses)
 
 
 def iiif_batch_delete_by_manifest(
-    manifest_uri: str, elucidate_uri: str, dry_run: bool = True
+    manifest_uri: str,
+    elucidate_uri: str,
+    dry_run: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
 ) -> bool:
     """
     Provides a IIIF aware wrapper around the _batch_delete_by_target_ function. Requests a IIIF
@@ -829,37 +1781,47 @@ def iiif_batch_delete_by_manifest(
     :param manifest_uri: URI of IIIF Presentation API manifest (must be de-referenceable)
     :param elucidate_uri: base URI for Elucidate, e.g. https://elucidate.example.org
     :param dry_run: if True, will not actually delete the content
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) shared by the manifest and every delete request, when
+        it runs out no more deletes are sent and False is returned
     :return: boolean for status, True if no errors, False if error on any delete operation.
     """
+    deadline = as_deadline(deadline)
     statuses = []
-    r = requests.get(manifest_uri)
-    if r.status_code == requests.codes.ok:
-        manifest = r.json()
-        if "sequences" in manifest:
-            if "canvases" in manifest["sequences"][0]:
-                canvases = manifest["sequences"][0]["canvases"]
-                canvas_ids = [c["@id"] for c in canvases]
-                for canvas in canvas_ids:
-                    statuses.append(
-                        200
-                        == batch_delete_target(
-                            target_uri=canvas, elucidate_uri=elucidate_uri, dry_run=dry_run
-                        )
+    try:
+        canvases = manifest_canvas_ids(manifest_uri, timeout=timeout, deadline=deadline)
+        if canvases is None:
+            logging.error("Could not GET manifest %s", manifest_uri)
+            return False
+        try:
+            for canvas in read_ahead(canvases):
+                statuses.append(
+                    200
+                    == batch_delete_target(
+                        target_uri=canvas,
+                        elucidate_uri=elucidate_uri,
+                        dry_run=dry_run,
+                        timeout=timeout,
+                        deadline=deadline,
                     )
-            else:
-                logging.error("Manifest %s contained no canvases", manifest_uri)
-                return False
-        else:
-            logging.error("Manifest %s contained no sequences", manifest_uri)
+                )
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.error("Could not read manifest %s: %s", manifest_uri, e)
+            return False
+        if not _check_canvases(canvases, manifest_uri):
             return False
         statuses.append(
             200
             == batch_delete_target(
-                target_uri=manifest_uri, elucidate_uri=elucidate_uri, dry_run=dry_run
+                target_uri=manifest_uri,
+                elucidate_uri=elucidate_uri,
+                dry_run=dry_run,
+                timeout=timeout,
+                deadline=deadline,
             )
         )
-    else:
-        logging.error("Could not GET manifest %s", manifest_uri)
+    except DeadlineExceeded as e:
+        logging.error("%s, after %s deletes for manifest %s", e, len(statuses), manifest_uri)
         return False
     return all(statuses)
 
@@ -914,7 +1876,12 @@ def transform_annotation(
     :param transform_function: function to pass the annotation through
     :return:
     """
+    timer = phases()
+    started = time.perf_counter() if timer is not None else 0.0
     item_copy = deepcopy(item)
+    if timer is not None:
+        copied = time.perf_counter()
+        timer.add("copy", copied - started)
     if transform_function:
         if flatten_at_ids:  # flatten dicts with @ids to simple key / value
             for k, v in item_copy.items():
@@ -938,6 +1905,8 @@ def transform_annotation(
         item_copy = remove_keys(
             d=item_copy, keys=["generator", "label", "target", "creator", "type", "id", "body"]
         )  # remove unused keys
+        if timer is not None:
+            timer.add("transform", time.perf_counter() - copied)
         return item_copy
     else:
         return item
@@ -983,130 +1952,955 @@ def format_results(annotation_list: Optional[list], request_uri: str) -> Optiona
         return
 
 
-async def fetch_all(urls: list, connector_limit: int = 5) -> asyncio.Future:
+def filter_items(
+    items: list,
+    filter_by: Optional[dict] = None,
+    flatten_ids: Optional[bool] = None,
+    trans_function: Optional[Callable] = None,
+) -> Optional[dict]:
+    """
+    Filter, and optionally transform, the annotations from an Activity Streams page.
+
+    Will not return an annotation if it doesn't have the filter property, e.g.
+    {"creator": {"id": "https://example.org/users/foo"}}. If the value of the annotation property
+    is a simple string, e.g. "creator": "https://example.org/users/foo", the code will ignore the
+    "id" key, and check that all values match, irrespective of the key.
+
+    :param items: list of annotations
+    :param filter_by: dict of property to list of filter values,
+        e.g. {"creator": [{"id": "https://example.org/users/foo"}]}
+    :param flatten_ids: passed to transform_annotation as flatten_at_ids
+    :param trans_function: passed to transform_annotation as transform_function
+    :return: annotation
+    """
+    for item in items:
+        if filter_by:
+            for filter_key, filter_value_list in filter_by.items():
+                for filter_value in filter_value_list:
+                    if item.get(filter_key):
+                        if isinstance(item.get(filter_key), dict):
+                            if all([item[filter_key][k] == v for k, v in filter_value.items()]):
+                                yield transform_annotation(
+                                    item=item,
+                                    flatten_at_ids=flatten_ids,
+                                    transform_function=trans_function,
+                                )
+                        elif isinstance(item.get(filter_key), str):
+                            if all([item[filter_key] == v for k, v in filter_value.items()]):
+                                yield transform_annotation(
+                                    item=item,
+                                    flatten_at_ids=flatten_ids,
+                                    transform_function=trans_function,
+                                )
+        else:
+            yield transform_annotation(
+                item=item, flatten_at_ids=flatten_ids, transform_function=trans_function
+            )
+
+
+def transform_page(
+    page: bytes,
+    filter_by: Optional[dict] = None,
+    flatten_ids: Optional[bool] = None,
+    trans_function: Optional[Callable] = None,
+) -> list:
+    """
+    Decode the raw bytes for an Activity Streams page and return its filtered and transformed
+    annotations.
+
+    Module level, so it can be run in a worker process by parallel_transform_pages.
+
+    :param page: raw JSON bytes for the page
+    :param filter_by: see filter_items
+    :param flatten_ids: see filter_items
+    :param trans_function: see filter_items, must be picklable, e.g. mirador_oa
+    :return: list of annotations
+    """
+    items = json.loads(page.decode("utf-8")).get("items") or []
+    return list(
+        filter_items(
+            items, filter_by=filter_by, flatten_ids=flatten_ids, trans_function=trans_function
+        )
+    )
+
+
+def parallel_transform_pages(
+    pages: list, workers: Optional[int] = None, chunksize: int = 1, **kwargs
+) -> Optional[dict]:
+    """
+    Decode, filter and transform raw Activity Streams pages in a pool of worker processes, and
+    yield the annotations in page order.
+
+    JSON decoding and transformation (e.g. W3C to OA via transform_annotation and mirador_oa) are
+    CPU bound, so for large result sets this spreads the work across cores, rather than running
+    it all on a single core inside the generator.
+
+    :param pages: list of raw JSON bytes, one per page, e.g. from fetch_all(urls, raw=True)
+    :param workers: number of worker processes, defaults to the number of CPUs
+    :param chunksize: number of pages sent to a worker at a time
+    :param kwargs: filter_by, flatten_ids and trans_function, see filter_items
+    :return: annotation
+    """
+    worker = partial(
+        transform_page,
+        filter_by=kwargs.get("filter_by"),
+        flatten_ids=kwargs.get("flatten_ids"),
+        trans_function=kwargs.get("trans_function"),
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for items in executor.map(worker, pages, chunksize=chunksize):
+            yield from items
+
+
+async def fetch_all(
+    urls: list,
+    connector_limit: int = 5,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    raw: bool = False,
+    intern: Optional[InternTable] = None,
+    limiter: Optional[RateLimiter] = None,
+    progress: Optional[Progress] = None,
+) -> asyncio.Future:
     """
     Launch async requests for all web pages in list of urls.
 
+    If a deadline is provided, any requests still in flight when it is exceeded are cancelled,
+    and only the completed results are returned (in the same order as urls).
 
     :param urls: list of URLs to fetch
     :param connector_limit: integer for max parallel connections
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for fetching all of the urls
+    :param raw: if True, return the raw bytes for each response, rather than decoded JSON
+    :param intern: optional InternTable used to deduplicate repeated URIs as pages are decoded
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :param progress: optional Progress, to count the pages fetched (of the total) in
     :return results from requests
 
 
     """
+    deadline = as_deadline(deadline)
+    if deadline is not None and deadline.expired:
+        logging.warning("Deadline of %ss exceeded, no requests made", deadline.seconds)
+        return []
     tasks = []
     fetch.start_time = dict()  # dictionary of start times for each url
-    async with ClientSession(connector=TCPConnector(limit=connector_limit)) as session:
+    config = trace_config()  # dns and connect times, if profiling
+    async with ClientSession(
+        connector=TCPConnector(limit=connector_limit),
+        timeout=client_timeout(timeout),
+        trace_configs=[config] if config is not None else None,
+    ) as session:
         for url in urls:
-            task = asyncio.ensure_future(fetch(url, session))
+            task = asyncio.ensure_future(
+                fetch(url, session, raw=raw, intern=intern, limiter=limiter)
+            )
+            if progress is not None:
+                task.add_done_callback(lambda t: t.cancelled() or t.exception() or progress.add(pages=1))
             tasks.append(task)  # create list of tasks
-        results = await asyncio.gather(*tasks)  # gather task responses
-        return results
+        if progress is not None:
+            progress.add(pages_total=len(tasks))
+        if deadline is None or not tasks:
+            results = await asyncio.gather(*tasks)  # gather task responses
+            return results
+        done, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+        if pending:
+            logging.warning(
+                "Deadline of %ss exceeded, cancelled %s of %s requests",
+                deadline.seconds,
+                len(pending),
+                len(tasks),
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending)  # let the cancellations finish cleanly
+        return [task.result() for task in tasks if task in done]
 
 
-async def fetch(url: str, session: aiohttp.client.ClientSession) -> dict:
+async def fetch(
+    url: str,
+    session: aiohttp.client.ClientSession,
+    raw: bool = False,
+    intern: Optional[InternTable] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> dict:
     """
     Asynchronously fetch a url, using specified ClientSession.
 
-    """
-    async with session.get(url) as response:
-        resp = await response.json()
+    If raw is True, return the undecoded response bytes. If an InternTable is provided, repeated
+    URIs are deduplicated as the response is decoded.
+
+    Negotiates a compressed response, and counts the bytes in transfer_stats.
+
+    Waits for the rate limiter (or the default set by set_rate_limiter) before the request.
+    """
+    limiter = limiter or _rate_limiter
+    if limiter is not None:
+        await limiter.acquire_async(url)
+    timer = phases()
+    started = time.perf_counter() if timer is not None else 0.0
+    async with session.get(url, headers={"Accept-Encoding": ACCEPT_ENCODING}) as response:
+        body = await response.read()
+        _record_async(response, body)
+        if timer is not None:
+            received = time.perf_counter()
+            timer.add("network", received - started)
+        if raw:
+            return body
+        if intern is not None:
+            resp = await response.json(loads=intern.loads)
+        else:
+            resp = await response.json()
+        if timer is not None:
+            timer.add("decode", time.perf_counter() - received)
         return resp
 
 
-def async_items_by_topic(elucidate: str, topic: str, **kwargs) -> dict:
+def _record_async(response: aiohttp.ClientResponse, body: bytes, sent: int = 0, sent_uncompressed: int = 0):
     """
-    Asynchronously yield annotations from a query by topic to Elucidate.
-
-    Does an asynchronous get for all the annotations, and then yields the annotations with
-    optional transformation provided by the "trans_function" arg.
-
-    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
-    :param topic: URI from body source, e.g. 'https://topics.example.org/people/mary+jones'
-    :return: annotation object
+    Count an async response in transfer_stats, using Content-Length for the bytes on the wire,
+    where the server sent it.
     """
-    t = quote_plus(topic)
-    sample_uri = elucidate + "/annotation/w3c/services/search/body?fields=source,id&value=" + t
-    r = requests.get(sample_uri)
-    if r.status_code == requests.codes.ok:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        future = asyncio.ensure_future(
-            fetch_all([p for p in annotation_pages(r.json())])
-        )  # tasks to do
-        pages = loop.run_until_complete(future)  # loop until done
-        for page in pages:
-            for item in page["items"]:
-                yield transform_annotation(
-                    item=item,
-                    flatten_at_ids=kwargs.get("flatten_ids"),
-                    transform_function=kwargs.get("trans_function"),
-                )
+    try:
+        received = int(response.headers.get("Content-Length", len(body)))
+    except ValueError:
+        received = len(body)
+    transfer_stats.record(sent, sent_uncompressed, received, len(body))
 
 
-def async_items_by_target(elucidate: str, target_uri: str, **kwargs) -> dict:
+async def _async_request(
+    method: str,
+    url: str,
+    session: Optional[aiohttp.client.ClientSession] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+    **kwargs
+) -> Tuple[int, dict, bytes]:
+    """
+    Make a single async HTTP request, using the session if provided (so that the connection is
+    pooled with the caller's other requests), otherwise a new session just for this request,
+    subject to the rate limiter (or the default set by set_rate_limiter), with compression and
+    transfer_stats as for _request.
+
+    :return: status code, headers, and body bytes
+    """
+    limiter = limiter or _rate_limiter
+    if limiter is not None:
+        await limiter.acquire_async(url, method)
+    sent, sent_uncompressed = _prepare_request(method, kwargs)
+
+    async def send(s: aiohttp.client.ClientSession) -> Tuple[int, dict, bytes]:
+        timer = phases()
+        started = time.perf_counter() if timer is not None else 0.0
+        async with s.request(method, url, **kwargs) as response:
+            body = await response.read()
+            _record_async(response, body, sent, sent_uncompressed)
+            if timer is not None:
+                timer.add("network", time.perf_counter() - started)
+            return response.status, response.headers, body
+
+    if session is None:
+        async with ClientSession(timeout=client_timeout(timeout)) as new_session:
+            return await send(new_session)
+    if timeout is not None:
+        kwargs["timeout"] = client_timeout(timeout)
+    return await send(session)
+
+
+async def async_read_anno(
+    anno_uri: str,
+    session: Optional[aiohttp.client.ClientSession] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> (Optional[str], Optional[str]):
+    """
+    Async version of read_anno.
+
+    :param anno_uri: URI for annotation
+    :param session: optional ClientSession to share
+    :param timeout: seconds, or (connect, read) tuple, for the request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: annotation content, etag
     """
-    Asynchronously yield annotations from a query by topic to Elucidate.
+    status, headers, body = await _async_request(
+        "GET", anno_uri, session=session, timeout=timeout, limiter=limiter
+    )
+    if status == requests.codes.ok:
+        etag = headers["ETag"].replace('W/"', "").replace('"', "")
+        return json.loads(body.decode("utf-8")), etag
+    else:
+        return None, None
 
-    Async requests all of the annotation pages before yielding.
 
-    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
-    :param target_uri: URI from target source and id, e.g. 'https://manifest.example.org/manifest/1'
-    :return: annotation object
+async def async_delete_anno(
+    anno_uri: str,
+    etag: str,
+    dry_run: bool = True,
+    session: Optional[aiohttp.client.ClientSession] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> int:
     """
-    t = quote_plus(target_uri)
-    sample_uri = elucidate + "/annotation/w3c/services/search/target?fields=source,id&value=" + t
-    r = requests.get(sample_uri)
-    filter_by = kwargs.get("filter_by")
-    if r.status_code == requests.codes.ok:
+    Async version of delete_anno.
+
+    :param anno_uri: URI for annotation
+    :param etag: ETag
+    :param dry_run: if True, log and return a 204
+    :param session: optional ClientSession to share
+    :param timeout: seconds, or (connect, read) tuple, for the request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: return DELETE request status code
+    """
+    header_dict = {
+        "If-Match": etag,
+        "Accept": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"',
+        "Content-Type": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"',
+    }
+    if not dry_run:
+        status, _, _ = await _async_request(
+            "DELETE", anno_uri, session=session, timeout=timeout, limiter=limiter, headers=header_dict
+        )
+        if status == 204:
+            logging.debug("Deleted %s", anno_uri)
+        else:
+            logging.error("Failed to delete %s server returned %s", anno_uri, status)
+        return status
+    else:  # log and return a 204
+        logging.debug("Dry run")
+        return 204
+
+
+async def async_update_anno(
+    anno_uri: str,
+    anno_content: dict,
+    etag: str,
+    dry_run: bool = True,
+    session: Optional[aiohttp.client.ClientSession] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> int:
+    """
+    Async version of update_anno.
+
+    :param anno_uri: URI for annotation
+    :param anno_content: the annotation content
+    :param etag: ETag
+    :param dry_run: if True, log and return a 200
+    :param session: optional ClientSession to share
+    :param timeout: seconds, or (connect, read) tuple, for the request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: return PUT request status code
+    """
+    header_dict = {
+        "If-Match": etag,
+        "Accept": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"',
+        "Content-Type": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"',
+    }
+    if not dry_run:
+        status, _, _ = await _async_request(
+            "PUT",
+            anno_uri,
+            session=session,
+            timeout=timeout,
+            limiter=limiter,
+            data=json.dumps(anno_content),
+            headers=header_dict,
+        )
+        if status == 200:
+            logging.info("Update %s", anno_uri)
+        else:
+            logging.error("Failed to update %s server returned %s", anno_uri, status)
+        return status
+    else:  # log and return a 200
+        logging.debug("Dry run")
+        return 200
+
+
+async def async_create_container(
+    container_name: str,
+    label: str,
+    elucidate_uri: str,
+    session: Optional[aiohttp.client.ClientSession] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> int:
+    """
+    Async version of create_container.
+
+    :param container_name: name of the container
+    :param label:  label for the container
+    :param elucidate_uri:  uri for the annotation server, including full path, e.g.
+        https://elucidate.example.org/annotation/w3c/
+    :param session: optional ClientSession to share
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: POST request status code
+    """
+    container_headers = {
+        "Slug": container_name,
+        "Content-Type": "application/ld+json",
+        "Accept": 'application/ld+json;profile="http://www.w3.org/ns/anno.jsonld"',
+    }
+    container_dict = {
+        "@context": "http://www.w3.org/ns/anno.jsonld",
+        "type": "AnnotationCollection",
+        "label": label,
+    }
+    container_uri = elucidate_uri + container_name + "/"
+    status, _, _ = await _async_request(
+        "GET", container_uri, session=session, timeout=timeout, limiter=limiter
+    )
+    if status == 200:
+        logging.debug("Container already exists at: %s", container_uri)
+        return status
+    status, _, _ = await _async_request(
+        "POST",
+        elucidate_uri,
+        session=session,
+        timeout=timeout,
+        limiter=limiter,
+        headers=container_headers,
+        data=json.dumps(container_dict),
+    )
+    if status in [200, 201]:
+        logging.debug("Container created at: %s", container_uri)
+    else:
+        logging.error("Could not create container at: %s reason: %s", container_uri, status)
+    return status
+
+
+async def async_create_anno(
+    elucidate_base: str,
+    annotation: dict,
+    target: Optional[str] = None,
+    container: Optional[str] = None,
+    model: Optional[str] = "w3c",
+    session: Optional[aiohttp.client.ClientSession] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Tuple[int, Optional[str]]:
+    """
+    Async version of create_anno.
+
+    :param elucidate_base: base URI for the annotation server, e.g. https://elucidate.example.org
+    :param target: target for the annotation (optional), will attempt to parse anno for target
+            if not present
+    :param annotation: annotation object
+    :param container: container name (optional), will use hash of target uri if not present
+    :param model: oa or w3c
+    :param session: optional ClientSession to share
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: status code from Elucidate, annotation id (or none)
+    """
+    if not elucidate_base:
+        logging.error("No Elucidate URI was provided")
+        return 400, None
+    if not annotation:
+        logging.error("No annotation body was provided")
+        return 400, None
+    if not container:
+        if not target:
+            target = identify_target(annotation)
+            if not target:
+                logging.error("Could not identify a target to hash for the container")
+                return 400, None
+        container = hashlib.md5(target.encode("utf-8")).hexdigest()
+    elucidate = "/".join([elucidate_base, "annotation", model, ""])
+    container_status = await async_create_container(
+        container_name=container,
+        elucidate_uri=elucidate,
+        label=target,
+        session=session,
+        timeout=timeout,
+        limiter=limiter,
+    )
+    if container_status not in [200, 201]:
+        logging.error("No annotation container found")
+        return 404, None
+    anno_headers = {
+        "Content-Type": "application/ld+json",
+        "Accept": 'application/ld+json;profile="http://www.w3.org/ns/anno.jsonld"',
+    }
+    post_uri = "/".join([elucidate_base, "annotation", model, container, ""])
+    if not hasattr(annotation, "@context"):
+        if model == "w3c":
+            annotation["@context"] = "http://www.w3.org/ns/anno.jsonld"
+        elif model == "oa":
+            annotation["@context"] = "https://www.w3.org/ns/oa.jsonld"
+    status, _, body = await _async_request(
+        "POST",
+        post_uri,
+        session=session,
+        timeout=timeout,
+        limiter=limiter,
+        headers=anno_headers,
+        data=json.dumps(annotation, indent=4, sort_keys=True),
+    )
+    if status in [200, 201]:
+        logging.debug("POST annotation at %s", post_uri)
+        return status, json.loads(body.decode("utf-8")).get("id")
+    logging.error("Could not POST annotation at %s", post_uri)
+    return status, None
+
+
+async def async_batch_update_body(
+    new_topic_id: str,
+    old_topic_ids: list,
+    elucidate_base: str,
+    dry_run: bool = True,
+    session: Optional[aiohttp.client.ClientSession] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Tuple[int, str]:
+    """
+    Async version of batch_update_body.
+
+    :param new_topic_id: topic ids to use, string
+    :param old_topic_ids: topic ids to replace, list
+    :param elucidate_base: elucidate base URI, e.g. https://elucidate.example.org
+    :param dry_run: if True, will simply log JSON and URI and then return a 200
+    :param session: optional ClientSession to share
+    :param timeout: seconds, or (connect, read) tuple, for the request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: tuple - http POST status code, JSON POSTed (as string)
+    """
+    post_data = _batch_update_data(new_topic_id, old_topic_ids)
+    post_uri = elucidate_base + "/annotation/w3c/services/batch/update"
+    logging.debug("Posting %s to %s", post_data, post_uri)
+    if not dry_run:
+        status, _, body = await _async_request(
+            "POST",
+            post_uri,
+            session=session,
+            timeout=timeout,
+            limiter=limiter,
+            data=post_data,
+            headers={
+                "Content-type": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"'
+            },
+        )
+        if status != requests.codes.OK:
+            logging.error("%s returned %s", post_uri, body)
+        return status, post_data
+    else:
+        logging.debug("Dry run.")
+        return 200, post_data
+
+
+async def async_batch_delete_topic(
+    topic_id: str,
+    elucidate_base: str,
+    dry_run: bool = True,
+    session: Optional[aiohttp.client.ClientSession] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Tuple[int, str]:
+    """
+    Async version of batch_delete_topic.
+
+    :param topic_id: topic id to delete
+    :param elucidate_base: elucidate base URI, e.g. https://elucidate.example.org
+    :param dry_run: if True, will simply log and then return a 200
+    :param session: optional ClientSession to share
+    :param timeout: seconds, or (connect, read) tuple, for the request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: tuple - http POST status code, JSON POSTed (as string)
+    """
+    post_uri = elucidate_base + "/annotation/w3c/services/batch/delete"
+    post_data = json.dumps(
+        {
+            "@context": "http://www.w3.org/ns/anno.jsonld",
+            "body": {"id": topic_id, "source": {"id": topic_id}},
+        }
+    )
+    logging.debug("Posting %s to %s", post_data, post_uri)
+    if not dry_run:
+        status, _, body = await _async_request(
+            "POST",
+            post_uri,
+            session=session,
+            timeout=timeout,
+            limiter=limiter,
+            data=post_data,
+            headers={
+                "Content-type": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"'
+            },
+        )
+        if status != requests.codes.OK:
+            logging.error("%s returned %s", post_uri, body)
+        return status, post_data
+    else:
+        logging.debug("Dry run.")
+        return 200, post_data
+
+
+async def async_batch_delete_target(
+    target_uri: str,
+    elucidate_uri: str,
+    dry_run: bool = True,
+    session: Optional[aiohttp.client.ClientSession] = None,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> int:
+    """
+    Async version of batch_delete_target.
+
+    :param target_uri: URI to delete
+    :param elucidate_uri: URI of the Elucidate server, e.g. https://elucidate.example.org
+    :param dry_run: if True, do not actually delete, just log request and return a 200
+    :param session: optional ClientSession to share
+    :param timeout: seconds, or (connect, read) tuple, for the request
+    :param limiter: optional RateLimiter, defaults to the one set by set_rate_limiter
+    :return: status code
+    """
+    header_dict = {
+        "Accept": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"',
+        "Content-Type": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"',
+    }
+    delete_dict = {
+        "@context": "http://www.w3.org/ns/anno.jsonld",
+        "target": {"id": target_uri, "source": {"id": target_uri}},
+    }
+    logging.debug(json.dumps(delete_dict, indent=4))
+    uri = elucidate_uri + "/annotation/w3c/services/batch/delete"
+    if not dry_run:
+        status, _, body = await _async_request(
+            "POST",
+            uri,
+            session=session,
+            timeout=timeout,
+            limiter=limiter,
+            data=json.dumps(delete_dict),
+            headers=header_dict,
+        )
+        logging.info("Bulk delete target: %s", target_uri)
+        logging.info("Bulk delete status: %s", status)
+        if status != requests.codes.ok:
+            logging.warning(body)
+        return status
+    else:
+        return 200
+
+
+def _async_page_items(result: dict, **kwargs) -> Optional[dict]:
+    """
+    Asynchronously fetch every page of an Activity Streams paged result set, and yield the
+    filtered and transformed annotations, in page order.
+
+    If a "workers" kwarg is provided, the raw pages are decoded and transformed in a pool of
+    worker processes (see parallel_transform_pages).
+
+    If an "as_records" kwarg is True, yield compact Annotation records rather than dicts.
+
+    If a "progress" kwarg is provided, pages fetched (of the total) and items yielded are counted
+    in it, see pyelucidate.progress.
+
+    If a "max_buffer_pages" or "max_buffer_bytes" kwarg is provided, the pages are streamed
+    through a bounded buffer, rather than all fetched before the first item is yielded, so
+    fetching pauses when the consumer falls behind, see _buffered_page_items.
+
+    If an "ordered" kwarg is False, the pages are streamed, as above, and each page's items are
+    yielded as soon as it arrives, rather than in page order.
+
+    :param result: first page of the result set, as returned by Elucidate
+    :param kwargs: timeout, deadline, filter_by, flatten_ids, trans_function, workers, chunksize,
+        as_records, intern, limiter, connector_limit, progress, max_buffer_pages,
+        max_buffer_bytes, ordered
+    :return: annotation
+    """
+    if kwargs.get("as_records"):
+        intern = kwargs.get("intern")
+        for item in _async_page_items(result, **dict(kwargs, as_records=False)):
+            yield Annotation.from_item(item, intern=intern if intern is not None else sys.intern)
+        return
+    urls = [p for p in annotation_pages(result)]
+    if kwargs.get("max_buffer_pages") or kwargs.get("max_buffer_bytes") or kwargs.get("ordered") is False:
+        items = _buffered_page_items(urls, **kwargs)
+    else:
+        workers = kwargs.get("workers")
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         future = asyncio.ensure_future(
-            fetch_all([p for p in annotation_pages(r.json())])
+            fetch_all(
+                urls,
+                connector_limit=kwargs.get("connector_limit") or 5,
+                timeout=kwargs.get("timeout"),
+                deadline=kwargs.get("deadline"),
+                raw=bool(workers),
+                intern=kwargs.get("intern"),
+                limiter=kwargs.get("limiter"),
+                progress=kwargs.get("progress"),
+            )
         )  # tasks to do
         pages = loop.run_until_complete(future)  # loop until done
-        for page in pages:
-            if page.get("items"):
-                for item in page["items"]:
-                    # will not return if the annotation doesn't have the
-                    # filter property, e.g. {"creator": ["id": "https://example.org/users/foo"]}
-                    # if the value of they is a simple string, e.g. if the annotation has
-                    # "creator" : ""https://example.org/users/foo"
-                    # the code will ignore the "id" key, and check that all values match,
-                    # irresepctive of
-                    # the key.
-                    if filter_by:
-                        for filter_key, filter_value_list in filter_by.items():
-                            for filter_value in filter_value_list:
-                                if item.get(filter_key):
-                                    if isinstance(item.get(filter_key), dict):
-                                        if all(
-                                            [
-                                                item[filter_key][k] == v
-                                                for k, v in filter_value.items()
-                                            ]
-                                        ):
-                                            yield transform_annotation(
-                                                item=item,
-                                                flatten_at_ids=kwargs.get("flatten_ids"),
-                                                transform_function=kwargs.get("trans_function"),
-                                            )
-                                    elif isinstance(item.get(filter_key), str):
-                                        if all(
-                                            [item[filter_key] == v for k, v in filter_value.items()]
-                                        ):
-                                            yield transform_annotation(
-                                                item=item,
-                                                flatten_at_ids=kwargs.get("flatten_ids"),
-                                                transform_function=kwargs.get("trans_function"),
-                                            )
+        items = _async_page_items_of(pages, **kwargs)
+    progress = kwargs.get("progress")
+    if progress is not None:
+        for item in items:
+            progress.add(items=1)
+            yield item
+    else:
+        yield from items
+
+
+async def _fetch_into(buffer: PageBuffer, urls: list, **kwargs):
+    """
+    Fetch the urls into the buffer, with up to connector_limit requests in flight, waiting for
+    room in the buffer before starting each request.
+
+    Pages are put in page order, or if the "ordered" kwarg is False, as each request completes,
+    so that a slow page doesn't hold up the pages after it.
 
+    :param buffer: PageBuffer
+    :param urls: page URLs
+    :param kwargs: ordered, connector_limit, timeout, deadline, limiter, progress
+    """
+    ordered = kwargs.get("ordered", True)
+    deadline = as_deadline(kwargs.get("deadline"))
+    progress = kwargs.get("progress")
+    if progress is not None:
+        progress.add(pages_total=len(urls))
+    config = trace_config()  # dns and connect times, if profiling
+    async with ClientSession(
+        connector=TCPConnector(limit=kwargs.get("connector_limit") or 5),
+        timeout=client_timeout(kwargs.get("timeout")),
+        trace_configs=[config] if config is not None else None,
+    ) as session:
+        launched = []
+        arrived = asyncio.Queue()  # fetch tasks, in page order, or as they complete, then None
+
+        async def launch():
+            try:
+                for url in urls:
+                    if deadline is not None and deadline.expired:
+                        break
+                    if not await buffer.reserve():
+                        break  # closed by the consumer
+                    task = asyncio.ensure_future(fetch(url, session, raw=True, limiter=kwargs.get("limiter")))
+                    launched.append(task)
+                    if ordered:
+                        arrived.put_nowait(task)
                     else:
-                        yield transform_annotation(
-                            item=item,
-                            flatten_at_ids=kwargs.get("flatten_ids"),
-                            transform_function=kwargs.get("trans_function"),
-                        )
+                        task.add_done_callback(arrived.put_nowait)
+            finally:
+                arrived.put_nowait(None)
+
+        launcher = asyncio.ensure_future(launch())
+        try:
+            received = 0
+            launching = True
+            while launching or received < len(launched):
+                try:
+                    task = await asyncio.wait_for(arrived.get(), deadline.remaining() if deadline else None)
+                    if task is None:
+                        launching = False
+                        continue
+                    done, _ = await asyncio.wait([task], timeout=deadline.remaining() if deadline else None)
+                except asyncio.TimeoutError:
+                    done = None
+                if not done:
+                    logging.warning("Deadline of %ss exceeded, stopped fetching pages", deadline.seconds)
+                    break
+                received += 1
+                if not buffer.put(task.result()):
+                    break  # closed by the consumer
+                if progress is not None:
+                    progress.add(pages=1)
+        finally:
+            launcher.cancel()
+            for task in launched:
+                task.cancel()
+            await asyncio.gather(launcher, *launched, return_exceptions=True)
+
+
+def _buffered_page_items(urls: list, **kwargs) -> Optional[dict]:
+    """
+    Fetch pages in an event loop in a background thread, through a PageBuffer, and yield their
+    filtered and transformed annotations, in page order (or, if ordered is False, in the order
+    the pages arrive), as each page arrives.
+
+    Fetching pauses while max_buffer_pages pages are held (in flight, queued or being consumed)
+    or while the pages held total an estimated max_buffer_bytes (queued pages count their JSON,
+    the page being consumed its decoded size, and pages in flight the average page size, see
+    PageBuffer), so memory is bounded by the buffer, rather than the size of the result set,
+    however slow the consumer is. Only one page at a time is decoded.
+
+    If the consumer stops early, the requests in flight are cancelled.
+
+    If the deadline is exceeded, the pages fetched in time are yielded. If a request fails, the
+    error is raised once the pages before it have been yielded.
+
+    :param urls: page URLs
+    :param kwargs: max_buffer_pages (defaults to twice connector_limit), max_buffer_bytes,
+        ordered, and as for _async_page_items, except workers, which is ignored
+    :return: annotation
+    """
+    buffer = PageBuffer(
+        kwargs.get("max_buffer_pages") or 2 * (kwargs.get("connector_limit") or 5),
+        kwargs.get("max_buffer_bytes"),
+    )
+    intern = kwargs.get("intern")
+
+    def produce():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        error = None
+        try:
+            task = asyncio.ensure_future(_fetch_into(buffer, urls, **kwargs))
+            buffer.set_fetcher(loop, task)
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass  # closed by the consumer
+        except Exception as e:
+            error = e
+        finally:
+            buffer.finish(error)
+            loop.close()
+
+    thread = threading.Thread(target=produce, name="pyelucidate-fetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            raw = buffer.get()
+            if raw is None:
+                break
+            timer = phases()
+            started = time.perf_counter() if timer is not None else 0.0
+            page = intern.loads(raw) if intern is not None else json.loads(raw.decode("utf-8"))
+            if timer is not None:
+                timer.add("decode", time.perf_counter() - started)
+            yield from filter_items(
+                page.get("items") or [],
+                filter_by=kwargs.get("filter_by"),
+                flatten_ids=kwargs.get("flatten_ids"),
+                trans_function=kwargs.get("trans_function"),
+            )
+            del page
+            buffer.release(raw)
+    finally:
+        buffer.close()
+        thread.join()
+        logging.debug(
+            "Page buffer peak %s pages, %s bytes, fetching paused %s times",
+            buffer.peak_pages,
+            buffer.peak_bytes,
+            buffer.waits,
+        )
+
+
+def _async_page_items_of(pages: list, **kwargs) -> Optional[dict]:
+    """
+    Yield the filtered and transformed annotations from fetched pages, see _async_page_items.
+    """
+    workers = kwargs.get("workers")
+    if workers:
+        yield from parallel_transform_pages(
+            pages,
+            workers=workers,
+            chunksize=kwargs.get("chunksize", 1),
+            filter_by=kwargs.get("filter_by"),
+            flatten_ids=kwargs.get("flatten_ids"),
+            trans_function=kwargs.get("trans_function"),
+        )
+    else:
+        for page in pages:
+            yield from filter_items(
+                page.get("items") or [],
+                filter_by=kwargs.get("filter_by"),
+                flatten_ids=kwargs.get("flatten_ids"),
+                trans_function=kwargs.get("trans_function"),
+            )
+
+
+def async_items_by_topic(elucidate: str, topic: str, **kwargs) -> dict:
+    """
+    Asynchronously yield annotations from a query by topic to Elucidate.
+
+    Does an asynchronous get for all the annotations, and then yields the annotations with
+    optional transformation provided by the "trans_function" arg.
+
+    Accepts optional timeout (seconds, or (connect, read) tuple) and deadline (Deadline, or
+    seconds) keyword args. If the deadline is exceeded, only the pages fetched in time are yielded.
+
+    Pass workers (and optionally chunksize) to decode and transform the pages in a pool of worker
+    processes, see parallel_transform_pages.
+
+    Pass as_records=True to yield compact Annotation records rather than dicts, an InternTable as
+    intern to deduplicate repeated URIs as pages are decoded, and a RateLimiter as limiter to
+    override the default set by set_rate_limiter. Pass a Progress as progress to report pages
+    fetched and items yielded, see pyelucidate.progress.
+
+    Pass max_buffer_pages and/or max_buffer_bytes to stream the pages through a bounded buffer,
+    so that fetching pauses when the consumer falls behind, see _buffered_page_items. Pass
+    ordered=False to yield each page's annotations as soon as it arrives, rather than in page
+    order, so a slow page doesn't hold up the rest.
+
+    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+    :param topic: URI from body source, e.g. 'https://topics.example.org/people/mary+jones'
+    :return: annotation object
+    """
+    t = quote_plus(topic)
+    sample_uri = elucidate + "/annotation/w3c/services/search/body?fields=source,id&value=" + t
+    deadline = as_deadline(kwargs.get("deadline"))
+    try:
+        r = _request(
+            "GET",
+            sample_uri,
+            timeout=kwargs.get("timeout"),
+            deadline=deadline,
+            limiter=kwargs.get("limiter"),
+        )
+    except DeadlineExceeded as e:
+        logging.warning("%s, no results for %s", e, sample_uri)
+        return
+    if r.status_code == requests.codes.ok:
+        yield from _async_page_items(r.json(), **dict(kwargs, deadline=deadline))
+
+
+def async_items_by_target(elucidate: str, target_uri: str, **kwargs) -> dict:
+    """
+    Asynchronously yield annotations from a query by topic to Elucidate.
+
+    Async requests all of the annotation pages before yielding.
+
+    Accepts optional timeout (seconds, or (connect, read) tuple) and deadline (Deadline, or
+    seconds) keyword args. If the deadline is exceeded, only the pages fetched in time are yielded.
+
+    Pass workers (and optionally chunksize) to decode and transform the pages in a pool of worker
+    processes, see parallel_transform_pages.
+
+    Pass as_records=True to yield compact Annotation records rather than dicts, an InternTable as
+    intern to deduplicate repeated URIs as pages are decoded, and a RateLimiter as limiter to
+    override the default set by set_rate_limiter. Pass a Progress as progress to report pages
+    fetched and items yielded, see pyelucidate.progress.
+
+    Pass max_buffer_pages and/or max_buffer_bytes to stream the pages through a bounded buffer,
+    so that fetching pauses when the consumer falls behind, see _buffered_page_items. Pass
+    ordered=False to yield each page's annotations as soon as it arrives, rather than in page
+    order, so a slow page doesn't hold up the rest.
+
+    :param elucidate: Elucidate server, e.g. https://elucidate.example.org
+    :param target_uri: URI from target source and id, e.g. 'https://manifest.example.org/manifest/1'
+    :return: annotation object
+    """
+    t = quote_plus(target_uri)
+    sample_uri = elucidate + "/annotation/w3c/services/search/target?fields=source,id&value=" + t
+    deadline = as_deadline(kwargs.get("deadline"))
+    try:
+        r = _request(
+            "GET",
+            sample_uri,
+            timeout=kwargs.get("timeout"),
+            deadline=deadline,
+            limiter=kwargs.get("limiter"),
+        )
+    except DeadlineExceeded as e:
+        logging.warning("%s, no results for %s", e, sample_uri)
+        return
+    if r.status_code == requests.codes.ok:
+        yield from _async_page_items(r.json(), **dict(kwargs, deadline=deadline))
 
 
 def async_items_by_container(
@@ -1121,6 +2915,22 @@ def async_items_by_container(
 
     Container can be hashed from target URI, or provided
 
+    Accepts optional timeout (seconds, or (connect, read) tuple) and deadline (Deadline, or
+    seconds) keyword args. If the deadline is exceeded, only the pages fetched in time are yielded.
+
+    Pass workers (and optionally chunksize) to decode and transform the pages in a pool of worker
+    processes, see parallel_transform_pages.
+
+    Pass as_records=True to yield compact Annotation records rather than dicts, an InternTable as
+    intern to deduplicate repeated URIs as pages are decoded, and a RateLimiter as limiter to
+    override the default set by set_rate_limiter. Pass a Progress as progress to report pages
+    fetched and items yielded, see pyelucidate.progress.
+
+    Pass max_buffer_pages and/or max_buffer_bytes to stream the pages through a bounded buffer,
+    so that fetching pauses when the consumer falls behind, see _buffered_page_items. Pass
+    ordered=False to yield each page's annotations as soon as it arrives, rather than in page
+    order, so a slow page doesn't hold up the rest.
+
     :param elucidate: Elucidate server, e.g. https://elucidate.example.org
     :param target_uri: URI from target source and id, e.g. 'https://manifest.example.org/manifest/1'
     :param container: container path
@@ -1133,53 +2943,21 @@ def async_items_by_container(
         if not container.endswith("/"):
             container += "/"
         sample_uri = elucidate + "/annotation/w3c/" + container
-        r = requests.get(sample_uri, headers=header_dict)
-        filter_by = kwargs.get("filter_by")
+        deadline = as_deadline(kwargs.get("deadline"))
+        try:
+            r = _request(
+                "GET",
+                sample_uri,
+                timeout=kwargs.get("timeout"),
+                deadline=deadline,
+                limiter=kwargs.get("limiter"),
+                headers=header_dict,
+            )
+        except DeadlineExceeded as e:
+            logging.warning("%s, no results for %s", e, sample_uri)
+            return
         if r.status_code == requests.codes.ok:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            future = asyncio.ensure_future(
-                fetch_all([p for p in annotation_pages(r.json())])
-            )  # tasks to do
-            pages = loop.run_until_complete(future)  # loop until done
-            for page in pages:
-                if page.get("items"):
-                    for item in page["items"]:
-                        if filter_by:
-                            for filter_key, filter_value_list in filter_by.items():
-                                for filter_value in filter_value_list:
-                                    if item.get(filter_key):
-                                        if isinstance(item.get(filter_key), dict):
-                                            if all(
-                                                [
-                                                    item[filter_key][k] == v
-                                                    for k, v in filter_value.items()
-                                                ]
-                                            ):
-                                                yield transform_annotation(
-                                                    item=item,
-                                                    flatten_at_ids=kwargs.get("flatten_ids"),
-                                                    transform_function=kwargs.get("trans_function"),
-                                                )
-                                        elif isinstance(item.get(filter_key), str):
-                                            if all(
-                                                [
-                                                    item[filter_key] == v
-                                                    for k, v in filter_value.items()
-                                                ]
-                                            ):
-                                                yield transform_annotation(
-                                                    item=item,
-                                                    flatten_at_ids=kwargs.get("flatten_ids"),
-                                                    transform_function=kwargs.get("trans_function"),
-                                                )
-
-                        else:
-                            yield transform_annotation(
-                                item=item,
-                                flatten_at_ids=kwargs.get("flatten_ids"),
-                                transform_function=kwargs.get("trans_function"),
-                            )
+            yield from _async_page_items(r.json(), **dict(kwargs, deadline=deadline))
     else:
         return
 
@@ -1196,13 +2974,185 @@ def async_manifests_by_topic(elucidate: str, topic: Optional[str] = None) -> Opt
     :return: manifest URI
     """
     if topic:
-        return list(
-            set([parent_from_annotation(anno) for anno in async_items_by_topic(elucidate, topic)])
-        )
+        return list({parent_from_annotation(anno) for anno in async_items_by_topic(elucidate, topic)})
+
+
+def _count_manifests(counts: Counter, items: list):
+    """
+    Count the parent (manifest) of each annotation, skipping annotations without one, or whose
+    target can't be parsed.
+    """
+    for item in items:
+        try:
+            parent = parent_from_annotation(item)
+        except (KeyError, TypeError, IndexError) as e:
+            logging.debug("No parent for annotation %s: %s", item.get("id") if isinstance(item, dict) else item, e)
+            continue
+        if parent:
+            counts[parent] += 1
+
+
+async def _topic_manifests(
+    elucidate: str,
+    topic: str,
+    session: aiohttp.client.ClientSession,
+    limiter: Optional[RateLimiter] = None,
+    progress: Optional[Progress] = None,
+    page_limit: int = 5,
+) -> Optional[Counter]:
+    """
+    Count the annotations on each parent (manifest) for a topic, fetching up to page_limit pages
+    of the topic search at a time over the session, and counting each page as it arrives, then
+    dropping it, so that only the counts, and the pages in flight, are held.
+
+    :return: Counter of manifest URI to number of annotations, None on error
+    """
+    sample_uri = elucidate + "/annotation/w3c/services/search/body?fields=source,id&value=" + quote_plus(topic)
+    counts = Counter()
+    running = set()
+
+    def count(done: set):
+        for task in done:
+            items = task.result().get("items", [])
+            _count_manifests(counts, items)
+            if progress is not None:
+                progress.add(pages=1, items=len(items))
+
+    try:
+        status, _, body = await _async_request("GET", sample_uri, session=session, limiter=limiter)
+        if status != requests.codes.ok:
+            logging.warning("%s returned %s", sample_uri, status)
+            return None
+        urls = list(annotation_pages(json.loads(body)))
+        if progress is not None:
+            progress.add(pages_total=len(urls))
+        try:
+            for url in urls:
+                running.add(asyncio.ensure_future(fetch(url, session, limiter=limiter)))
+                if len(running) >= page_limit:
+                    done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    count(done)
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                count(done)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.wait(running)  # let the cancellations finish cleanly
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError) as e:
+        logging.warning("Could not fetch manifests for %s: %s", topic, e)
+        return None
+    return counts
+
+
+async def _manifests_by_topics(elucidate: str, topics: Iterable, **kwargs):
+    """
+    Async generator of (topic, Counter of manifests) for each topic, as each completes, with up to
+    topic_limit topics in flight, over one pooled session. See async_manifests_by_topics.
+    """
+    connector_limit = kwargs.get("connector_limit") or 10
+    topic_limit = kwargs.get("topic_limit") or connector_limit
+    deadline = as_deadline(kwargs.get("deadline"))
+    topics = iter(topics)
+    running = {}  # task: topic
+    async with ClientSession(
+        connector=TCPConnector(limit=connector_limit), timeout=client_timeout(kwargs.get("timeout"))
+    ) as session:
+        try:
+            while True:
+                for topic in topics:
+                    if topic:
+                        task = asyncio.ensure_future(
+                            _topic_manifests(
+                                elucidate,
+                                topic,
+                                session,
+                                limiter=kwargs.get("limiter"),
+                                progress=kwargs.get("progress"),
+                                page_limit=kwargs.get("page_limit") or 5,
+                            )
+                        )
+                        running[task] = topic
+                    if len(running) >= topic_limit:
+                        break
+                if not running:
+                    return
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=deadline.remaining() if deadline is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    logging.warning(
+                        "Deadline of %ss exceeded, cancelled %s topics in flight", deadline.seconds, len(running)
+                    )
+                    return
+                for task in done:
+                    topic = running.pop(task)
+                    counts = task.result()
+                    if counts is not None:
+                        yield topic, counts
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.wait(running)
+
+
+def async_manifests_by_topics(elucidate: str, topics: Iterable, **kwargs) -> Tuple[str, str, int]:
+    """
+    Asynchronously fetch the results from topic queries to Elucidate for many topics, and yield
+    (topic, manifest URI, number of annotations) tuples.
+
+    The topics (which can be a generator, e.g. of 50k topics) are searched concurrently, with
+    up to topic_limit topics, and connector_limit requests, in flight over one pooled session.
+    Each topic's pages are fetched page_limit at a time, counted as they arrive, and then
+    dropped, so only the manifest counts and the pages in flight are held, however many
+    annotations a topic has. Each topic's tuples are yielded (most annotations first) as soon as
+    the topic is complete, so topics are yielded in the order they complete, not the order given.
+    Topics which fail are logged and skipped, as are annotations whose parent can't be found.
+
+    Fetching pauses while the caller handles the tuples, so a slow consumer doesn't build up
+    results.
+
+    N.B. assumption, if passed a string for target, rather than an object,
+    that manifest and canvas URI patterns follow old API DLCS/Presley model.
+
+    Accepts optional connector_limit (default 10), topic_limit (default connector_limit),
+    page_limit (pages of each topic fetched at once, default 5), timeout (seconds, or
+    (connect, read) tuple, for each request), deadline (Deadline, or seconds, for all of the
+    topics), limiter (RateLimiter) and progress (Progress) keyword args.
+
+    :param elucidate: URL for Elucidate server, e.g. https://elucidate.example.org
+    :param topics: iterable of URLs for body source, e.g. https://topics.example.org/people/mary+jones
+    :return: (topic, manifest URI, count) tuple
+    """
+    loop = asyncio.new_event_loop()
+    results = _manifests_by_topics(elucidate, topics, **kwargs)
+    try:
+        while True:
+            try:
+                topic, counts = loop.run_until_complete(results.__anext__())
+            except StopAsyncIteration:
+                return
+            for manifest, count in counts.most_common():
+                yield topic, manifest, count
+    finally:
+        loop.run_until_complete(results.aclose())
+        loop.close()
 
 
 def iterative_delete_by_target_async_get(
-    target: str, elucidate_base: str, dryrun: bool = True
+    target: str,
+    elucidate_base: str,
+    dryrun: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    dedup: str = "exact",
+    journal: Optional[Journal] = None,
+    progress: Optional[Progress] = None,
+    max_buffer_pages: int = 10,
 ) -> bool:
     """
     Delete all annotations in a container for a target uri. Works by querying for the
@@ -1215,26 +3165,49 @@ def iterative_delete_by_target_async_get(
     Asynchronous query using the Elucidate search by target API to fetch the list of annotations to
     delete.
 
-    DELETE is not asychronous, but sequential.
+    The result pages are streamed through a bounded buffer of at most max_buffer_pages pages,
+    in the order they arrive, so deletes start as soon as the first page has arrived, and
+    fetching pauses while the deletes catch up, see _buffered_page_items. As deleting annotations
+    moves later results onto pages that have already been read, the results are listed again
+    until no new annotations are found.
+
+    DELETE is not asychronous, but sequential. Annotation ids are deduplicated as they are
+    streamed, in a compact hashed id set (or, with dedup='bloom', an approximate Bloom filter).
 
     :param dryrun: if True, will not actually delete, just logs and returns True (for success)
     :param target: target uri
     :param elucidate_base: base URI for Elucidate, e.g. https://elucidate.example.org
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the whole operation
+    :param dedup: 'exact' or 'bloom', see pyelucidate.dedup.new_id_set
+    :param journal: optional Journal to record deleted annotations in
+    :param progress: optional Progress, to report deletes to, see pyelucidate.progress
+    :param max_buffer_pages: maximum result pages held at once (in flight, queued or being
+        deleted)
     :return: boolean success or fail, True if no errors on _any_ request.
     """
-    statuses = []
-    anno_items = async_items_by_target(elucidate=elucidate_base, target_uri=target)
-    annotations = []
-    for item in anno_items:
-        annotations.extend([i for i in item_ids(item)])
-    anno_uris = list(set(annotations))
-    if anno_uris:
-        for annotation in anno_uris:
-            content, etag = read_anno(annotation)
-            s = delete_anno(content["id"], etag, dry_run=dryrun)
-            statuses.append(s)
-            logging.info("Deleting %s status %s, dry run: %s", content["id"], s, dryrun)
-    else:
+    deadline = as_deadline(deadline)
+    try:
+        statuses = _delete_listed(
+            lambda: async_items_by_target(
+                elucidate=elucidate_base,
+                target_uri=target,
+                timeout=timeout,
+                deadline=deadline,
+                max_buffer_pages=max_buffer_pages,
+                ordered=False,
+            ),
+            dryrun=dryrun,
+            timeout=timeout,
+            deadline=deadline,
+            dedup=dedup,
+            journal=journal,
+            progress=progress,
+        )
+    except DeadlineExceeded as e:
+        logging.error("%s, could not delete all annotations for target %s", e, target)
+        return False
+    if not statuses:
         logging.warning("No annotations for %s", target)
         return True
 
@@ -1247,7 +3220,14 @@ def iterative_delete_by_target_async_get(
 
 
 def iiif_iterative_delete_by_manifest_async_get(
-    manifest_uri: str, elucidate_uri: str, dry_run: bool = True
+    manifest_uri: str,
+    elucidate_uri: str,
+    dry_run: bool = True,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    deadline: Optional[Union[Deadline, float]] = None,
+    journal: Optional[Journal] = None,
+    resume: bool = True,
+    progress: Optional[Progress] = None,
 ) -> bool:
     """
     Delete all annotations for every canvas in a IIIF manifest and for the manifest.
@@ -1256,40 +3236,73 @@ def iiif_iterative_delete_by_manifest_async_get(
 
     N.B. does NOT do an async DELETE. Delete is sequential.
 
+    If a Journal is provided, completed canvases and deleted annotations are recorded in it, and
+    (if resume is True) canvases it records as completed are skipped.
+
     :param dry_run: if True, will not actually delete, just prints URIs
     :param manifest_uri: uri for IIIF manifest
     :param elucidate_uri: Elucidate base uri
+    :param timeout: seconds, or (connect, read) tuple, for each request
+    :param deadline: Deadline (or seconds) for the whole operation
+    :param journal: optional Journal for checkpointing progress
+    :param resume: if True, skip canvases the journal records as completed
+    :param progress: optional Progress, to report deletes and completed canvases to, see
+        pyelucidate.progress
     :return: boolean success or fail
     """
+    deadline = as_deadline(deadline)
     statuses = []
+    completed = journal.completed_canvases(manifest_uri) if journal and resume else set()
     if manifest_uri:
-        r = requests.get(manifest_uri)
-        if r.status_code == requests.codes.ok:
-            manifest = r.json()
-            if "sequences" in manifest:
-                if "canvases" in manifest["sequences"][0]:
-                    canvases = manifest["sequences"][0]["canvases"]
-                    canvas_ids = [c["@id"] for c in canvases]
-                    for canvas in canvas_ids:
-                        statuses.append(
-                            iterative_delete_by_target_async_get(
-                                elucidate_base=elucidate_uri, target=canvas, dryrun=dry_run
-                            )
-                        )
-                else:
-                    logging.error("Could not find canvases in manifest %s", manifest_uri)
+        try:
+            canvases = manifest_canvas_ids(manifest_uri, timeout=timeout, deadline=deadline)
+        except DeadlineExceeded as e:
+            logging.error("%s, could not GET manifest %s", e, manifest_uri)
+            return False
+        if canvases is None:
+            logging.error("Could not GET manifest %s", manifest_uri)
+            return False
+        try:
+            for count, canvas in enumerate(read_ahead(canvases)):
+                if deadline is not None and deadline.expired:
+                    logging.error(
+                        "Deadline exceeded after %s canvases in manifest %s", count, manifest_uri
+                    )
                     return False
-            else:
-                logging.error("Manifest %s contained no sequences", manifest_uri)
-                return False
-            statuses.append(
-                iterative_delete_by_target_async_get(
-                    elucidate_base=elucidate_uri, target=manifest["@id"], dryrun=dry_run
+                if canvas in completed:
+                    logging.debug("Skipping completed canvas %s", canvas)
+                    continue
+                status = iterative_delete_by_target_async_get(
+                    elucidate_base=elucidate_uri,
+                    target=canvas,
+                    dryrun=dry_run,
+                    timeout=timeout,
+                    deadline=deadline,
+                    journal=journal,
+                    progress=progress,
                 )
-            )
-        else:
-            logging.error("Could not GET manifest %s", manifest_uri)
+                _mark_canvas(journal, manifest_uri, canvas, status, dry_run, deadline)
+                statuses.append(status)
+                if progress is not None:
+                    progress.add(canvases=1)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.error("Could not read manifest %s: %s", manifest_uri, e)
             return False
+        if not _check_canvases(canvases, manifest_uri):
+            return False
+        manifest_id = canvases.manifest_id or manifest_uri
+        if manifest_id not in completed:
+            status = iterative_delete_by_target_async_get(
+                elucidate_base=elucidate_uri,
+                target=manifest_id,
+                dryrun=dry_run,
+                timeout=timeout,
+                deadline=deadline,
+                journal=journal,
+                progress=progress,
+            )
+            _mark_canvas(journal, manifest_uri, manifest_id, status, dry_run, deadline)
+            statuses.append(status)
     return all(statuses)
 
 
@@ -1299,6 +3312,22 @@ def async_items_by_creator(elucidate: str, creator_id: str, **kwargs) -> dict:
 
     Async requests all of the annotation pages before yielding.
 
+    Accepts optional timeout (seconds, or (connect, read) tuple) and deadline (Deadline, or
+    seconds) keyword args. If the deadline is exceeded, only the pages fetched in time are yielded.
+
+    Pass workers (and optionally chunksize) to decode and transform the pages in a pool of worker
+    processes, see parallel_transform_pages.
+
+    Pass as_records=True to yield compact Annotation records rather than dicts, an InternTable as
+    intern to deduplicate repeated URIs as pages are decoded, and a RateLimiter as limiter to
+    override the default set by set_rate_limiter. Pass a Progress as progress to report pages
+    fetched and items yielded, see pyelucidate.progress.
+
+    Pass max_buffer_pages and/or max_buffer_bytes to stream the pages through a bounded buffer,
+    so that fetching pauses when the consumer falls behind, see _buffered_page_items. Pass
+    ordered=False to yield each page's annotations as soon as it arrives, rather than in page
+    order, so a slow page doesn't hold up the rest.
+
     :param elucidate: Elucidate server, e.g. https://elucidate.example.org
     :param creator_id: URI from target source and id, e.g. 'https://manifest.example.org/manifest/1'
     :return: annotation object
@@ -1309,54 +3338,17 @@ def async_items_by_creator(elucidate: str, creator_id: str, **kwargs) -> dict:
         + "/annotation/w3c/services/search/creator?type=id&levels=annotation&strict=True&value="
         + c
     )
-    r = requests.get(sample_uri)
-    filter_by = kwargs.get("filter_by")
+    deadline = as_deadline(kwargs.get("deadline"))
+    try:
+        r = _request(
+            "GET",
+            sample_uri,
+            timeout=kwargs.get("timeout"),
+            deadline=deadline,
+            limiter=kwargs.get("limiter"),
+        )
+    except DeadlineExceeded as e:
+        logging.warning("%s, no results for %s", e, sample_uri)
+        return
     if r.status_code == requests.codes.ok:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        future = asyncio.ensure_future(
-            fetch_all([p for p in annotation_pages(r.json())])
-        )  # tasks to do
-        pages = loop.run_until_complete(future)  # loop until done
-        for page in pages:
-            if page.get("items"):
-                for item in page["items"]:
-                    # will not return if the annotation doesn't have the
-                    # filter property, e.g. {"motivation": [{"id": "bookmarking"}]}
-                    # if the value of they is a simple string, e.g. if the annotation has
-                    # "motivation" : "bookmarking"
-                    # the code will ignore the "id" key, and check that all values match,
-                    # irresepctive of
-                    # the key.
-                    if filter_by:
-                        for filter_key, filter_value_list in filter_by.items():
-                            for filter_value in filter_value_list:
-                                if item.get(filter_key):
-                                    if isinstance(item.get(filter_key), dict):
-                                        if all(
-                                            [
-                                                item[filter_key][k] == v
-                                                for k, v in filter_value.items()
-                                            ]
-                                        ):
-                                            yield transform_annotation(
-                                                item=item,
-                                                flatten_at_ids=kwargs.get("flatten_ids"),
-                                                transform_function=kwargs.get("trans_function"),
-                                            )
-                                    elif isinstance(item.get(filter_key), str):
-                                        if all(
-                                            [item[filter_key] == v for k, v in filter_value.items()]
-                                        ):
-                                            yield transform_annotation(
-                                                item=item,
-                                                flatten_at_ids=kwargs.get("flatten_ids"),
-                                                transform_function=kwargs.get("trans_function"),
-                                            )
-
-                    else:
-                        yield transform_annotation(
-                            item=item,
-                            flatten_at_ids=kwargs.get("flatten_ids"),
-                            transform_function=kwargs.get("trans_function"),
-                        )
+        yield from _async_page_items(r.json(), **dict(kwargs, deadline=deadline))
@@ -0,0 +1,179 @@
+"""
+Token bucket rate limiting, shared by the requests (sync) and aiohttp (async) code paths.
+"""
+import asyncio
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+
+def endpoint_class(url: str, method: str = "GET") -> str:
+    """
+    Classify an Elucidate request as 'search', 'batch' or 'crud'.
+
+    :param url: request URL
+    :param method: HTTP method
+    :return: endpoint class
+    """
+    path = urlparse(url).path
+    if "/services/batch/" in path:
+        return "batch"
+    elif "/services/search/" in path:
+        return "search"
+    return "crud"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, allowing rate requests per second on average, with bursts of up to
+    burst requests.
+
+    Callers reserve a token (which may put the bucket into debt) and then wait for the time it
+    takes to refill, so concurrent callers are spaced out fairly, whether they are threads or
+    coroutines.
+
+    :param rate: tokens added per second
+    :param burst: bucket size, defaults to rate (minimum 1)
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket.
+
+        :param tokens: number of tokens
+        :return: seconds the caller must wait before proceeding
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.requests += 1
+            self.waited += delay
+            self.max_wait = max(self.max_wait, delay)
+            return delay
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Block until tokens are available.
+
+        :param tokens: number of tokens
+        :return: seconds waited
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """
+        Wait, without blocking the event loop, until tokens are available.
+
+        :param tokens: number of tokens
+        :return: seconds waited
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def stats(self) -> dict:
+        """
+        :return: dict of requests, total seconds waited, mean and max wait
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "waited": self.waited,
+                "mean_wait": self.waited / self.requests if self.requests else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+class RateLimiter:
+    """
+    Per-host token bucket rate limiter, optionally with separate limits for each class of
+    Elucidate endpoint ('search', 'batch' or 'crud', see endpoint_class).
+
+    Safe to share across threads, and between sync and async code.
+
+    For example, 20 requests per second to each host, but only 1 batch request per second:
+
+    .. code-block:: python
+
+        limiter = RateLimiter(rate=20, burst=40, classes={"batch": (1, 1)})
+
+    :param rate: requests per second, per host
+    :param burst: maximum burst, per host, defaults to rate
+    :param classes: optional dict of endpoint class to (rate, burst), requests of these classes
+        use their own bucket instead of the host's
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, classes: Optional[dict] = None):
+        self.rate = rate
+        self.burst = burst
+        self.classes = classes or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str, method: str = "GET") -> TokenBucket:
+        """
+        :param url: request URL
+        :param method: HTTP method
+        :return: the TokenBucket for the request
+        """
+        host = urlparse(url).netloc
+        klass = endpoint_class(url, method)
+        key = (host, klass if klass in self.classes else None)
+        with self._lock:
+            if key not in self._buckets:
+                if key[1] is None:
+                    self._buckets[key] = TokenBucket(self.rate, self.burst)
+                else:
+                    self._buckets[key] = TokenBucket(*self.classes[klass])
+            return self._buckets[key]
+
+    def acquire(self, url: str, method: str = "GET") -> float:
+        """
+        Block until the request is allowed.
+
+        :return: seconds waited
+        """
+        return self.bucket(url, method).acquire()
+
+    async def acquire_async(self, url: str, method: str = "GET") -> float:
+        """
+        Wait, without blocking the event loop, until the request is allowed.
+
+        :return: seconds waited
+        """
+        return await self.bucket(url, method).acquire_async()
+
+    def stats(self) -> dict:
+        """
+        :return: dict of (host, endpoint class) to TokenBucket.stats(), plus a 'total' entry
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        result = {"/".join(k for k in key if k): b.stats() for key, b in buckets.items()}
+        requests = sum(s["requests"] for s in result.values())
+        waited = sum(s["waited"] for s in result.values())
+        result["total"] = {
+            "requests": requests,
+            "waited": waited,
+            "mean_wait": waited / requests if requests else 0.0,
+            "max_wait": max([s["max_wait"] for s in result.values()] or [0.0]),
+        }
+        return result
@@ -35,6 +35,7 @@ setup(
     package_dir={"pyelucidate": "pyelucidate"},
     include_package_data=True,
     install_requires=["aiohttp>=3.4.4", "requests>=2.20.1"],
+    entry_points={"console_scripts": ["pyelucidate=pyelucidate.cli:main"]},
     license="MIT",
     zip_safe=False,
     keywords="pyelucidate",
@@ -6,9 +6,11 @@ import types
 import requests_mock
 import pytest
 import os
+from urllib.parse import quote_plus
 
 
 FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+E = "https://elucidate.example.org"
 
 
 def test_fetch_all():
@@ -325,7 +327,7 @@ def test_items_delete_by_target_not_dryrun(datafiles):
             + "example%2Ffixtures%2Fcanvas%2F19%2Fc1.json&desc=1&page=0"
         ]
         for page_uri in page_uris:
-            mock.get(page_uri, payload=search_by_target_page)
+            mock.get(page_uri, payload=search_by_target_page, repeat=True)  # listed again after deleting
         for anno in search_by_target_page["items"]:
             m.register_uri(
                 "GET",
@@ -369,7 +371,7 @@ def test_items_delete_by_target_errors(datafiles):
             + "example%2Ffixtures%2Fcanvas%2F19%2Fc1.json&desc=1&page=0"
         ]
         for page_uri in page_uris:
-            mock.get(page_uri, payload=search_by_target_page)
+            mock.get(page_uri, payload=search_by_target_page, repeat=True)  # listed again after deleting
         for anno in search_by_target_page["items"]:
             m.register_uri(
                 "GET",
@@ -444,7 +446,7 @@ def test_items_delete_by_manifest_not_dry_run(datafiles):
         ) in (
             page_uris
         ):  # just return the same json in each instance (for easier testing)
-            mock.get(page_uri, payload=search_by_target_page)
+            mock.get(page_uri, payload=search_by_target_page, repeat=True)  # listed again after deleting
             m.register_uri("GET", url=page_uri, json=search_by_target_page)
         for anno in search_by_target_page["items"]:
             m.register_uri(
@@ -671,4 +673,269 @@ def test_items_by_creator_filter_multi(datafiles):
         )
         anno_list = list(response)
         assert isinstance(response, types.GeneratorType)  # is True
-        assert len(anno_list) == 5
\ No newline at end of file
+        assert len(anno_list) == 5
+
+
+def test_fetch_all_deadline():
+    with aioresponses() as mock:
+        mock.get("http://elucidate.example.org/0", payload=dict(foo="bar"))
+        mock.get("http://elucidate.example.org/1", payload=dict(foo="baz"))
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        future = asyncio.ensure_future(
+            elucidate.fetch_all(
+                ["http://elucidate.example.org/0", "http://elucidate.example.org/1"],
+                timeout=(1, 10),
+                deadline=elucidate.Deadline(0),
+            )
+        )
+        results = loop.run_until_complete(future)
+        assert results == []  # deadline already exceeded, so no requests are made
+
+
+def test_fetch_all_timeout():
+    with aioresponses() as mock:
+        mock.get("http://elucidate.example.org/0", payload=dict(foo="bar"))
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        future = asyncio.ensure_future(
+            elucidate.fetch_all(["http://elucidate.example.org/0"], timeout=(1, 10), deadline=30)
+        )
+        results = loop.run_until_complete(future)
+        assert results == [{"foo": "bar"}]
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "search_by_target.json"),
+    os.path.join(FIXTURE_DIR, "search_by_target_0.json"),
+)
+def test_items_by_target_workers(datafiles):
+    path = str(datafiles)
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        with open(os.path.join(path, "search_by_target.json"), "r") as f:
+            search_by_target = json.load(f)
+        with open(os.path.join(path, "search_by_target_0.json"), "r") as f0:
+            search_by_target_page = json.load(f0)
+        t = "http://iiif.io/api/presentation/2.0/example/fixtures/canvas/19/c1.json"
+        u = (
+            "https://elucidate.example.org/annotation/w3c/services/search/target?fields=source,id&value="
+            + "http%3A%2F%2Fiiif.io%2Fapi%2Fpresentation%2F2.0%2Fexample%2Ffixtures%2Fcanvas%2F19%2Fc1.json"
+        )
+        m.register_uri("GET", url=u, json=search_by_target)
+        mock.get(
+            "https://elucidate.example.org/annotation/w3c/services/search/target?fields=source&value="
+            + "http%3A%2F%2Fiiif.io%2Fapi%2Fpresentation%2F2.0%2F"
+            + "example%2Ffixtures%2Fcanvas%2F19%2Fc1.json&desc=1&page=0",
+            body=json.dumps(search_by_target_page),
+        )
+        response = elucidate.async_items_by_target(
+            elucidate="https://elucidate.example.org", target_uri=t, workers=2
+        )
+        anno_list = list(response)
+        assert isinstance(response, types.GeneratorType)  # is True
+        assert anno_list == search_by_target_page["items"]
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "search_by_target.json"),
+    os.path.join(FIXTURE_DIR, "search_by_target_0.json"),
+)
+def test_items_by_target_as_records(datafiles):
+    path = str(datafiles)
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        with open(os.path.join(path, "search_by_target.json"), "r") as f:
+            search_by_target = json.load(f)
+        with open(os.path.join(path, "search_by_target_0.json"), "r") as f0:
+            search_by_target_page = json.load(f0)
+        t = "http://iiif.io/api/presentation/2.0/example/fixtures/canvas/19/c1.json"
+        u = (
+            "https://elucidate.example.org/annotation/w3c/services/search/target?fields=source,id&value="
+            + "http%3A%2F%2Fiiif.io%2Fapi%2Fpresentation%2F2.0%2Fexample%2Ffixtures%2Fcanvas%2F19%2Fc1.json"
+        )
+        m.register_uri("GET", url=u, json=search_by_target)
+        mock.get(
+            "https://elucidate.example.org/annotation/w3c/services/search/target?fields=source&value="
+            + "http%3A%2F%2Fiiif.io%2Fapi%2Fpresentation%2F2.0%2F"
+            + "example%2Ffixtures%2Fcanvas%2F19%2Fc1.json&desc=1&page=0",
+            payload=search_by_target_page,
+        )
+        table = elucidate.InternTable(keys=())  # nothing interned as pages are decoded, so empty
+        anno_list = list(
+            elucidate.async_items_by_target(
+                elucidate="https://elucidate.example.org", target_uri=t, as_records=True, intern=table
+            )
+        )
+        assert table.stats()["misses"] > 0  # used for the records, not ignored as empty
+        assert len(anno_list) == 8
+        assert anno_list[0].id == search_by_target_page["items"][0]["id"]
+        assert anno_list[0].target == t
+        assert anno_list[0].content == search_by_target_page["items"][0]
+
+
+def test_fetch_all_intern():
+    with aioresponses() as mock:
+        mock.get("http://elucidate.example.org/0", payload={"items": [{"creator": "u1"}]})
+        mock.get("http://elucidate.example.org/1", payload={"items": [{"creator": "u1"}]})
+        table = elucidate.InternTable()
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        future = asyncio.ensure_future(
+            elucidate.fetch_all(
+                ["http://elucidate.example.org/0", "http://elucidate.example.org/1"], intern=table
+            )
+        )
+        results = loop.run_until_complete(future)
+        assert results[0] == results[1] == {"items": [{"creator": "u1"}]}
+        assert results[0]["items"][0]["creator"] is results[1]["items"][0]["creator"]
+        assert table.stats()["size"] == 1
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop.run_until_complete(coroutine)
+
+
+def test_async_create_anno():
+    e = "https://elucidate.example.org"
+    target = "https://iiif.example.org/canvas/1"
+    container = elucidate.hashlib.md5(target.encode("utf-8")).hexdigest()
+    anno_id = e + "/annotation/w3c/" + container + "/1"
+    with aioresponses() as mock:
+        mock.get(e + "/annotation/w3c/" + container + "/", status=404)
+        mock.post(e + "/annotation/w3c/", status=201)
+        mock.post(e + "/annotation/w3c/" + container + "/", status=201, payload={"id": anno_id})
+
+        async def create():
+            async with elucidate.ClientSession() as session:
+                return await elucidate.async_create_anno(
+                    e, {"type": "Annotation", "target": target}, session=session
+                )
+
+        assert run(create()) == (201, anno_id)
+
+
+def test_async_update_delete_anno():
+    anno_id = "https://elucidate.example.org/annotation/w3c/foo/1"
+    with aioresponses() as mock:
+        mock.get(anno_id, payload={"id": anno_id}, headers={"ETag": 'W/"abc"'})
+        mock.put(anno_id, status=200)
+        mock.delete(anno_id, status=204)
+
+        async def read_update_delete():
+            async with elucidate.ClientSession() as session:
+                content, etag = await elucidate.async_read_anno(anno_id, session=session)
+                assert content == {"id": anno_id}
+                assert etag == "abc"
+                update = await elucidate.async_update_anno(
+                    anno_id, content, etag, dry_run=False, session=session
+                )
+                delete = await elucidate.async_delete_anno(anno_id, etag, dry_run=False, session=session)
+                return update, delete
+
+        assert run(read_update_delete()) == (200, 204)
+        assert run(elucidate.async_delete_anno(anno_id, "abc", dry_run=True)) == 204
+
+
+def test_async_batch_operations():
+    e = "https://elucidate.example.org"
+    with aioresponses() as mock:
+        mock.post(e + "/annotation/w3c/services/batch/update", status=200)
+        mock.post(e + "/annotation/w3c/services/batch/delete", status=500)
+        mock.post(e + "/annotation/w3c/services/batch/delete", status=200)
+        status, body = run(
+            elucidate.async_batch_update_body("https://topic/new", ["https://topic/old"], e, dry_run=False)
+        )
+        assert status == 200
+        assert body == elucidate.batch_update_body("https://topic/new", ["https://topic/old"], e)[1]
+        status, _ = run(elucidate.async_batch_delete_topic("https://topic/old", e, dry_run=False))
+        assert status == 500
+        assert run(elucidate.async_batch_delete_target("https://canvas/1", e, dry_run=False)) == 200
+
+
+def test_fetch_transfer_stats():
+    elucidate.transfer_stats.reset()
+    with aioresponses() as mock:
+        mock.get("http://elucidate.example.org", payload=dict(foo="bar"))
+        results = run(elucidate.fetch_all(["http://elucidate.example.org"]))
+        assert results == [{"foo": "bar"}]
+    stats = elucidate.transfer_stats.stats()
+    assert stats["requests"] == 1
+    assert stats["received_uncompressed"] == len(json.dumps(dict(foo="bar")))
+
+
+def _mock_topic(mock, topic, manifests, status=200):
+    """
+    Mock a topic search with one single annotation page for each manifest in manifests.
+    """
+    e = "https://elucidate.example.org/annotation/w3c/services/search/body"
+    q = quote_plus(topic)
+    if status != 200:
+        mock.get(e + "?fields=source,id&value=" + q, status=status)
+        return
+    mock.get(
+        e + "?fields=source,id&value=" + q,
+        payload={"total": len(manifests), "last": e + "?fields=source&value=%s&desc=1&page=%s" % (q, len(manifests) - 1)},
+    )
+    for i, m in enumerate(manifests):
+        mock.get(
+            e + "?fields=source&value=%s&desc=1&page=%s" % (q, i),
+            payload={"items": [{"target": {"source": m + "/c1", "dcterms:isPartOf": m}}]},
+        )
+
+
+def test_manifests_by_topics():
+    with aioresponses() as mock:
+        _mock_topic(mock, "https://t/1", ["https://m/1", "https://m/2", "https://m/1"])
+        _mock_topic(mock, "https://t/2", ["https://m/3"])
+        _mock_topic(mock, "https://t/3", [], status=500)
+        results = list(elucidate.async_manifests_by_topics(E, ["https://t/1", "https://t/2", "https://t/3"]))
+    assert sorted(results) == [
+        ("https://t/1", "https://m/1", 2),
+        ("https://t/1", "https://m/2", 1),
+        ("https://t/2", "https://m/3", 1),
+    ]
+    assert results.index(("https://t/1", "https://m/1", 2)) < results.index(("https://t/1", "https://m/2", 1))
+
+
+def test_manifests_by_topics_bounded():
+    consumed = []
+
+    def topics():
+        for i in range(20):
+            consumed.append(i)
+            yield "https://t/%s" % i
+
+    with aioresponses() as mock:
+        for i in range(20):
+            _mock_topic(mock, "https://t/%s" % i, ["https://m/%s" % i])
+        results = elucidate.async_manifests_by_topics(E, topics(), topic_limit=3)
+        first = next(results)
+        assert len(consumed) <= 4  # the topics in flight, not all of them
+        results.close()  # cancels the topics in flight
+    assert first[2] == 1 and len(consumed) < 20
+
+
+def test_manifests_by_topics_page_limit(monkeypatch):
+    in_flight = []
+    running = [0]
+
+    async def fetch(url, session, **kwargs):
+        running[0] += 1
+        in_flight.append(running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        n = int(url.rsplit("=", 1)[1])
+        items = [{"target": {"dcterms:isPartOf": "https://m/%s" % (n % 2)}}, {"id": "no-target"}]
+        return {"items": items}
+
+    monkeypatch.setattr(elucidate, "fetch", fetch)
+    e = E + "/annotation/w3c/services/search/body"
+    with aioresponses() as mock:
+        mock.get(
+            e + "?fields=source,id&value=" + quote_plus("https://t/1"),
+            payload={"total": 20, "last": e + "?fields=source&value=t&desc=1&page=19"},
+        )
+        results = list(elucidate.async_manifests_by_topics(E, ["https://t/1"], page_limit=3))
+    assert max(in_flight) == 3
+    assert sorted(results) == [("https://t/1", "https://m/0", 10), ("https://t/1", "https://m/1", 10)]
@@ -0,0 +1,192 @@
+"""
+Tests for `pyelucidate.backpressure` module, and the buffered async item streams.
+"""
+from aioresponses import aioresponses
+from pyelucidate import pyelucidate as elucidate
+from pyelucidate.backpressure import DECODED_FACTOR, PageBuffer
+import aiohttp
+import asyncio
+import json
+import pytest
+import requests_mock
+import threading
+import time
+
+
+E = "https://elucidate.example.org"
+T = "https://example.org/canvas/1"
+FIRST = E + "/annotation/w3c/services/search/target?fields=source,id&value=https%3A%2F%2Fexample.org%2Fcanvas%2F1"
+PAGE = E + "/annotation/w3c/services/search/target?fields=source&value=https%3A%2F%2Fexample.org%2Fcanvas%2F1&desc=1&page="
+
+
+def _mock_pages(mock, m, count, fail=None):
+    m.register_uri("GET", FIRST, json={"type": "AnnotationCollection", "total": count, "last": PAGE + str(count - 1)})
+    for i in range(count):
+        if i == fail:
+            mock.get(PAGE + str(i), exception=aiohttp.ClientError("page %s" % i))
+        else:
+            mock.get(PAGE + str(i), payload={"type": "AnnotationPage", "items": [{"id": "a%s" % i}]})
+
+
+def test_buffered_items_slow_consumer():
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        _mock_pages(mock, m, 10)
+        elucidate.transfer_stats.reset()
+        ids = []
+        ahead = []
+        for item in elucidate.async_items_by_target(E, T, max_buffer_pages=2):
+            time.sleep(0.02)  # a slow consumer, e.g. a database writer
+            ids.append(item["id"])
+            ahead.append(elucidate.transfer_stats.stats()["requests"] - 1 - len(ids))
+    assert ids == ["a%s" % i for i in range(10)]
+    assert max(ahead) <= 1  # at most two pages held, including the one being consumed
+
+
+def test_buffered_items_byte_budget():
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        _mock_pages(mock, m, 5)
+        items = list(elucidate.async_items_by_target(E, T, max_buffer_bytes=1))
+    assert [item["id"] for item in items] == ["a%s" % i for i in range(5)]  # a page larger than the budget still passes
+
+
+def test_buffered_items_stop_early():
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        _mock_pages(mock, m, 20)
+        elucidate.transfer_stats.reset()
+        items = elucidate.async_items_by_target(E, T, max_buffer_pages=3)
+        assert next(items)["id"] == "a0"
+        items.close()  # stops the fetcher
+    assert elucidate.transfer_stats.stats()["requests"] <= 1 + 4
+
+
+def test_buffered_items_error():
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        _mock_pages(mock, m, 5, fail=3)
+        ids = []
+        with pytest.raises(aiohttp.ClientError):
+            for item in elucidate.async_items_by_target(E, T, max_buffer_pages=2):
+                ids.append(item["id"])
+    assert ids == ["a0", "a1", "a2"]
+
+
+def test_buffered_items_close_cancels(monkeypatch):
+    async def fetch(url, session, **kwargs):
+        if not url.endswith("page=0"):
+            await asyncio.sleep(30)  # a request that would hold up the close
+        return json.dumps({"type": "AnnotationPage", "items": [{"id": "a0"}]}).encode("utf-8")
+
+    monkeypatch.setattr(elucidate, "fetch", fetch)
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        _mock_pages(mock, m, 5)
+        items = elucidate.async_items_by_target(E, T, max_buffer_pages=3)
+        assert next(items)["id"] == "a0"
+        started = time.monotonic()
+        items.close()
+    assert time.monotonic() - started < 5
+
+
+def test_page_buffer_estimated_bytes():
+    buffer = PageBuffer(max_pages=10, max_bytes=800)
+    page = b"x" * 100
+
+    async def fetcher():
+        for _ in range(3):
+            assert await buffer.reserve()
+        buffer.put(page)
+        assert buffer.bytes == 100 + 2 * 100  # one queued, two in flight of the average size
+        buffer.get()
+        assert buffer.bytes == DECODED_FACTOR * 100 + 2 * 100  # decoded while it is consumed
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(buffer.reserve(), 0.05)  # over budget, with 800 bytes
+        buffer.release(page)
+        assert buffer.bytes == 200
+        assert await buffer.reserve()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(fetcher())
+    loop.close()
+    assert buffer.peak_bytes == 800
+
+
+def test_page_buffer_reserve_waits():
+    buffer = PageBuffer(max_pages=1)
+    page = json.dumps({"items": []}).encode("utf-8")
+
+    async def fetcher():
+        assert await buffer.reserve()
+        buffer.put(page)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(buffer.reserve(), 0.05)  # full, until the page is released
+        asyncio.get_event_loop().call_later(0.01, buffer.release, buffer.get())
+        assert await buffer.reserve()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(fetcher())
+    loop.close()
+    assert buffer.waits >= 1 and buffer.peak_pages == 1
+
+
+@pytest.fixture
+def slow_first_page():
+    """
+    Local Elucidate-like server for 5 single item search pages, where page 0 is slow.
+    """
+    from aiohttp import web
+
+    async def page(request):
+        n = int(request.query["page"])
+        if n == 0:
+            await asyncio.sleep(0.3)
+        return web.json_response({"type": "AnnotationPage", "items": [{"id": "a%s" % n}]})
+
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_get("/annotation/w3c/services/search/target", page)
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    base = "http://127.0.0.1:%s" % runner.addresses[0][1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    with requests_mock.Mocker() as m:
+        m.register_uri(
+            "GET",
+            FIRST.replace(E, base),
+            json={"type": "AnnotationCollection", "total": 5, "last": PAGE.replace(E, base) + "4"},
+        )
+        yield base
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_unordered_items(slow_first_page):
+    ids = [item["id"] for item in elucidate.async_items_by_target(slow_first_page, T, ordered=False)]
+    assert sorted(ids) == ["a%s" % i for i in range(5)]
+    assert ids[-1] == "a0"  # the slow page doesn't hold up the others
+    ids = [item["id"] for item in elucidate.async_items_by_target(slow_first_page, T, max_buffer_pages=10)]
+    assert ids == ["a%s" % i for i in range(5)]
+
+
+def test_delete_by_target_async_get_streams():
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        m.register_uri("GET", FIRST, json={"type": "AnnotationCollection", "total": 10, "last": PAGE + "9"})
+        for i in range(10):
+            anno = E + "/annotation/w3c/c/a%s" % i
+            mock.get(PAGE + str(i), payload={"type": "AnnotationPage", "items": [{"id": anno}]}, repeat=True)
+            m.register_uri("GET", anno, json={"id": anno}, headers={"ETag": 'W/"abc"'})
+        elucidate.transfer_stats.reset()
+        requests_at_first_delete = []
+
+        def deleted(request, context):
+            requests_at_first_delete.append(elucidate.transfer_stats.stats()["requests"])
+            context.status_code = 204
+            return ""
+
+        m.register_uri("DELETE", requests_mock.ANY, text=deleted)
+        assert elucidate.iterative_delete_by_target_async_get(T, E, dryrun=False, max_buffer_pages=2)
+    assert len(requests_at_first_delete) == 10
+    assert requests_at_first_delete[0] < 1 + 10  # deletes started before every page was fetched
+    assert [r.url for r in m.request_history if r.method == "GET" and "fields" in r.url] == [FIRST, FIRST]  # relisted
@@ -0,0 +1,115 @@
+"""
+Tests for `pyelucidate.cli` module.
+"""
+from aioresponses import aioresponses
+from pyelucidate.cli import main
+import json
+import os
+import pytest
+import requests_mock
+import time
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+E = "https://elucidate.example.org"
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "search_by_target.json"),
+    os.path.join(FIXTURE_DIR, "search_by_target_0.json"),
+)
+def test_search(datafiles, capsys):
+    path = str(datafiles)
+    with open(os.path.join(path, "search_by_target.json"), "r") as f:
+        search_by_target = json.load(f)
+    with open(os.path.join(path, "search_by_target_0.json"), "r") as f0:
+        search_by_target_page = json.load(f0)
+    t = "http://iiif.io/api/presentation/2.0/example/fixtures/canvas/19/c1.json"
+    q = "http%3A%2F%2Fiiif.io%2Fapi%2Fpresentation%2F2.0%2Fexample%2Ffixtures%2Fcanvas%2F19%2Fc1.json"
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        m.register_uri(
+            "GET", E + "/annotation/w3c/services/search/target?fields=source,id&value=" + q, json=search_by_target
+        )
+        mock.get(
+            E + "/annotation/w3c/services/search/target?fields=source&value=" + q + "&desc=1&page=0",
+            payload=search_by_target_page,
+        )
+        assert main(["--elucidate", E + "/", "search", "--target", t]) == 0
+    out, err = capsys.readouterr()
+    assert [json.loads(line) for line in out.splitlines()] == search_by_target_page["items"]
+    assert err.startswith("8 records (0 failed)")
+    assert "dry run" not in err
+
+
+def test_search_ids_only(capsys):
+    t = "https://example.org/canvas/1"
+    page = E + "/annotation/w3c/services/search/target?fields=source&value=https%3A%2F%2Fexample.org%2Fcanvas%2F1&desc=1&page=0"
+    items = [{"id": E + "/annotation/w3c/c/1", "body": {"id": "https://t/1"}}, {"id": E + "/annotation/w3c/c/2"}]
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        m.register_uri(
+            "GET",
+            E + "/annotation/w3c/services/search/target?fields=source,id&value=https%3A%2F%2Fexample.org%2Fcanvas%2F1",
+            json={"type": "AnnotationCollection", "total": 2, "last": page},
+        )
+        mock.get(page, payload={"type": "AnnotationPage", "items": items}, repeat=True)
+        assert main(["--elucidate", E, "search", "--target", t, "--ids-only"]) == 0
+        out, _ = capsys.readouterr()
+        assert [json.loads(line) for line in out.splitlines()] == [{"id": item["id"]} for item in items]
+        assert main(["--elucidate", E, "search", "--target", t, "--flatten-ids"]) == 0
+        assert capsys.readouterr().out == out
+
+
+def test_delete_topic_dry_run(capsys):
+    topics = ["https://omeka.example.org/topics/person/old", "https://omeka.example.org/topics/person/older"]
+    with requests_mock.Mocker() as m:
+        assert main(["--elucidate", E, "delete-topic"] + topics) == 0
+        assert not m.called
+    out, err = capsys.readouterr()
+    assert [json.loads(line) for line in out.splitlines()] == [{"topic": t, "status": 200} for t in topics]
+    assert "dry run" in err
+
+
+def test_delete_target_retries(capsys):
+    t = "https://example.org/canvas/1"
+    with requests_mock.Mocker() as m:
+        m.register_uri(
+            "POST",
+            E + "/annotation/w3c/services/batch/delete",
+            [{"status_code": 500}, {"status_code": 200}],
+        )
+        assert main(["--elucidate", E, "--execute", "--backoff", "0", "--quiet", "delete-target", t]) == 0
+        assert m.call_count == 2
+        m.register_uri("POST", E + "/annotation/w3c/services/batch/delete", status_code=500)
+        assert main(["--elucidate", E, "--execute", "--backoff", "0", "--retries", "0", "delete-target", t]) == 1
+    out, err = capsys.readouterr()
+    assert [json.loads(line)["status"] for line in out.splitlines()] == [200, 500]
+    assert "1 failed" in err
+
+
+def test_delete_target_deadline(capsys):
+    t = "https://example.org/canvas/1"
+    with requests_mock.Mocker() as m:
+        m.register_uri("POST", E + "/annotation/w3c/services/batch/delete", status_code=500)
+        start = time.monotonic()
+        args = ["--elucidate", E, "--execute", "--deadline", "0.3", "--retries", "5", "--backoff", "10"]
+        assert main(args + ["delete-target", t]) == 1
+        assert time.monotonic() - start < 5  # no retries, or backoff, past the deadline
+        assert 1 <= m.call_count <= 2
+        assert all(max(r.timeout) <= 0.3 for r in m.request_history)  # each POST is capped too
+    out, err = capsys.readouterr()
+    assert "1 failed" in err
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "single_anno.json"))
+def test_create_dry_run(datafiles, capsys):
+    path = os.path.join(str(datafiles), "single_anno.json")
+    assert main(["--elucidate", E, "--quiet", "create", path]) == 0
+    out, err = capsys.readouterr()
+    assert json.loads(out) == {"line": 1, "status": 200, "id": None, "success": True, "file": path}
+    assert err == ""
+
+
+def test_missing_elucidate(monkeypatch):
+    monkeypatch.delenv("ELUCIDATE_BASE", raising=False)
+    with pytest.raises(SystemExit):
+        main(["search", "--topic", "https://omeka.example.org/topics/person/old"])
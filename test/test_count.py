@@ -0,0 +1,93 @@
+"""
+Tests for `pyelucidate.count` module.
+"""
+from aioresponses import aioresponses
+from pyelucidate import pyelucidate as elucidate
+from pyelucidate.cli import main
+from pyelucidate.count import (
+    MINIMAL_CONTAINER,
+    count_bulk,
+    count_by_container,
+    count_by_creator,
+    count_by_target,
+    count_by_topic,
+)
+import json
+import os
+import pytest
+import requests_mock
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+E = "https://elucidate.example.org"
+T = "https://example.org/canvas/1"
+TARGET = E + "/annotation/w3c/services/search/target?fields=source,id&value=https%3A%2F%2Fexample.org%2Fcanvas%2F"
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "search_by_target.json"),
+    os.path.join(FIXTURE_DIR, "single_topic_page.json"),
+)
+def test_count_one_request(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "search_by_target.json"), "r") as f:
+        search_by_target = json.load(f)
+    with open(os.path.join(path, "single_topic_page.json"), "r") as f:
+        single_topic = json.load(f)
+    creator = E + "/annotation/w3c/services/search/creator?type=id&levels=annotation&strict=True&value=https%3A%2F%2Fc%2F1"
+    with requests_mock.Mocker() as m:
+        m.register_uri("GET", TARGET + "1", json=search_by_target)
+        m.register_uri(
+            "GET", E + "/annotation/w3c/services/search/body?fields=source,id&value=https%3A%2F%2Ft%2F1", json=single_topic
+        )
+        m.register_uri("GET", creator, json={"total": 0})
+        assert count_by_target(E, T) == 8
+        assert count_by_topic(E, "https://t/1") == single_topic["total"]
+        assert count_by_creator(E, "https://c/1") == 0
+        assert m.call_count == 3
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "container.json"))
+def test_count_by_container(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "container.json"), "r") as f:
+        container = json.load(f)
+    with requests_mock.Mocker() as m:
+        m.register_uri("GET", elucidate.gen_search_by_container_uri(E, T), json=container)
+        m.register_uri("GET", E + "/annotation/w3c/missing/", status_code=404)
+        m.register_uri("GET", E + "/annotation/w3c/broken/", status_code=500)
+        assert count_by_container(E, target_uri=T) == 8
+        assert m.last_request.headers["Prefer"] == MINIMAL_CONTAINER["Prefer"]
+        assert count_by_container(E, container="missing") == 0
+        assert count_by_container(E, container="broken") is None
+        assert count_by_container(E) is None
+        assert m.call_count == 3
+
+
+def test_count_bulk():
+    targets = ["https://example.org/canvas/%s" % i for i in range(50)]
+    with aioresponses() as mock:
+        for i in range(50):
+            if i == 7:
+                mock.get(TARGET + str(i), status=500)
+            else:
+                mock.get(TARGET + str(i), payload={"type": "AnnotationCollection", "total": i})
+        elucidate.transfer_stats.reset()
+        counts = count_bulk(E, targets, connector_limit=10)
+    assert elucidate.transfer_stats.stats()["requests"] == 50
+    assert counts == {t: (None if i == 7 else i) for i, t in enumerate(targets)}
+    with pytest.raises(ValueError):
+        count_bulk(E, targets, by="body")
+
+
+def test_cli_count(capsys):
+    with aioresponses() as mock:
+        mock.get(TARGET + "1", payload={"total": 3})
+        mock.get(TARGET + "2", status=503)
+        assert main(["--elucidate", E, "count", T, "https://example.org/canvas/2"]) == 1
+    out, err = capsys.readouterr()
+    assert [json.loads(line) for line in out.splitlines()] == [
+        {"target": T, "total": 3},
+        {"target": "https://example.org/canvas/2", "total": None, "success": False},
+    ]
+    assert err.startswith("2 records (1 failed)") and "dry run" not in err
@@ -0,0 +1,38 @@
+"""
+Tests for `pyelucidate.dedup` module.
+"""
+from pyelucidate import dedup
+import pytest
+
+
+def test_id_set():
+    ids = dedup.IdSet(capacity=4)
+    uris = ["https://elucidate.example.org/annotation/w3c/foo/%s" % i for i in range(1000)]
+    assert all(ids.add(u) for u in uris)
+    assert not any(ids.add(u) for u in uris)
+    assert len(ids) == 1000
+    assert uris[10] in ids
+    assert "https://elucidate.example.org/annotation/w3c/foo/bar" not in ids
+    assert ids.nbytes < 1000 * 32
+
+
+def test_bloom_filter():
+    ids = dedup.BloomFilter(capacity=1000, error_rate=0.01)
+    uris = ["https://elucidate.example.org/annotation/w3c/foo/%s" % i for i in range(1000)]
+    for u in uris:
+        ids.add(u)
+    assert all(u in ids for u in uris)  # no false negatives
+    others = ["https://elucidate.example.org/annotation/w3c/bar/%s" % i for i in range(1000)]
+    false_positives = sum(1 for u in others if u in ids)
+    assert false_positives < 50
+    assert ids.nbytes < 2000
+
+
+def test_unique():
+    assert list(dedup.unique(["a", "b", "a", "c", "b"])) == ["a", "b", "c"]
+    assert list(dedup.unique(["a", "b", "a"], mode="bloom", capacity=10)) == ["a", "b"]
+
+
+def test_new_id_set_mode():
+    with pytest.raises(ValueError):
+        dedup.new_id_set("foo")
@@ -0,0 +1,81 @@
+"""
+Tests for `pyelucidate.export` module.
+"""
+from aioresponses import aioresponses
+from pyelucidate.export import export_ndjson, search_uri
+import gzip
+import json
+import os
+import pytest
+import requests_mock
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+E = "https://elucidate.example.org"
+T = "http://iiif.io/api/presentation/2.0/example/fixtures/canvas/19/c1.json"
+SEARCH = E + "/annotation/w3c/services/search/target?fields=source&value=" + T.replace(":", "%3A").replace(
+    "/", "%2F"
+)
+
+
+def _pages(path):
+    with open(os.path.join(path, "search_by_target_0.json"), "r") as f:
+        page = json.load(f)
+    collection = {"type": "AnnotationCollection", "total": 16, "last": SEARCH + "&desc=1&page=1"}
+    return collection, page
+
+
+def test_search_uri():
+    assert search_uri(E, target_uri=T) == (
+        E + "/annotation/w3c/services/search/target?fields=source,id&value="
+        + "http%3A%2F%2Fiiif.io%2Fapi%2Fpresentation%2F2.0%2Fexample%2Ffixtures%2Fcanvas%2F19%2Fc1.json"
+    )
+    assert search_uri(E, container="/abc/") == E + "/annotation/w3c/abc/"
+    assert search_uri(E) is None
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "search_by_target_0.json"))
+def test_export_ndjson(datafiles):
+    path = str(datafiles)
+    collection, page = _pages(path)
+    for name in ["export.ndjson", "export.ndjson.gz"]:
+        out = os.path.join(path, name)
+        with aioresponses() as mock, requests_mock.Mocker() as m:
+            m.register_uri("GET", SEARCH, json=collection)
+            mock.get(SEARCH + "&desc=1&page=0", payload=page)
+            mock.get(SEARCH + "&desc=1&page=1", payload=page)
+            report = export_ndjson(SEARCH, out, window=1)
+        assert report["complete"] is True
+        assert report["items"] == 16 and report["pages"] == 2
+        assert report["bytes"] == os.path.getsize(out)
+        assert not os.path.exists(out + ".progress")
+        with (gzip.open(out, "rt") if name.endswith(".gz") else open(out, "r")) as f:
+            lines = f.read().splitlines()
+        assert [json.loads(line) for line in lines] == page["items"] * 2
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "search_by_target_0.json"))
+def test_export_ndjson_resume(datafiles):
+    path = str(datafiles)
+    collection, page = _pages(path)
+    out = os.path.join(path, "export.ndjson.gz")
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        m.register_uri("GET", SEARCH, json=collection)
+        mock.get(SEARCH + "&desc=1&page=0", payload=page)
+        mock.get(SEARCH + "&desc=1&page=1", status=500, payload={"error": "Internal Server Error"})
+        report = export_ndjson(SEARCH, out, window=1)
+    assert report["complete"] is False
+    assert report["pages"] == 1
+    with open(out + ".progress", "r") as f:
+        assert json.load(f)["pages"] == 1
+    with open(out, "ab") as f:
+        f.write(b"partial window")  # e.g. killed mid-write, discarded on resume
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        m.register_uri("GET", SEARCH, json=collection)
+        mock.get(SEARCH + "&desc=1&page=1", payload=page)
+        report = export_ndjson(SEARCH, out, window=1)
+    assert report["complete"] is True
+    assert report["resumed_from"] == 1 and report["pages"] == 1
+    assert not os.path.exists(out + ".progress")
+    with gzip.open(out, "rt") as f:
+        assert len(f.read().splitlines()) == 16
@@ -0,0 +1,75 @@
+"""
+Tests for `pyelucidate.facets` module.
+"""
+from collections import Counter
+from pyelucidate import pyelucidate as elucidate
+from pyelucidate.facets import FacetAggregator, TopK, aggregate_facets
+import json
+import os
+import pytest
+import random
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "single_topic_page0.json"))
+def test_facets_one_pass(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "single_topic_page0.json"), "r") as f:
+        items = json.load(f)["items"]
+    facets = FacetAggregator(pairs=[("body_source", "manifest")])
+    assert list(facets.tap(iter(items))) == items  # passed through unchanged
+    assert facets.annotations == 23
+    assert facets.most_common("manifest") == [("http://waylon.example.org/work/AVT", 23)]
+    assert facets.most_common("motivation") == [("tagging", 23)]
+    assert facets.most_common("creator") == list(Counter(item["creator"] for item in items).most_common())
+    topic = "https://omeka.example.org/topic/virtual:person/matter"
+    assert facets.most_common("body_source", 1) == [(topic, 23)]
+    assert facets.cooccurrence("body_source", "manifest", 1) == [((topic, "http://waylon.example.org/work/AVT"), 23)]
+    results = json.loads(json.dumps(facets.results(1)))
+    assert results["pairs"]["body_source|manifest"] == [[topic, "http://waylon.example.org/work/AVT", 23]]
+    assert facets.intern.stats()["hits"] > 0  # keys shared between annotations
+
+
+def test_facets_records_and_custom():
+    items = [
+        {"id": "a1", "body": [{"source": "https://t/1"}, {"source": "https://t/1"}], "target": "https://m/canvas/1"},
+        {"id": "a2", "body": {"id": "https://t/2"}, "target": {"source": "https://m/canvas/2"}},
+    ]
+    records = [elucidate.Annotation.from_item(item) for item in items]
+    results = aggregate_facets(records, facets=["body_source", "manifest"])
+    assert results["annotations"] == 2
+    assert sorted(results["facets"]["body_source"]) == [["https://t/1", 1], ["https://t/2", 1]]  # once per annotation
+    assert results["facets"]["manifest"] == [["https://m/manifest", 1]]  # no dcterms:isPartOf on a2
+    ids = aggregate_facets(items, facets={"id": lambda item: [item["id"]]}, intern=str)
+    assert ids["facets"] == {"id": [["a1", 1], ["a2", 1]]} and ids["pairs"] == {}
+    with pytest.raises(ValueError):
+        FacetAggregator(facets=["colour"])
+    with pytest.raises(ValueError):
+        FacetAggregator(facets=["creator"], pairs=[("creator", "manifest")])
+
+
+def test_topk_heavy_hitters():
+    rng = random.Random(1)
+    stream = ["https://t/%s" % int(rng.paretovariate(1.0)) for _ in range(20000)]
+    exact = Counter(stream)
+    sketch = TopK(20)
+    sketch.update(stream)
+    assert len(sketch) == 20 and sketch.total == len(stream) and sketch.evictions > 0
+    for key, count in exact.items():
+        if count > len(stream) / 20:
+            assert key in sketch  # guaranteed to be counted
+    for key, count in sketch.most_common():
+        assert count - sketch.error(key) <= exact[key] <= count
+    assert [k for k, _ in sketch.most_common(3)] == [k for k, _ in exact.most_common(3)]
+
+
+def test_facets_top_k_bounded():
+    items = [{"creator": "https://c/%s" % (i % 3 if i % 2 else i), "motivation": "tagging"} for i in range(2000)]
+    facets = FacetAggregator(facets=["creator", "motivation"], pairs=[("creator", "motivation")], top_k=10)
+    facets.consume(items)
+    assert len(facets.counters["creator"]) == len(facets.pair_counters[("creator", "motivation")]) == 10
+    top = facets.most_common("creator", 3)
+    assert sorted(k for k, _ in top) == ["https://c/0", "https://c/1", "https://c/2"]  # each over 2000 / 10
+    assert facets.most_common("motivation") == [("tagging", 2000)]
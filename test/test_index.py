@@ -0,0 +1,78 @@
+"""
+Tests for `pyelucidate.index` module.
+"""
+from pyelucidate import pyelucidate as elucidate
+from pyelucidate.index import AnnotationIndex, container_for
+import json
+import os
+import pytest
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+CANVAS = "http://iiif.io/api/presentation/2.0/example/fixtures/canvas/19/c1.json"
+CONTAINER = "6913ae2c2f5a7b6e59bc1d88192be0f6"
+
+
+def load_items(path: str) -> list:
+    with open(os.path.join(path, "search_by_target.json"), "r") as f:
+        return json.load(f)["first"]["items"]
+
+
+def test_container_for():
+    anno_id = "https://elucidate.example.org/annotation/w3c/%s/274105bd" % CONTAINER
+    assert container_for(anno_id) == CONTAINER
+    assert container_for("https://example.org/anno/1", CANVAS) == elucidate.hashlib.md5(
+        CANVAS.encode("utf-8")
+    ).hexdigest()
+    assert container_for(None) is None
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "search_by_target.json"))
+def test_index_lookups(datafiles):
+    items = load_items(str(datafiles))
+    index = AnnotationIndex(batch_size=3)
+    assert index.add_all(items) == 8
+    assert len(index) == 8
+    assert items[0]["id"] in index
+    assert list(index.targets()) == [CANVAS]
+    assert index.count_by_target() == {CANVAS: 8}
+    assert sorted(index.ids_by_target(CANVAS)) == sorted(i["id"] for i in items)
+    assert sorted(index.ids_by_container(CONTAINER)) == sorted(i["id"] for i in items)
+    assert list(index.ids_by_target("https://example.org/nothing")) == []
+    index.remove(items[0]["id"])
+    assert items[0]["id"] not in index
+    index.close()
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "search_by_target.json"))
+def test_index_items(datafiles):
+    items = load_items(str(datafiles))
+    with AnnotationIndex() as index:
+        index.add_all(elucidate.Annotation.from_item(i) for i in items)
+        assert sorted(index.items_by_target(CANVAS), key=lambda x: x["id"]) == sorted(
+            items, key=lambda x: x["id"]
+        )
+        oa = list(index.items_by_container(CONTAINER, trans_function=elucidate.mirador_oa))
+        assert len(oa) == 8
+        assert all(o["@type"] == "oa:Annotation" for o in oa)
+        index.add(items[0], etag='W/"abc"')
+        assert index.etag(items[0]["id"]) == 'W/"abc"'
+        index.add_all(items)  # listed again, without ETags
+        assert index.etag(items[0]["id"]) == 'W/"abc"' and len(index) == 8
+        index.add(items[0], etag='W/"def"')
+        assert index.etag(items[0]["id"]) == 'W/"def"'
+        index.add(dict(items[0], motivation="commenting"))  # changed, so the ETag no longer matches
+        assert index.etag(items[0]["id"]) is None
+        updated = [i for i in index.items_by_target(CANVAS) if i["id"] == items[0]["id"]]
+        assert [i["motivation"] for i in updated] == ["commenting"]
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "search_by_target.json"))
+def test_index_persistent(datafiles, tmpdir):
+    path = os.path.join(str(tmpdir), "index.db")
+    with AnnotationIndex(path, store_content=False) as index:
+        index.add_all(load_items(str(datafiles)))
+        with pytest.raises(ValueError):
+            list(index.items_by_target(CANVAS))
+    with AnnotationIndex(path) as index:
+        assert len(index) == 8
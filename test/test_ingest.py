@@ -0,0 +1,115 @@
+"""
+Tests for `pyelucidate.ingest` module.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pyelucidate import ingest, pyelucidate as elucidate
+from pyelucidate.ingest import add_context, ingest_ndjson, scan_annotation
+import hashlib
+import json
+import os
+import pytest
+import requests
+import requests_mock
+import threading
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+E = "https://elucidate.example.org"
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "single_anno.json"),
+    os.path.join(FIXTURE_DIR, "single_anno_single_body_multi_target.json"),
+)
+def test_scan_annotation(datafiles):
+    path = str(datafiles)
+    for name in ["single_anno.json", "single_anno_single_body_multi_target.json"]:
+        with open(os.path.join(path, name), "r") as f:
+            data = f.read()
+        anno = json.loads(data)
+        assert scan_annotation(data) == (elucidate.identify_target(anno), "@context" in anno)
+    nested = '{"body": {"value": "\\"target\\": \\"no\\"", "target": "no"}, "target": "https://c/1#xywh=0,0,1,1"}'
+    assert scan_annotation(nested) == ("https://c/1", False)
+
+
+def test_add_context():
+    data = '{"type":"Annotation","target":"https://c/1"}'
+    assert json.loads(add_context(data)) == {
+        "@context": "http://www.w3.org/ns/anno.jsonld",
+        "type": "Annotation",
+        "target": "https://c/1",
+    }
+
+
+def test_ingest_ndjson(tmpdir):
+    targets = ["https://iiif.example.org/canvas/%s" % (i % 2) for i in range(4)]
+    path = os.path.join(str(tmpdir), "annotations.ndjson")
+    with open(path, "w") as f:
+        for i, target in enumerate(targets):
+            anno = {"type": "Annotation", "body": {"value": str(i)}, "target": target}
+            if i == 0:
+                anno["@context"] = "http://www.w3.org/ns/anno.jsonld"
+            f.write(json.dumps(anno) + "\n")
+    with open(path, "rb") as f:
+        first = f.readline()
+    with requests_mock.Mocker() as mock:
+        for target in set(targets):
+            container = hashlib.md5(target.encode("utf-8")).hexdigest()
+            uri = E + "/annotation/w3c/" + container + "/"
+            mock.register_uri("GET", uri, status_code=200)
+            mock.register_uri("POST", uri, status_code=201, json={"id": uri + "1"})
+        limited = []
+
+        class Limiter:
+            def acquire(self, url, method):
+                limited.append((method, url))
+
+        results = list(ingest_ndjson(path, E, dry_run=False, workers=2, limiter=Limiter()))
+        assert [r["line"] for r in results] == [1, 2, 3, 4]
+        assert all(r["status"] == 201 and r["success"] for r in results)
+        assert sorted(limited) == sorted((r.method, r.url) for r in mock.request_history)  # containers too
+        posts = [r for r in mock.request_history if r.method == "POST"]
+        gets = [r for r in mock.request_history if r.method == "GET"]
+        assert len(posts) == 4
+        assert len(gets) == 2  # each container is only checked once
+        by_body = {json.loads(r.body)["body"]["value"]: r.body for r in posts}
+        assert by_body["0"] == first  # original bytes
+        assert json.loads(by_body["1"])["@context"] == "http://www.w3.org/ns/anno.jsonld"
+
+
+def test_ingest_ndjson_dry_run():
+    lines = ['{"target": "https://iiif.example.org/canvas/1"}', '{"body": "no target"}', "{not json"]
+    results = list(ingest_ndjson(lines, E, dry_run=True))
+    assert [r["status"] for r in results] == [200, 400, 400]
+    assert [r["success"] for r in results] == [True, False, False]
+
+
+def test_ingest_ndjson_request_error():
+    lines = [json.dumps({"type": "Annotation", "target": "https://iiif.example.org/canvas/%s" % i}) for i in range(2)]
+    uri = E + "/annotation/w3c/" + hashlib.md5(b"https://iiif.example.org/canvas/1").hexdigest() + "/"
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", requests_mock.ANY, status_code=200)
+        mock.register_uri("POST", requests_mock.ANY, status_code=201, json={"id": E + "/annotation/w3c/c/1"})
+        mock.register_uri("POST", uri, exc=requests.exceptions.ConnectionError)
+        results = list(ingest_ndjson(lines, E, dry_run=False, workers=2))
+    assert [r["status"] for r in results] == [201, None]
+    assert results[1]["success"] is False
+
+
+def test_container_cache_lock_per_container(monkeypatch):
+    others = threading.Semaphore(0)
+    waited = []
+
+    def create_container(container_name, **kwargs):
+        if container_name == "slow":  # returns once the others are checked, if they aren't held up
+            waited.append(all(others.acquire(timeout=5) for _ in range(2)))
+        else:
+            others.release()
+        return 200
+
+    monkeypatch.setattr(ingest, "create_container", create_container)
+    containers = ingest.ContainerCache()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        statuses = list(executor.map(lambda c: containers.ensure(c, E, None), ["slow", "a", "b"]))
+    assert statuses == [200, 200, 200] and waited == [True]
+    assert "slow" in containers and "a" in containers
@@ -0,0 +1,23 @@
+"""
+Tests for `pyelucidate.journal` module.
+"""
+from pyelucidate.journal import Journal
+import os
+
+
+def test_journal(tmpdir):
+    path = os.path.join(str(tmpdir), "journal.sqlite")
+    with Journal(path, batch_size=2) as journal:
+        journal.record_deleted("https://elucidate.example.org/annotation/w3c/foo/1")
+        assert journal.is_deleted("https://elucidate.example.org/annotation/w3c/foo/1")  # pending
+        journal.record_deleted("https://elucidate.example.org/annotation/w3c/foo/2", status=412)
+        journal.mark_canvas("https://example.org/manifest", "https://example.org/canvas/1")
+        journal.mark_canvas("https://example.org/manifest", "https://example.org/canvas/2", False)
+    with Journal(path) as journal:  # resume from the file
+        assert journal.is_deleted("https://elucidate.example.org/annotation/w3c/foo/1")
+        assert not journal.is_deleted("https://elucidate.example.org/annotation/w3c/foo/2")
+        assert not journal.is_deleted("https://elucidate.example.org/annotation/w3c/foo/3")
+        assert journal.completed_canvases("https://example.org/manifest") == {
+            "https://example.org/canvas/1"
+        }
+        assert journal.completed_canvases("https://example.org/other") == set()
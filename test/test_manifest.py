@@ -0,0 +1,139 @@
+"""
+Tests for `pyelucidate.manifest` module.
+"""
+from pyelucidate import manifest as manifest_module
+from pyelucidate.manifest import CanvasIds, canvas_ids, read_ahead
+import json
+import os
+import pytest
+import time
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+
+P3_MANIFEST = {
+    "@context": "http://iiif.io/api/presentation/3/context.json",
+    "id": "https://iiif.example.org/manifest",
+    "type": "Manifest",
+    "label": {"en": ['A "quoted" label, with [brackets], {braces} and \u00e9']},
+    "items": [
+        {
+            "id": "https://iiif.example.org/canvas/%s" % i,
+            "type": "Canvas",
+            "items": [
+                {
+                    "id": "https://iiif.example.org/page/%s" % i,
+                    "type": "AnnotationPage",
+                    "items": [{"id": "https://iiif.example.org/anno/%s" % i, "type": "Annotation"}],
+                }
+            ],
+        }
+        for i in range(3)
+    ],
+}
+
+
+def chunked(data: bytes, size: int) -> list:
+    return [data[i: i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "manifest_fixture.json"))
+def test_canvas_ids_p2(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "manifest_fixture.json"), "rb") as f:
+        data = f.read()
+    manifest = json.loads(data.decode("utf-8"))
+    expected = [c["@id"] for c in manifest["sequences"][0]["canvases"]]
+    for size in (1, 7, 4096):
+        canvases = CanvasIds(chunked(data, size))
+        assert list(canvases) == expected
+        assert canvases.manifest_id == manifest["@id"]
+        assert canvases.version == 2
+
+
+def test_canvas_ids_p3():
+    data = json.dumps(P3_MANIFEST, ensure_ascii=False).encode("utf-8")
+    for size in (1, 3, 100000):
+        canvases = CanvasIds(chunked(data, size))
+        assert list(canvases) == ["https://iiif.example.org/canvas/%s" % i for i in range(3)]
+        assert canvases.manifest_id == "https://iiif.example.org/manifest"
+        assert canvases.version == 3
+
+
+def test_canvas_ids_stops_early():
+    manifest = dict(P3_MANIFEST, structures=[{"id": "https://iiif.example.org/range"}])
+    data = json.dumps(manifest)
+    data = data[: data.index('"structures"') + 20]  # the rest is never read
+    closed = []
+    canvases = CanvasIds([data], close=lambda: closed.append(True))
+    assert len(list(canvases)) == 3
+    assert closed == [True]
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "manifest_fixture_no_canvases.json"))
+def test_canvas_ids_no_canvases(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "manifest_fixture_no_canvases.json"), "r") as f:
+        canvases = CanvasIds([f.read()])
+    assert list(canvases) == []
+    assert canvases.version is None
+    assert canvases.has_sequences is True
+
+
+def test_canvas_ids_truncated():
+    with pytest.raises(ValueError):
+        list(canvas_ids(['{"items": [{"id": "https://iiif.exa']))
+
+
+def test_canvas_ids_ignores_other_ids():
+    manifest = {
+        "@id": "https://iiif.example.org/manifest",
+        "structures": [{"id": "https://iiif.example.org/range", "items": [{"id": "x"}]}],
+        "sequences": [
+            {"canvases": [{"@id": "c1", "images": [{"@id": "i1"}], "height": 12345}, {"@id": "c2"}]},
+            {"canvases": [{"@id": "c3"}]},
+        ],
+    }
+    data = json.dumps(manifest)
+    for size in (1, 5, 4096):
+        assert list(canvas_ids(chunked(data, size))) == ["c1", "c2"]
+
+
+def test_canvas_ids_large_skipped_values(monkeypatch):
+    images = [{"@id": 'https://iiif.example.org/image/%s \\"[{' % i, "on": [i, None, True]} for i in range(2000)]
+    manifest = {
+        "@id": "https://iiif.example.org/manifest",
+        "sequences": [{"canvases": [{"@id": "c1", "images": images, "label": "x" * 5000}, {"@id": "c2"}]}],
+    }
+    data = json.dumps(manifest)
+    decoded = []
+
+    class Decoder:
+        def raw_decode(self, s, idx=0):
+            decoded.append(idx)
+            return json.JSONDecoder().raw_decode(s, idx)
+
+    monkeypatch.setattr(manifest_module, "_DECODER", Decoder())
+    for size in (1, 2, 7, 1000):
+        decoded.clear()
+        assert list(canvas_ids(chunked(data, size))) == ["c1", "c2"]
+        assert len(decoded) < 20  # each value is decoded at most once, not again for each chunk
+    with pytest.raises(ValueError):
+        list(canvas_ids(chunked(data[: data.index("image/1000")], 100)))  # inside the images
+
+
+def test_read_ahead():
+    data = json.dumps(P3_MANIFEST).encode("utf-8")
+    canvases = CanvasIds(chunked(data, 10))
+    ids = read_ahead(canvases)
+    assert next(ids) == "https://iiif.example.org/canvas/0"
+    waited = time.monotonic()
+    while canvases.count < 3 and time.monotonic() - waited < 5:
+        time.sleep(0.01)
+    assert canvases.count == 3  # read while the first canvas is still being used
+    assert list(ids) == ["https://iiif.example.org/canvas/%s" % i for i in (1, 2)]
+    assert canvases.manifest_id == "https://iiif.example.org/manifest"
+    truncated = read_ahead(canvas_ids([data[: data.index(b"canvas/1")]]))
+    assert next(truncated) == "https://iiif.example.org/canvas/0"
+    with pytest.raises(ValueError):
+        next(truncated)
@@ -0,0 +1,101 @@
+"""
+Tests for `pyelucidate.merge` module.
+"""
+from pyelucidate import merge
+from pyelucidate.merge import read_mapping, run_merge
+import json
+import os
+import requests_mock
+import threading
+
+
+E = "https://elucidate.example.org"
+T = "https://omeka.example.org/topics/"
+
+
+def write_csv(path):
+    with open(path, "w") as f:
+        f.write("old_topic,new_topic\n")
+        for i in range(5):
+            f.write("%sold%s,%snew%s\n" % (T, i, T, i % 2))
+        f.write("%sgone,\n" % T)
+
+
+def test_read_mapping(tmpdir):
+    path = os.path.join(str(tmpdir), "mapping.csv")
+    write_csv(path)
+    pairs = list(read_mapping(path))
+    assert len(pairs) == 6
+    assert pairs[0] == (T + "old0", T + "new0")
+    assert pairs[-1] == (T + "gone", None)
+    ndjson = os.path.join(str(tmpdir), "mapping.ndjson")
+    with open(ndjson, "w") as f:
+        for old, new in pairs:
+            f.write(json.dumps({"old_topic": old, "new_topic": new}) + "\n")
+    assert list(read_mapping(ndjson)) == pairs
+
+
+def test_run_merge(tmpdir):
+    path = os.path.join(str(tmpdir), "mapping.csv")
+    results = os.path.join(str(tmpdir), "results.ndjson")
+    write_csv(path)
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("POST", E + "/annotation/w3c/services/batch/update", status_code=200)
+        mock.register_uri("POST", E + "/annotation/w3c/services/batch/delete", status_code=200)
+        summary = run_merge(path, E, results_path=results, dry_run=False, workers=2)
+        assert mock.call_count == 3  # two groups, and one delete
+    assert summary["pairs"] == 6
+    assert summary["succeeded"] == 6
+    assert summary["failed"] == 0
+    with open(results) as f:
+        lines = [json.loads(line) for line in f]
+    assert sorted(r["old_topic"] for r in lines) == sorted(
+        [T + "old%s" % i for i in range(5)] + [T + "gone"]
+    )
+    assert [r["action"] for r in lines if r["new_topic"] is None] == ["delete"]
+
+
+def test_run_merge_resume(tmpdir):
+    path = os.path.join(str(tmpdir), "mapping.csv")
+    results = os.path.join(str(tmpdir), "results.ndjson")
+    write_csv(path)
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("POST", E + "/annotation/w3c/services/batch/update", status_code=200)
+        mock.register_uri("POST", E + "/annotation/w3c/services/batch/delete", status_code=500)
+        summary = run_merge(path, E, results_path=results, dry_run=False, retries=0)
+        assert summary["failed"] == 1
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("POST", E + "/annotation/w3c/services/batch/delete", status_code=200)
+        summary = run_merge(path, E, results_path=results, dry_run=False)
+        assert mock.call_count == 1  # only the failed delete is retried
+        body = json.loads(mock.request_history[0].text)
+        assert body["body"]["id"] == T + "gone"
+    assert summary["skipped"] == 5
+    assert summary["succeeded"] == 1
+
+
+def test_run_merge_deletes_concurrent(tmpdir, monkeypatch):
+    path = os.path.join(str(tmpdir), "mapping.csv")
+    with open(path, "w") as f:
+        for i in range(20):
+            f.write("%sgone%s,\n" % (T, i))
+    lock = threading.Lock()
+    calls = []
+    started = threading.Barrier(3, timeout=5)  # only passed if 3 deletes run at once
+
+    def batch_delete_topic(topic_id, elucidate_base, **kwargs):
+        with lock:
+            calls.append(topic_id)
+            first = len(calls) <= 3
+        if first:
+            started.wait()
+        return (500, "") if topic_id == T + "gone7" and calls.count(topic_id) == 1 else (200, "")
+
+    monkeypatch.setattr(merge, "batch_delete_topic", batch_delete_topic)
+    results = os.path.join(str(tmpdir), "results.ndjson")
+    summary = run_merge(path, E, results_path=results, dry_run=False, workers=3, retries=1, backoff=0)
+    assert summary["succeeded"] == 20 and summary["failed"] == 0
+    assert len(calls) == 21  # one delete retried
+    with open(results) as f:
+        attempts = {r["old_topic"]: r["attempts"] for r in map(json.loads, f)}
+    assert attempts[T + "gone7"] == 2
@@ -0,0 +1,127 @@
+"""
+Tests for `pyelucidate.mirror` module.
+"""
+from pyelucidate import pyelucidate as elucidate
+from pyelucidate.mirror import ContainerMirror
+import copy
+import json
+import os
+import pytest
+import requests_mock
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+E = "https://elucidate.example.org"
+CONTAINER = "6913ae2c2f5a7b6e59bc1d88192be0f6"
+
+
+def load(path: str):
+    with open(os.path.join(path, "container.json"), "r") as f:
+        container = json.load(f)
+    with open(os.path.join(path, "container_page.json"), "r") as f:
+        page = json.load(f)
+    return container, page, list(elucidate.annotation_pages(container))[0]
+
+
+def not_modified_or(page: dict, etag: str):
+    def callback(request, context):
+        if request.headers.get("If-None-Match") == etag:
+            context.status_code = 304
+            return None
+        context.headers["ETag"] = etag
+        return page
+
+    return callback
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "container.json"), os.path.join(FIXTURE_DIR, "container_page.json")
+)
+def test_mirror_refresh(datafiles):
+    container, page, page_uri = load(str(datafiles))
+    mirror = ContainerMirror()
+    with requests_mock.Mocker() as mock:
+        mock.register_uri(
+            "GET", E + "/annotation/w3c/" + CONTAINER + "/", json=not_modified_or(container, '"c1"')
+        )
+        mock.register_uri("GET", page_uri, json=not_modified_or(page, '"p1"'))
+        report = mirror.refresh(E, CONTAINER)
+        assert report["complete"] is True
+        assert sorted(report["added"]) == sorted(i["id"] for i in page["items"])
+        assert report["pages_modified"] == 1
+        assert list(mirror.ids(CONTAINER)) == sorted(i["id"] for i in page["items"])
+
+        report = mirror.refresh(E, CONTAINER)
+        assert report["complete"] is True
+        assert report["added"] == report["changed"] == report["removed"] == []
+        assert report["pages_not_modified"] == 1
+        assert report["bytes"] == 0
+        assert mock.request_history[-1].headers["If-None-Match"] == '"p1"'
+    assert len(list(mirror.items(CONTAINER))) == 8
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "container.json"), os.path.join(FIXTURE_DIR, "container_page.json")
+)
+def test_mirror_changes(datafiles):
+    container, page, page_uri = load(str(datafiles))
+    mirror = ContainerMirror()
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", E + "/annotation/w3c/" + CONTAINER + "/", json=container)
+        mock.register_uri("GET", page_uri, json=page)
+        mirror.refresh(E, CONTAINER)
+        changed = copy.deepcopy(page)
+        removed = changed["items"].pop()
+        changed["items"][0]["motivation"] = "commenting"
+        mock.register_uri("GET", page_uri, json=changed, headers={"ETag": '"p2"'})
+        report = mirror.refresh(E, CONTAINER)
+    assert report["added"] == []
+    assert report["changed"] == [page["items"][0]["id"]]
+    assert report["removed"] == [removed["id"]]
+    assert len(list(mirror.ids(CONTAINER))) == 7
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "container.json"), os.path.join(FIXTURE_DIR, "container_page.json")
+)
+def test_mirror_failed_refresh(datafiles):
+    container, page, page_uri = load(str(datafiles))
+    mirror = ContainerMirror()
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", E + "/annotation/w3c/" + CONTAINER + "/", json=container)
+        mock.register_uri("GET", page_uri, status_code=500)
+        report = mirror.refresh(E, CONTAINER)
+    assert report["complete"] is False
+    assert list(mirror.ids(CONTAINER)) == []
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "container.json"), os.path.join(FIXTURE_DIR, "container_page.json")
+)
+def test_mirror_refresh_bounded(datafiles):
+    container, page, page_uri = load(str(datafiles))
+    container["last"] = container["last"].replace("page=0", "page=19")
+    pages = list(elucidate.annotation_pages(container))
+    mirror = ContainerMirror()
+    store = mirror._store
+    outstanding = []
+
+    def counting_store(*args):
+        outstanding.append(len(mock.request_history) - 1 - len(outstanding))  # fetched, not yet stored
+        return store(*args)
+
+    mirror._store = counting_store
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", E + "/annotation/w3c/" + CONTAINER + "/", json=container)
+        for i, uri in enumerate(pages):
+            items = [dict(item, id=item["id"] + "-%s" % i) for item in page["items"]]
+            mock.register_uri("GET", uri, json=dict(page, items=items))
+        report = mirror.refresh(E, CONTAINER, workers=2)
+        assert report["complete"] is True and report["pages"] == 20
+        assert len(list(mirror.ids(CONTAINER))) == 160
+        assert max(outstanding) <= 4  # pages are written as they arrive, not all fetched first
+        mock.register_uri("GET", pages[5], text="{not json", headers={"ETag": '"p2"'})
+        report = mirror.refresh(E, CONTAINER, workers=2)
+    assert report["complete"] is False
+    assert not mirror._conn.in_transaction  # rolled back
+    assert len(list(mirror.ids(CONTAINER))) == 160
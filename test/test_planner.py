@@ -0,0 +1,108 @@
+"""
+Tests for `pyelucidate.planner` module.
+"""
+from pyelucidate import pyelucidate as elucidate
+from pyelucidate.planner import plan_target, planned_delete_by_target
+import json
+import os
+import pytest
+import requests_mock
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+E = "https://elucidate.example.org"
+T = "https://example.org/canvas/1"
+SEARCH = elucidate.gen_search_by_target_uri(target_uri=T, elucidate_base=E)
+CONTAINER = elucidate.gen_search_by_container_uri(elucidate_base=E, target_uri=T)
+
+
+def _load(path, name):
+    with open(os.path.join(path, name), "r") as f:
+        return json.load(f)
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "search_by_target.json"),
+    os.path.join(FIXTURE_DIR, "container.json"),
+)
+def test_plan_batch(datafiles):
+    path = str(datafiles)
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", SEARCH, json=_load(path, "search_by_target.json"))
+        mock.register_uri("GET", CONTAINER, json=_load(path, "container.json"))
+        plan = plan_target(T, E)
+        assert plan["strategy"] == "batch" and plan["requests"] == 1
+        assert plan["totals"] == {"container": 8, "search": 8}
+        assert plan["probes"] == mock.call_count == 2
+        mock.register_uri("POST", E + "/annotation/w3c/services/batch/delete", status_code=200)
+        assert planned_delete_by_target(T, E, dry_run=False)
+        assert mock.request_history[-1].method == "POST"
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "search_by_target.json"),
+    os.path.join(FIXTURE_DIR, "container.json"),
+)
+def test_plan_etag_deletes(datafiles):
+    path = str(datafiles)
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", SEARCH, json=_load(path, "search_by_target.json"))
+        mock.register_uri("GET", CONTAINER, json=_load(path, "container.json"))
+        plan = plan_target(T, E, etag_deletes=True)
+        # one page of 8, a GET and a DELETE each, then listing again
+        assert plan["estimates"] == {"container": 1 + 16 + 1, "search": 1 + 16 + 1}
+        assert plan["strategy"] == "container"
+        listing = plan_target(T, E, operation="list", strategies=("search",))
+        assert listing["strategy"] == "search" and listing["requests"] == 1
+        assert listing["probes"] == 1
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "search_by_target.json"),
+    os.path.join(FIXTURE_DIR, "container_empty.json"),
+)
+def test_plan_container_mismatch(datafiles):
+    path = str(datafiles)
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", SEARCH, json=_load(path, "search_by_target.json"))
+        mock.register_uri("GET", CONTAINER, json=_load(path, "container_empty.json"))
+        plan = plan_target(T, E, etag_deletes=True)
+    assert "container" not in plan["estimates"]
+    assert plan["strategy"] == "search"
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "container_empty.json"))
+def test_plan_nothing_to_do(datafiles):
+    path = str(datafiles)
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", SEARCH, json=_load(path, "container_empty.json"))
+        mock.register_uri("GET", CONTAINER, status_code=404)
+        assert plan_target(T, E, etag_deletes=True)["strategy"] == "none"
+        assert planned_delete_by_target(T, E, dry_run=False, etag_deletes=True)
+        assert all(r.method == "GET" for r in mock.request_history)
+        mock.register_uri("GET", SEARCH, status_code=500)
+        assert plan_target(T, E, strategies=("search",), etag_deletes=True)["strategy"] is None
+        assert not planned_delete_by_target(T, E, strategies=("search",), etag_deletes=True)
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "search_by_target.json"),
+    os.path.join(FIXTURE_DIR, "container.json"),
+)
+def test_plan_batch_deadline(datafiles):
+    path = str(datafiles)
+    deadline = elucidate.Deadline(60)
+
+    def container(request, context):
+        deadline.expires = 0  # the deadline runs out while planning
+        return _load(path, "container.json")
+
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", SEARCH, json=_load(path, "search_by_target.json"))
+        mock.register_uri("GET", CONTAINER, json=container)
+        mock.register_uri("POST", E + "/annotation/w3c/services/batch/delete", status_code=200)
+        assert not planned_delete_by_target(T, E, dry_run=False, deadline=deadline)
+        assert all(r.method == "GET" for r in mock.request_history)
+        with pytest.raises(elucidate.DeadlineExceeded):
+            elucidate.batch_delete_target(T, E, dry_run=False, deadline=deadline)
+        assert all(r.method == "GET" for r in mock.request_history)
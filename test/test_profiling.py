@@ -0,0 +1,90 @@
+"""
+Tests for `pyelucidate.profiling` module.
+"""
+from aioresponses import aioresponses
+from pyelucidate import pyelucidate as elucidate
+from pyelucidate.cli import main
+from pyelucidate.profiling import Profile, phases
+import asyncio
+import json
+import os
+import pstats
+import pytest
+import requests_mock
+import tracemalloc
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "single_topic_page.json"),
+    os.path.join(FIXTURE_DIR, "single_topic_page0.json"),
+)
+def test_profile_get_items(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "single_topic_page.json"), "r") as f:
+        j = json.load(f)
+    with open(os.path.join(path, "single_topic_page0.json"), "r") as f:
+        j0 = json.load(f)
+    url = (
+        "https://elucidate.example.org/annotation/w3c/services/search/body?fields=id,source&value="
+        + "https%3A%2F%2Fomeka.example.org%2Ftopic%2Fvirtual%3Aperson%2Fmatter"
+    )
+    url2 = (
+        "https://elucidate.example.org/annotation/w3c/services/search/body?fields=id%2Csource&value="
+        + "https%3A%2F%2Fomeka.example.org%2Ftopic%2Fvirtual%3Aperson%2Fmatter&desc=1&page=0"
+    )
+    prefix = os.path.join(path, "get_items")
+    assert phases() is None
+    with requests_mock.Mocker() as mock, Profile(prefix) as profile:
+        mock.register_uri("GET", url, json=j)
+        mock.register_uri("GET", url2, json=j0)
+        assert phases() is profile.phases
+        items = [
+            elucidate.transform_annotation(item, transform_function=elucidate.mirador_oa)
+            for item in elucidate.get_items(uri=url)
+        ]
+        mock_calls = mock.call_count
+    assert phases() is None
+    assert len(items) == 23
+    report = profile.report()
+    assert report["phases"]["network"]["count"] == report["phases"]["decode"]["count"] == mock_calls
+    assert report["phases"]["copy"]["count"] == report["phases"]["transform"]["count"] == 23
+    assert report["modules"]["copy"] > 0
+    assert report["memory"]["peak"] > 0
+    pstats.Stats(prefix + ".prof")
+    tracemalloc.Snapshot.load(prefix + ".tracemalloc")
+    with open(prefix + ".json", "r") as f:
+        assert json.load(f)["phases"] == report["phases"]
+    assert "network" in profile.format_report()
+
+
+def test_profile_fetch():
+    urls = ["https://elucidate.example.org/page/%s" % i for i in range(3)]
+    with aioresponses() as mock, Profile(memory=False) as profile:
+        for url in urls:
+            mock.get(url, payload={"items": []})
+        loop = asyncio.new_event_loop()
+        results = loop.run_until_complete(elucidate.fetch_all(urls))
+        loop.close()
+    assert results == [{"items": []}] * 3
+    report = profile.report()
+    assert report["phases"]["network"]["count"] == report["phases"]["decode"]["count"] == 3
+    assert "memory" not in report
+
+
+def test_profile_nested():
+    with Profile(memory=False):
+        with pytest.raises(RuntimeError):
+            with Profile(memory=False):
+                pass
+
+
+def test_cli_profile(tmpdir, capsys):
+    prefix = os.path.join(str(tmpdir), "delete")
+    assert main(
+        ["--elucidate", "https://elucidate.example.org", "--profile", prefix, "delete-topic", "https://t/1"]
+    ) == 0
+    assert os.path.exists(prefix + ".prof") and os.path.exists(prefix + ".json")
+    assert capsys.readouterr().err.startswith("elapsed ")
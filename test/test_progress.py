@@ -0,0 +1,95 @@
+"""
+Tests for `pyelucidate.progress` module.
+"""
+from aioresponses import aioresponses
+from pyelucidate import pyelucidate as elucidate
+from pyelucidate.progress import Progress, StatusLine
+import io
+import json
+import os
+import pytest
+import requests_mock
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+
+
+def test_progress_throttled():
+    calls = []
+    progress = Progress(callback=lambda snapshot, final=False: calls.append((snapshot, final)), interval=3600)
+    progress.add(pages_total=4)
+    progress.add(pages=1, items=10)
+    assert calls == []  # interval not yet passed
+    snapshot = progress.snapshot()
+    assert (snapshot["pages"], snapshot["pages_total"], snapshot["items"]) == (1, 4, 10)
+    assert snapshot["eta"] is not None
+    progress.interval = 0
+    progress.add(deletes=2, failures=1)
+    assert len(calls) == 1 and calls[0][0]["deletes"] == 2 and calls[0][1] is False
+    progress.close()
+    assert calls[-1][1] is True and calls[-1][0]["failures"] == 1
+
+
+def test_status_line():
+    stream = io.StringIO()
+    line = StatusLine(stream)
+    with Progress(callback=line, interval=3600) as progress:
+        progress.add(pages_total=40)
+        progress.add(pages=12, items=1200, deletes=300, failures=2, canvases=3)
+    out = stream.getvalue()
+    assert out.count("\n") == 1  # not a terminal, so a line per update
+    assert out.startswith("pages 12/40 | items 1200 | deletes 300 (2 failed) | canvases 3 | ")
+    assert "ETA" in out
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "search_by_target.json"),
+    os.path.join(FIXTURE_DIR, "search_by_target_0.json"),
+)
+def test_items_by_target_progress(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "search_by_target.json"), "r") as f:
+        search_by_target = json.load(f)
+    with open(os.path.join(path, "search_by_target_0.json"), "r") as f0:
+        search_by_target_page = json.load(f0)
+    t = "http://iiif.io/api/presentation/2.0/example/fixtures/canvas/19/c1.json"
+    q = "http%3A%2F%2Fiiif.io%2Fapi%2Fpresentation%2F2.0%2Fexample%2Ffixtures%2Fcanvas%2F19%2Fc1.json"
+    e = "https://elucidate.example.org/annotation/w3c/services/search/target?fields=source"
+    progress = Progress(callback=lambda snapshot, final=False: None)
+    with aioresponses() as mock, requests_mock.Mocker() as m:
+        m.register_uri("GET", e + ",id&value=" + q, json=search_by_target)
+        mock.get(e + "&value=" + q + "&desc=1&page=0", payload=search_by_target_page)
+        items = list(
+            elucidate.async_items_by_target("https://elucidate.example.org", t, progress=progress)
+        )
+    snapshot = progress.snapshot()
+    assert (snapshot["pages"], snapshot["pages_total"], snapshot["items"]) == (1, 1, len(items))
+    assert snapshot["eta"] == 0
+
+
+def test_iterative_delete_by_manifest_progress():
+    manifest = {
+        "@id": "https://example.org/iiif/foo/manifest",
+        "sequences": [{"canvases": [{"@id": "https://example.org/iiif/foo/canvas/c1"}]}],
+    }
+    e = "https://elucidate.example.org"
+    progress = Progress(callback=lambda snapshot, final=False: None)
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", url=manifest["@id"], json=manifest)
+        mock.register_uri(
+            "GET",
+            elucidate.gen_search_by_container_uri(elucidate_base=e, target_uri=manifest["@id"]),
+            status_code=404,
+        )
+        container = elucidate.gen_search_by_container_uri(
+            elucidate_base=e, target_uri="https://example.org/iiif/foo/canvas/c1"
+        )
+        anno_uris = [container + str(i) for i in range(3)]
+        mock.register_uri("GET", container, json={"id": container, "first": {"items": [{"id": a} for a in anno_uris]}})
+        for anno_uri in anno_uris:
+            mock.register_uri("GET", anno_uri, headers={"ETag": 'W/"92d4"'}, json={"id": anno_uri})
+        assert elucidate.iiif_iterative_delete_by_manifest(
+            manifest["@id"], e, method="container", dry_run=True, progress=progress
+        )
+    snapshot = progress.snapshot()
+    assert (snapshot["deletes"], snapshot["failures"], snapshot["canvases"]) == (3, 0, 1)
@@ -2,11 +2,14 @@
 Tests for `pyelucidate` module.
 """
 from pyelucidate import pyelucidate as elucidate
+from pyelucidate.journal import Journal
 import json
+import requests
 import requests_mock
 import types
 import os
 import pytest
+import time
 
 
 FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
@@ -1351,6 +1354,117 @@ def test_batch_update_topics_error():
         assert result_code == 500
 
 
+def test_batch_update_topics_chunked():
+    with requests_mock.Mocker() as mock:
+        e = "https://elucidate.example.org"
+        mock.register_uri("POST", url=e + "/annotation/w3c/services/batch/update", status_code=200)
+        n = "https://omeka.example.org/topics/person/new"
+        o = ["https://omeka.example.org/topics/person/old%s" % i for i in range(25)]
+        results = elucidate.batch_update_body_chunked(
+            new_topic_id=n, old_topic_ids=o, elucidate_base=e, dry_run=False, chunk_size=10, workers=2
+        )
+        assert mock.call_count == 3
+        assert [r["chunk"] for r in results] == [0, 1, 2]
+        assert [len(r["topic_ids"]) for r in results] == [10, 10, 5]
+        assert sum([r["topic_ids"] for r in results], []) == o
+        assert all(r["status"] == 200 and r["attempts"] == 1 for r in results)
+        posted = sorted(
+            b["id"] for req in mock.request_history for b in json.loads(req.text)["body"]
+        )
+        assert posted == sorted(o)
+
+
+def test_batch_update_topics_chunked_retry():
+    with requests_mock.Mocker() as mock:
+        e = "https://elucidate.example.org"
+        mock.register_uri(
+            "POST",
+            url=e + "/annotation/w3c/services/batch/update",
+            response_list=[{"status_code": 504}, {"status_code": 500}, {"status_code": 200}],
+        )
+        n = "https://omeka.example.org/topics/person/new"
+        o = ["https://omeka.example.org/topics/person/old"]
+        results = elucidate.batch_update_body_chunked(
+            new_topic_id=n, old_topic_ids=o, elucidate_base=e, dry_run=False, backoff=0
+        )
+        assert results[0]["status"] == 200
+        assert results[0]["attempts"] == 3
+
+
+def test_batch_update_topics_chunked_client_error():
+    with requests_mock.Mocker() as mock:
+        e = "https://elucidate.example.org"
+        mock.register_uri(
+            "POST",
+            url=e + "/annotation/w3c/services/batch/update",
+            response_list=[{"status_code": 429}, {"exc": requests.exceptions.ConnectTimeout}, {"status_code": 400}],
+        )
+        n = "https://omeka.example.org/topics/person/new"
+        o = ["https://omeka.example.org/topics/person/old"]
+        results = elucidate.batch_update_body_chunked(
+            new_topic_id=n, old_topic_ids=o, elucidate_base=e, dry_run=False, retries=5, backoff=0
+        )
+        assert results[0]["status"] == 400
+        assert results[0]["attempts"] == mock.call_count == 3  # rate limit and timeout retried, not 400
+
+
+def test_batch_update_topics_chunked_error():
+    with requests_mock.Mocker() as mock:
+        e = "https://elucidate.example.org"
+        mock.register_uri("POST", url=e + "/annotation/w3c/services/batch/update", status_code=500)
+        n = "https://omeka.example.org/topics/person/new"
+        o = ["https://omeka.example.org/topics/person/old"]
+        results = elucidate.batch_update_body_chunked(
+            new_topic_id=n, old_topic_ids=o, elucidate_base=e, dry_run=False, retries=1, backoff=0
+        )
+        assert mock.call_count == 2
+        assert results[0]["status"] == 500
+        assert results[0]["attempts"] == 2
+
+
+def test_batch_update_topics_chunked_deadline():
+    with requests_mock.Mocker() as mock:
+        e = "https://elucidate.example.org"
+        mock.register_uri("POST", url=e + "/annotation/w3c/services/batch/update", status_code=500)
+        n = "https://omeka.example.org/topics/person/new"
+        o = ["https://omeka.example.org/topics/person/old"]
+        start = time.monotonic()
+        results = elucidate.batch_update_body_chunked(
+            new_topic_id=n, old_topic_ids=o, elucidate_base=e, dry_run=False, backoff=60, deadline=0.2
+        )
+        assert time.monotonic() - start < 5  # the backoff is capped by the deadline
+        assert results[0]["status"] is None
+        assert all(max(r.timeout) <= 0.2 for r in mock.request_history)  # each POST is capped too
+
+
+def test_request_compression():
+    e = "https://elucidate.example.org"
+    n = "https://omeka.example.org/topics/person/new"
+    o = ["https://omeka.example.org/topics/person/old%s" % i for i in range(100)]
+    elucidate.set_request_compression(1024)
+    elucidate.transfer_stats.reset()
+    try:
+        with requests_mock.Mocker() as mock:
+            mock.register_uri("POST", url=e + "/annotation/w3c/services/batch/update", status_code=200)
+            result_code, result_body = elucidate.batch_update_body(
+                new_topic_id=n, old_topic_ids=o, elucidate_base=e, dry_run=False
+            )
+            request = mock.request_history[0]
+            assert request.headers["Content-Encoding"] == "gzip"
+            assert request.headers["Accept-Encoding"] == elucidate.ACCEPT_ENCODING
+            assert elucidate.gzip.decompress(request.body).decode("utf-8") == result_body
+            elucidate.batch_update_body(
+                new_topic_id=n, old_topic_ids=o[:1], elucidate_base=e, dry_run=False
+            )
+            assert "Content-Encoding" not in mock.request_history[1].headers
+        stats = elucidate.transfer_stats.stats()
+        assert stats["requests"] == 2
+        assert stats["sent"] < stats["sent_uncompressed"]
+        assert stats["sent_ratio"] > 5
+    finally:
+        elucidate.set_request_compression(None)
+
+
 @pytest.mark.datafiles(
     os.path.join(FIXTURE_DIR, "manifest_fixture.json"),
     os.path.join(FIXTURE_DIR, "search_by_target.json"),
@@ -1572,6 +1686,32 @@ def test_batch_delete_by_manifest_dry(datafiles):
         assert status is True
 
 
+def test_batch_delete_by_manifest_p3():
+    manifest = {
+        "@context": "http://iiif.io/api/presentation/3/context.json",
+        "id": "https://iiif.example.org/manifest",
+        "type": "Manifest",
+        "items": [
+            {"id": "https://iiif.example.org/canvas/1", "type": "Canvas"},
+            {"id": "https://iiif.example.org/canvas/2", "type": "Canvas"},
+        ],
+    }
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", url=manifest["id"], json=manifest)
+        delete_uri = "https://elucidate.example.org/annotation/w3c/services/batch/delete"
+        mock.register_uri("POST", url=delete_uri, status_code=200)
+        status = elucidate.iiif_batch_delete_by_manifest(
+            manifest_uri=manifest["id"], elucidate_uri="https://elucidate.example.org", dry_run=False
+        )
+        assert status is True
+        targets = [json.loads(r.text)["target"]["id"] for r in mock.request_history[1:]]
+        assert targets == [
+            "https://iiif.example.org/canvas/1",
+            "https://iiif.example.org/canvas/2",
+            "https://iiif.example.org/manifest",
+        ]
+
+
 @pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "manifest_fixture_no_sequence.json"))
 def test_batch_delete_by_manifest_no_sequence(datafiles):
     """
@@ -1828,3 +1968,388 @@ def test_update_dry():
     anno["body"][0]["source"] = "https://omeka.example.org/topic/virtual:person/smith"
     anno_id = anno["id"]
     assert elucidate.update_anno(anno_uri=anno_id, anno_content=anno, etag="foo", dry_run=True) == 200
+
+
+def test_request_timeout():
+    assert elucidate.request_timeout() == elucidate.DEFAULT_TIMEOUT
+    assert elucidate.request_timeout(10) == (10, 10)
+    assert elucidate.request_timeout((2, 30)) == (2, 30)
+    deadline = elucidate.Deadline(1)
+    connect, read = elucidate.request_timeout((2, 30), deadline=deadline)
+    assert connect <= 1 and read <= 1
+
+
+def test_request_timeout_expired():
+    with pytest.raises(elucidate.DeadlineExceeded):
+        elucidate.request_timeout(deadline=elucidate.Deadline(0))
+
+
+def test_get_items_deadline():
+    deadline = elucidate.Deadline(60)
+    url = "https://elucidate.example.org/annotation/w3c/foo/"
+    url2 = "https://elucidate.example.org/annotation/w3c/foo/?page=1"
+
+    def expire(request, context):
+        deadline.expires = 0  # run out of time once the first page has been fetched
+        return {"id": url, "first": {"items": [{"id": "foo"}], "next": url2}}
+
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", url, json=expire)
+        mock.register_uri("GET", url2, json={"id": url2, "items": [{"id": "bar"}]})
+        items = list(elucidate.get_items(uri=url, deadline=deadline))
+        assert items == [{"id": "foo"}]
+        assert mock.call_count == 1
+
+
+def test_iterative_delete_by_target_deadline_listing():
+    target = "https://example.org/canvas/1"
+    url = elucidate.gen_search_by_container_uri(elucidate_base="https://elucidate.example.org", target_uri=target)
+    for func in [elucidate.iterative_delete_by_target, elucidate.iterative_delete_by_target_async_get]:
+        deadline = elucidate.Deadline(60)
+
+        def expire(request, context):
+            deadline.expires = 0  # run out of time once the first (empty) page has been fetched
+            return {
+                "id": url,
+                "total": 1,
+                "first": {"items": [], "next": url + "?page=1"},
+                "last": url + "?page=1&desc=1",
+            }
+
+        with requests_mock.Mocker() as mock:
+            mock.register_uri("GET", url, json=expire)  # the container, listed by the sync version
+            mock.register_uri("GET", "https://elucidate.example.org/annotation/w3c/services/search/target", json=expire)
+            assert func(target, "https://elucidate.example.org", dryrun=False, deadline=deadline) is False
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "manifest_fixture.json"))
+def test_iterative_delete_by_manifest_deadline(datafiles):
+    path = str(datafiles)
+    deadline = elucidate.Deadline(60)
+    with open(os.path.join(path, "manifest_fixture.json"), "r") as f:
+        m = json.load(f)
+
+    def expire(request, context):
+        deadline.expires = 0
+        return m
+
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", url=m["@id"], json=expire)
+        status = elucidate.iiif_iterative_delete_by_manifest(
+            manifest_uri=m["@id"],
+            elucidate_uri="https://elucidate.example.org",
+            dry_run=True,
+            deadline=deadline,
+        )
+        assert status is False
+        assert mock.call_count == 1  # no canvases were searched
+
+
+def test_iterative_delete_by_manifest_deadline_expired():
+    with requests_mock.Mocker() as mock:
+        status = elucidate.iiif_iterative_delete_by_manifest(
+            manifest_uri="http://iiif.io/api/presentation/2.0/example/fixtures/19/manifest.json",
+            elucidate_uri="https://elucidate.example.org",
+            deadline=elucidate.Deadline(0),
+        )
+        assert status is False
+        assert mock.call_count == 0
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "manifest_fixture.json"))
+def test_batch_delete_by_manifest_deadline(datafiles):
+    path = str(datafiles)
+    deadline = elucidate.Deadline(60)
+    with open(os.path.join(path, "manifest_fixture.json"), "r") as f:
+        m = json.load(f)
+
+    def expire(request, context):
+        deadline.expires = 0
+        return {}
+
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", url=m["@id"], json=m)
+        mock.register_uri(
+            "POST", "https://elucidate.example.org/annotation/w3c/services/batch/delete", json=expire
+        )
+        status = elucidate.iiif_batch_delete_by_manifest(
+            manifest_uri=m["@id"],
+            elucidate_uri="https://elucidate.example.org",
+            dry_run=False,
+            deadline=deadline,
+        )
+        assert status is False
+        assert mock.call_count == 2  # the manifest, and the first canvas's delete
+
+
+def test_write_deadline_expired():
+    deadline = elucidate.Deadline(0)
+    anno_uri = "https://elucidate.example.org/annotation/w3c/foo/1"
+    with requests_mock.Mocker() as mock:
+        with pytest.raises(elucidate.DeadlineExceeded):
+            elucidate.create_anno(
+                "https://elucidate.example.org", {"id": "foo"}, target="http://example.org/canvas", deadline=deadline
+            )
+        with pytest.raises(elucidate.DeadlineExceeded):
+            elucidate.update_anno(anno_uri, {"id": anno_uri}, "etag", dry_run=False, deadline=deadline)
+        with pytest.raises(elucidate.DeadlineExceeded):
+            elucidate.batch_delete_topic(
+                "http://example.org/topic", "https://elucidate.example.org", dry_run=False, deadline=deadline
+            )
+        assert mock.call_count == 0
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "single_anno.json"))
+def test_annotation_from_item(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "single_anno.json"), "r") as f:
+        j = json.load(f)
+    anno = elucidate.Annotation.from_item(j)
+    assert anno.id == j["id"]
+    assert anno.target == "http://waylon.example.org/work/AVT/canvas/274"
+    assert anno.body_source == "https://omeka.example.org/topic/virtual:person/matter"
+    assert anno.creator == "https://montague.example.org/"
+    assert anno.motivation == "tagging"
+    assert anno.content == j
+    assert not hasattr(anno, "__dict__")
+    other = elucidate.Annotation.from_item(json.loads(json.dumps(j)))
+    assert other == anno
+    assert other.target is anno.target  # interned
+
+
+def test_annotation_from_item_minimal():
+    anno = elucidate.Annotation.from_item(
+        {"@id": "https://elucidate.example.org/annotation/oa/foo/1", "creator": {"id": "u1"}}
+    )
+    assert anno.id == "https://elucidate.example.org/annotation/oa/foo/1"
+    assert anno.creator == "u1"
+    assert anno.target is None
+    assert anno.body_source is None
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "single_topic_page.json"),
+    os.path.join(FIXTURE_DIR, "single_topic_page0.json"),
+)
+def test_get_items_as_records(datafiles):
+    path = str(datafiles)
+    with requests_mock.Mocker() as mock:
+        with open(os.path.join(path, "single_topic_page.json"), "r") as f:
+            j = json.load(f)
+        with open(os.path.join(path, "single_topic_page0.json"), "r") as f:
+            j0 = json.load(f)
+        url = (
+            "https://elucidate.example.org/annotation/w3c/services/search/body?fields=id,source&value="
+            + "https%3A%2F%2Fomeka.example.org%2Ftopic%2Fvirtual%3Aperson%2Fmatter"
+        )
+        url2 = (
+            "https://elucidate.example.org/annotation/w3c/services/search/body?fields=id%2Csource&value="
+            + "https%3A%2F%2Fomeka.example.org%2Ftopic%2Fvirtual%3Aperson%2Fmatter&desc=1&page=0"
+        )
+        mock.register_uri("GET", url, json=j)
+        mock.register_uri("GET", url2, json=j0)
+        table = elucidate.InternTable(keys=())  # nothing interned as pages are decoded, so empty
+        items = list(elucidate.get_items(uri=url, as_records=True, intern=table))
+        assert len(items) == 23
+        assert table.stats()["misses"] > 0  # used for the records, not ignored as empty
+        assert all(isinstance(i, elucidate.Annotation) for i in items)
+        assert [i.content for i in items] == j0["items"]
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "single_topic_page0.json"))
+def test_intern_table(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "single_topic_page0.json"), "rb") as f:
+        page = f.read()
+    table = elucidate.InternTable()
+    first = table.loads(page)
+    second = table.loads(page)
+    assert first == json.loads(page.decode("utf-8"))
+    assert second["items"][0]["creator"] is first["items"][0]["creator"]
+    assert second["items"][0]["body"][0]["source"] is first["items"][0]["body"][0]["source"]
+    assert second["items"][0]["id"] is not first["items"][0]["id"]  # id is not an interned key
+    stats = table.stats()
+    assert stats["hits"] > 0
+    assert stats["bytes_saved"] > 0
+    assert stats["size"] == len(table)
+
+
+def test_intern_table_eviction():
+    table = elucidate.InternTable(keys=("creator",), max_size=2)
+    for creator in ["u1", "u2", "u3"]:
+        table.object_hook({"creator": creator})
+    assert len(table) == 2
+    assert table.stats()["evictions"] == 1
+    nested = table.object_hook({"creator": {"id": "".join(["u", "2"])}, "generator": "g"})
+    assert nested["creator"]["id"] is table("u2")
+
+
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, "single_topic_page.json"),
+    os.path.join(FIXTURE_DIR, "single_topic_page0.json"),
+)
+def test_get_items_intern(datafiles):
+    path = str(datafiles)
+    with requests_mock.Mocker() as mock:
+        with open(os.path.join(path, "single_topic_page.json"), "r") as f:
+            j = json.load(f)
+        with open(os.path.join(path, "single_topic_page0.json"), "r") as f:
+            j0 = json.load(f)
+        url = (
+            "https://elucidate.example.org/annotation/w3c/services/search/body?fields=id,source&value="
+            + "https%3A%2F%2Fomeka.example.org%2Ftopic%2Fvirtual%3Aperson%2Fmatter"
+        )
+        url2 = (
+            "https://elucidate.example.org/annotation/w3c/services/search/body?fields=id%2Csource&value="
+            + "https%3A%2F%2Fomeka.example.org%2Ftopic%2Fvirtual%3Aperson%2Fmatter&desc=1&page=0"
+        )
+        mock.register_uri("GET", url, json=j)
+        mock.register_uri("GET", url2, json=j0)
+        table = elucidate.InternTable()
+        items = list(elucidate.get_items(uri=url, intern=table))
+        assert items == j0["items"]
+        assert items[0]["generator"] is items[1]["generator"]
+        assert table.stats()["hits"] > 0
+
+
+def test_iterative_delete_by_target_relist():
+    """
+    Deleting annotations moves later results onto pages that have already been read, so the
+    container is listed again until no new annotations are found.
+    """
+    target = "http://iiif.io/api/presentation/2.0/example/fixtures/canvas/19/c1.json"
+    container = elucidate.gen_search_by_container_uri(
+        elucidate_base="https://elucidate.example.org", target_uri=target
+    )
+    anno_uris = [container + str(i) for i in range(3)]
+    deleted = []
+
+    def listing(request, context):  # page of the annotations not yet deleted, two at a time
+        remaining = [{"id": a} for a in anno_uris if a not in deleted]
+        return {"id": container, "first": {"items": remaining[:2]}}
+
+    def delete(request, context):
+        deleted.append(request.url)
+        context.status_code = 204
+        return ""
+
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", container, json=listing)
+        for anno_uri in anno_uris:
+            mock.register_uri(
+                "GET", anno_uri, headers={"ETag": 'W/"92d446c4402486f44b98c360c030b672'}, json={"id": anno_uri}
+            )
+            mock.register_uri("DELETE", anno_uri, text=delete)
+        assert (
+            elucidate.iterative_delete_by_target(
+                target=target, elucidate_base="https://elucidate.example.org", dryrun=False
+            )
+            is True
+        )
+        assert sorted(deleted) == anno_uris
+
+
+def test_iterative_delete_by_target_bloom_false_positive(monkeypatch):
+    target = "http://iiif.io/api/presentation/2.0/example/fixtures/canvas/19/c1.json"
+    container = elucidate.gen_search_by_container_uri(
+        elucidate_base="https://elucidate.example.org", target_uri=target
+    )
+    anno_uris = [container + str(i) for i in range(2)]
+    deleted = []
+
+    class FalsePositive(set):
+        def add(self, item):  # as a Bloom filter that already "contains" the second annotation
+            new = item not in self and item != anno_uris[1]
+            super().add(item)
+            return new
+
+    def listing(request, context):
+        return {"id": container, "first": {"items": [{"id": a} for a in anno_uris if a not in deleted]}}
+
+    def delete(request, context):
+        deleted.append(request.url)
+        context.status_code = 204
+        return ""
+
+    monkeypatch.setattr(elucidate, "new_id_set", lambda mode: FalsePositive())
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", container, json=listing)
+        for anno_uri in anno_uris:
+            mock.register_uri("GET", anno_uri, headers={"ETag": 'W/"92d4"'}, json={"id": anno_uri})
+            mock.register_uri("DELETE", anno_uri, text=delete)
+        assert not elucidate.iterative_delete_by_target(
+            target=target, elucidate_base="https://elucidate.example.org", dryrun=False, dedup="bloom"
+        )
+        assert deleted == anno_uris[:1]
+
+
+def test_iterative_delete_by_manifest_journal(tmpdir):
+    manifest = {
+        "@id": "https://example.org/iiif/foo/manifest",
+        "sequences": [{"canvases": [{"@id": "https://example.org/iiif/foo/canvas/c1"}]}],
+    }
+    with requests_mock.Mocker() as mock, Journal(os.path.join(str(tmpdir), "j.sqlite")) as journal:
+        mock.register_uri("GET", url=manifest["@id"], json=manifest)
+        for target in [manifest["@id"], "https://example.org/iiif/foo/canvas/c1"]:
+            container = elucidate.gen_search_by_container_uri(
+                elucidate_base="https://elucidate.example.org", target_uri=target
+            )
+            mock.register_uri("GET", url=container, status_code=404)
+        status = elucidate.iiif_iterative_delete_by_manifest(
+            manifest_uri=manifest["@id"],
+            elucidate_uri="https://elucidate.example.org",
+            method="container",
+            dry_run=False,
+            journal=journal,
+        )
+        assert status is True
+        assert journal.completed_canvases(manifest["@id"]) == {
+            manifest["@id"],
+            "https://example.org/iiif/foo/canvas/c1",
+        }
+        mock.reset_mock()
+        status = elucidate.iiif_iterative_delete_by_manifest(
+            manifest_uri=manifest["@id"],
+            elucidate_uri="https://elucidate.example.org",
+            method="container",
+            dry_run=False,
+            journal=journal,
+        )
+        assert status is True
+        assert mock.call_count == 1  # resumed, so only the manifest is requested
+
+
+def test_iterative_delete_by_manifest_journal_deadline(tmpdir):
+    manifest = {
+        "@id": "https://example.org/iiif/foo/manifest",
+        "sequences": [{"canvases": [{"@id": "https://example.org/iiif/foo/canvas/c1"}]}],
+    }
+    container = elucidate.gen_search_by_container_uri(
+        elucidate_base="https://elucidate.example.org", target_uri="https://example.org/iiif/foo/canvas/c1"
+    )
+    for func, kwargs in [
+        (elucidate.iiif_iterative_delete_by_manifest, {"method": "container"}),
+        (elucidate.iiif_iterative_delete_by_manifest_async_get, {}),
+    ]:
+        deadline = elucidate.Deadline(60)
+
+        def expire(request, context):
+            deadline.expires = 0  # run out of time while listing the canvas's annotations
+            return {"total": 1, "first": {"items": [], "next": container + "?page=1"}, "last": container + "?page=1"}
+
+        path = os.path.join(str(tmpdir), "%s.sqlite" % func.__name__)
+        with requests_mock.Mocker() as mock, Journal(path) as journal:
+            mock.register_uri("GET", url=manifest["@id"], json=manifest)
+            mock.register_uri("GET", url=container, json=expire)
+            mock.register_uri("GET", "https://elucidate.example.org/annotation/w3c/services/search/target", json=expire)
+            status = func(
+                manifest_uri=manifest["@id"],
+                elucidate_uri="https://elucidate.example.org",
+                dry_run=False,
+                deadline=deadline,
+                journal=journal,
+                **kwargs
+            )
+            assert status is False
+            assert journal.completed_canvases(manifest["@id"]) == set()  # retried on resume
+            assert journal._conn.execute("SELECT COUNT(*) FROM canvases").fetchone()[0] == 0  # not processed
@@ -0,0 +1,98 @@
+"""
+Tests for `pyelucidate.ratelimit` module.
+"""
+from pyelucidate import pyelucidate as elucidate
+from pyelucidate.ratelimit import RateLimiter, TokenBucket, endpoint_class
+from aioresponses import aioresponses
+import asyncio
+import pytest
+import requests_mock
+import threading
+
+
+def test_endpoint_class():
+    base = "https://elucidate.example.org/annotation/w3c"
+    assert endpoint_class(base + "/services/search/body?value=foo") == "search"
+    assert endpoint_class(base + "/services/batch/update", "POST") == "batch"
+    assert endpoint_class(base + "/foo/1", "DELETE") == "crud"
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=100, burst=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.reserve() > 0  # burst used up
+    stats = bucket.stats()
+    assert stats["requests"] == 3
+    assert stats["waited"] > 0
+
+
+def test_token_bucket_threads():
+    bucket = TokenBucket(rate=200, burst=1)
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = bucket.stats()
+    assert stats["requests"] == 10
+    assert 0.04 <= stats["max_wait"] <= 0.05  # nine requests waiting 5ms apart
+
+
+def test_rate_limiter_classes():
+    limiter = RateLimiter(rate=100, burst=5, classes={"batch": (1, 1)})
+    base = "https://elucidate.example.org/annotation/w3c"
+    assert limiter.bucket(base + "/foo/1") is limiter.bucket(base + "/services/search/target")
+    assert limiter.bucket(base + "/services/batch/delete") is not limiter.bucket(base + "/foo/1")
+    assert limiter.bucket("https://other.example.org/foo") is not limiter.bucket(base + "/foo/1")
+    limiter.acquire(base + "/services/batch/delete", "POST")
+    assert limiter.bucket(base + "/services/batch/delete").reserve() > 0.9
+    assert limiter.stats()["total"]["requests"] == 2
+
+
+def test_rate_limiter_sync_requests():
+    limiter = RateLimiter(rate=1000)
+    elucidate.set_rate_limiter(limiter)
+    try:
+        with requests_mock.Mocker() as mock:
+            mock.register_uri("GET", "https://elucidate.example.org/foo/1", json={"id": "foo"})
+            assert list(elucidate.get_items("https://elucidate.example.org/foo/1")) == []
+    finally:
+        elucidate.set_rate_limiter(None)
+    assert limiter.stats()["total"]["requests"] == 1
+
+
+def test_rate_limiter_async_requests():
+    limiter = RateLimiter(rate=1000)
+    with aioresponses() as mock:
+        mock.get("http://elucidate.example.org/0", payload=dict(foo="bar"))
+        mock.get("http://elucidate.example.org/1", payload=dict(foo="bar"))
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        future = asyncio.ensure_future(
+            elucidate.fetch_all(
+                ["http://elucidate.example.org/0", "http://elucidate.example.org/1"],
+                limiter=limiter,
+            )
+        )
+        assert loop.run_until_complete(future) == [{"foo": "bar"}, {"foo": "bar"}]
+    assert limiter.stats()["total"]["requests"] == 2
+
+
+def test_rate_limiter_deadline():
+    deadline = elucidate.Deadline(60)
+
+    class SlowLimiter(RateLimiter):
+        def acquire(self, url, method="GET"):
+            super().acquire(url, method)
+            deadline.expires = 0  # run out of time waiting for a token
+
+    limiter = SlowLimiter(rate=1000)
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("GET", "https://elucidate.example.org/foo/1", json={"id": "foo"})
+        with pytest.raises(elucidate.DeadlineExceeded):
+            elucidate._request("GET", "https://elucidate.example.org/foo/1", deadline=deadline, limiter=limiter)
+        assert mock.call_count == 0
+        with pytest.raises(elucidate.DeadlineExceeded):
+            elucidate._request("GET", "https://elucidate.example.org/foo/1", deadline=deadline, limiter=limiter)
+    assert limiter.stats()["total"]["requests"] == 1  # no token is taken once the deadline has run out
@@ -291,3 +291,37 @@ def test_transformation_single_body_simple_target():
         )
         == result
     )
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "single_topic_page0.json"))
+def test_transform_page(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "single_topic_page0.json"), "rb") as f:
+        page = f.read()
+    j = json.loads(page.decode("utf-8"))
+    result = elucidate.transform_page(page, flatten_ids=True, trans_function=elucidate.mirador_oa)
+    assert len(result) == len(j["items"])
+    assert result[3] == elucidate.transform_annotation(
+        item=j["items"][3], flatten_at_ids=True, transform_function=elucidate.mirador_oa
+    )
+
+
+@pytest.mark.datafiles(os.path.join(FIXTURE_DIR, "single_topic_page0.json"))
+def test_parallel_transform_pages(datafiles):
+    path = str(datafiles)
+    with open(os.path.join(path, "single_topic_page0.json"), "rb") as f:
+        page = f.read()
+    items = json.loads(page.decode("utf-8"))["items"]
+    pages = [page, b'{"items": []}', page]
+    result = list(
+        elucidate.parallel_transform_pages(
+            pages, workers=2, flatten_ids=True, trans_function=elucidate.mirador_oa
+        )
+    )
+    expected = [
+        elucidate.transform_annotation(
+            item=i, flatten_at_ids=True, transform_function=elucidate.mirador_oa
+        )
+        for i in items + items
+    ]
+    assert result == expected  # results stream back in page order